@@ -0,0 +1,257 @@
+"""Differential check of the optimized computations against the reference oracles.
+
+    python -m benchmarks.check --scale real small medium --output check.json
+
+For each dataset (the same ones ``benchmarks.run`` times, loaded the same
+way) every check runs the slow implementation from ``benchmarks/oracles.py``
+and the optimized one main.py uses, times both, and compares every output
+column within ``--rtol`` / ``--atol`` (NaN matches NaN). The oracles start
+from the parsed transactions, so the optimized side's timing includes
+building what it derives from them (the ``TransactionStore`` with its
+quantity precision and prefix sums) rather than reusing the one
+``run.load`` built. The report lists
+the speedup next to the per-column result; the exit status is 1 if any
+column differs.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import portfolio
+from benchmarks import oracles, run
+from benchmarks.synthetic import SCALES, dataset_paths
+from data_store import TransactionStore
+
+REPORT_SCHEMA = 1
+# Percentages the app rounds to 2 decimals for display: numpy and Python round
+# exact halves differently, so those may differ by one unit in the last place
+ROUNDED_PERCENT_ATOL = 0.01 + 1e-9
+
+
+def _hist(data: dict) -> pd.DataFrame:
+    return data["price_store"].frame
+
+
+def _nav_windows(data: dict) -> list:
+    """(start, end) windows for the average NAV check: everything, the last year and the middle half."""
+    first, last = data["transactions"]["Date"].min(), data["transactions"]["Date"].max()
+    span = last - first
+    return [(first, last), (last - pd.DateOffset(years=1), last), (first + span / 4, last - span / 4)]
+
+
+def _with_transaction_store(optimized):
+    """``optimized`` run on a ``TransactionStore`` built inside the timed call."""
+    return lambda data: optimized(dict(data, transaction_store=TransactionStore(data["transactions"])))
+
+
+# Each check: (oracle(data), optimized(data), outputs(expected, actual) -> [(name, expected frame, actual frame, atol or None)])
+def _summary_outputs(expected, actual):
+    percent = ["Latest Change (%)", "Total Return (%)", "Net Return (%)", "MoM performance (%)", "Weight (Mkt Value)"]
+    return [
+        ("summary", expected.drop(columns=percent), actual, None),
+        ("summary %", expected[["Fund", *percent]], actual, ROUNDED_PERCENT_ATOL),
+    ]
+
+
+def _pnl_mv_outputs(expected, actual):
+    first_tx = [pd.Series(result[2], dtype="datetime64[ns]").rename("first transaction").to_frame() for result in (expected, actual)]
+    return [("pnl", expected[0], actual[0], None), ("mv", expected[1], actual[1], None), ("first tx", *first_tx, None)]
+
+
+def _evolution_outputs(expected, actual):
+    return [("contributions", expected[0], actual[0], None), ("market value", expected[1], actual[1], None)]
+
+
+def _allocation_outputs(expected, actual):
+    outputs = []
+    for by, totals in actual.items():
+        for label, exp, act in zip(("GC", "MV"), expected[by], totals):
+            # Equal values may come out in either order
+            outputs.append((f"{by} {label}", exp.sort_values("Category").reset_index(drop=True), act.sort_values("Category").reset_index(drop=True), None))
+    return outputs
+
+
+def _historical_table_outputs(expected, actual):
+    prices = actual[0].assign(date=actual[0]["date"].dt.strftime("%Y-%m-%d"))
+    return [
+        ("prices", expected[0], prices, None),
+        ("changes", expected[1], actual[1], ROUNDED_PERCENT_ATOL),
+        ("traded", expected[2], actual[2], None),
+    ]
+
+
+def _reconcile_outputs(expected, actual):
+    pl = [pd.DataFrame([result[1]], columns=["P/L Quantity approx.", "P/L Quantity approx. (now)"]) for result in (expected, actual)]
+    return [("transactions", expected[0], actual[0], None), ("P/L quantity", *pl, None)]
+
+
+def _oracle_reconcile(data):
+    trans_df = data["transactions"].sort_values("Date", ascending=False).reset_index(drop=True)
+    recon = oracles.reconcile_transactions(trans_df)
+    return recon, oracles.pl_quantity_approx(recon, _hist(data), oracles.quantity_decimals(data["transactions"]))
+
+
+def _avg_nav_outputs(expected, actual):
+    return [
+        (f"window {i}", pd.Series(exp, dtype=float).sort_index().to_frame("Average NAV"), pd.Series(act, dtype=float).sort_index().to_frame("Average NAV"), None)
+        for i, (exp, act) in enumerate(zip(expected, actual))
+    ]
+
+
+CHECKS = [
+    ("quantity_decimals",
+     lambda data: oracles.quantity_decimals(data["transactions"]),
+     lambda data: data_store.quantity_decimals(data["transactions"]),
+     lambda e, a: [("decimals", pd.Series(e).sort_index().to_frame("dp"), pd.Series(a).sort_index().to_frame("dp"), 0)]),
+    ("summary",
+     lambda data: oracles.fund_summary(data["transactions"], _hist(data), data["fund_list"]),
+     _with_transaction_store(run.summary),
+     _summary_outputs),
+    ("pnl_mv",
+     lambda data: oracles.holdings_evolution(_hist(data), data["transactions"], data["priced_funds"]),
+     run.pnl_mv,
+     _pnl_mv_outputs),
+    ("evolution",
+     lambda data: oracles.investment_evolution(data["transactions"], _hist(data)),
+     run.evolution,
+     _evolution_outputs),
+    ("allocation",
+     lambda data: {by: oracles.allocation(data["transactions"], data["funds"], _hist(data), by) for by in ["Fund", "Type", "Asset Manager"]},
+     run.allocation,
+     _allocation_outputs),
+    ("historical_table",
+     lambda data: oracles.historical_table(_hist(data), data["transactions"], data["priced_funds"]),
+     _with_transaction_store(run.historical_table),
+     _historical_table_outputs),
+    ("reconcile",
+     _oracle_reconcile,
+     _with_transaction_store(run.reconcile),
+     _reconcile_outputs),
+    ("avg_nav",
+     lambda data: [oracles.avg_nav_by_fund(data["transactions"], start, end) for start, end in _nav_windows(data)],
+     _with_transaction_store(lambda data: [portfolio.avg_nav_by_fund(data["transaction_store"], data["fund_list"], start, end) for start, end in _nav_windows(data)]),
+     _avg_nav_outputs),
+]
+
+
+def _as_float(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.to_numpy(dtype="datetime64[ns]")
+        return np.where(np.isnat(values), np.nan, values.astype("int64").astype(float))
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def compare_column(expected: pd.Series, actual: pd.Series, rtol: float, atol: float) -> dict:
+    """Mismatch count and largest absolute difference between two equally long columns."""
+    if len(expected) != len(actual):
+        return {"ok": False, "mismatches": None, "max_abs_diff": None, "error": f"{len(expected)} rows expected, {len(actual)} found"}
+    numeric = all(
+        pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s) for s in (expected, actual)
+    ) and not any(pd.api.types.is_bool_dtype(s) for s in (expected, actual))
+    if numeric:
+        exp, act = _as_float(expected), _as_float(actual)
+        close = np.isclose(act, exp, rtol=rtol, atol=atol, equal_nan=True)
+        diff = np.abs(act - exp)
+        max_diff = float(np.nanmax(diff)) if np.isfinite(diff).any() else 0.0
+    else:
+        exp, act = expected.to_numpy(dtype=object), actual.to_numpy(dtype=object)
+        close = np.array([(pd.isna(e) and pd.isna(a)) or e == a for e, a in zip(exp, act)], dtype=bool)
+        max_diff = None
+    mismatches = int((~close).sum())
+    result = {"ok": mismatches == 0, "mismatches": mismatches, "max_abs_diff": max_diff}
+    if mismatches:
+        first = int(np.flatnonzero(~close)[0])
+        result["first"] = {"row": first, "expected": repr(exp[first]), "actual": repr(act[first])}
+    return result
+
+
+def compare_frames(expected: pd.DataFrame, actual: pd.DataFrame, rtol: float, atol: float) -> dict:
+    """Column -> ``compare_column`` result for every column of ``expected`` (missing columns fail)."""
+    expected, actual = expected.reset_index(), actual.reset_index()
+    results = {}
+    for column in expected.columns:
+        if column not in actual.columns:
+            results[str(column)] = {"ok": False, "mismatches": None, "max_abs_diff": None, "error": "missing"}
+        else:
+            results[str(column)] = compare_column(expected[column], actual[column], rtol, atol)
+    return results
+
+
+def check_dataset(paths: dict, repeat: int, rtol: float, atol: float, checks=None) -> dict:
+    """Timings and column comparisons of every check for one dataset."""
+    data = run.load(paths)
+    results = {}
+    for name, oracle, optimized, outputs in CHECKS:
+        if checks is not None and name not in checks:
+            continue
+        expected, oracle_runs = run._timed(lambda: oracle(data), repeat)
+        actual, optimized_runs = run._timed(lambda: optimized(data), repeat)
+        columns = {}
+        for output, exp, act, output_atol in outputs(expected, actual):
+            for column, result in compare_frames(exp, act, rtol, atol if output_atol is None else output_atol).items():
+                columns[f"{output}: {column}"] = result
+        oracle_s, optimized_s = min(oracle_runs), min(optimized_runs)
+        results[name] = {
+            "ok": all(result["ok"] for result in columns.values()),
+            "oracle_s": oracle_s,
+            "optimized_s": optimized_s,
+            "speedup": oracle_s / optimized_s if optimized_s else None,
+            "columns": columns,
+        }
+    return {
+        "funds": len(data["funds"]),
+        "transactions": len(data["transactions"]),
+        "price_rows": len(data["price_store"]),
+        "ok": all(result["ok"] for result in results.values()),
+        "checks": results,
+    }
+
+
+def summarize(report: dict) -> str:
+    """Text table of oracle/optimized seconds, speedup and failing columns per dataset/check."""
+    lines = [f"{'dataset':<8} {'check':<18} {'oracle (s)':>10} {'optimized (s)':>13} {'speedup':>9}  result"]
+    for dataset, result in report["results"].items():
+        for name, check in result["checks"].items():
+            failed = [column for column, r in check["columns"].items() if not r["ok"]]
+            status = "ok" if not failed else f"FAIL {len(failed)}/{len(check['columns'])} columns: " + ", ".join(failed[:5])
+            speedup = f"{check['speedup']:.1f}x" if check["speedup"] else "-"
+            lines.append(f"{dataset:<8} {name:<18} {check['oracle_s']:>10.4f} {check['optimized_s']:>13.4f} {speedup:>9}  {status}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the optimized computations with the reference oracles.")
+    parser.add_argument("--scale", nargs="+", choices=["real", *SCALES], default=["real", "small"])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "sbronze-bench"), help="where synthetic datasets are generated (shared with benchmarks.run)")
+    parser.add_argument("--check", nargs="+", choices=[name for name, *_ in CHECKS], help="only run these checks")
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    parser.add_argument("--atol", type=float, default=1e-6)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = {
+        "schema": REPORT_SCHEMA, "environment": run.environment(), "repeat": args.repeat, "seed": args.seed,
+        "rtol": args.rtol, "atol": args.atol, "results": {},
+    }
+    for name in args.scale:
+        paths = dataset_paths(name, args.data_dir, seed=args.seed)
+        report["results"][name] = check_dataset(paths, args.repeat, args.rtol, args.atol, args.check)
+    report["ok"] = all(result["ok"] for result in report["results"].values())
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(summarize(report))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
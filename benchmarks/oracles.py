@@ -0,0 +1,312 @@
+"""Reference implementations kept as correctness oracles.
+
+These are the original row-by-row / per-date versions of the computations
+main.py used to do inline, with the Streamlit calls stripped and results
+returned as numbers instead of formatted strings. They are deliberately
+slow and straightforward; ``benchmarks/check.py`` compares the optimized
+``portfolio`` / ``data_store`` paths against them. Do not optimize them.
+"""
+import pandas as pd
+
+
+def quantity_decimals(transactions: pd.DataFrame, cap: int = 3) -> dict:
+    """Fund -> most decimals any quantity uses (read at 6 dp), capped at ``cap``."""
+    def _count_decimals(num):
+        if pd.isna(num):
+            return 0
+        s = f"{float(num):.6f}".rstrip('0').rstrip('.')
+        if '.' in s:
+            return min(len(s.split('.')[-1]), 6)
+        return 0
+    decimals = transactions.groupby("Fund")["Quantity"].apply(
+        lambda s: max((_count_decimals(v) for v in s if pd.notna(v)), default=0)
+    ).to_dict()
+    return {f: min(int(d or 0), cap) for f, d in decimals.items()}
+
+
+def fund_summary(transactions: pd.DataFrame, hist_data: pd.DataFrame, fund_order) -> pd.DataFrame:
+    """Portfolio Summary numbers: per-fund masks and loops over the latest price rows."""
+    df = transactions.copy()
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df.dropna(subset=["Date"])
+    df["Gross Contribution (real)"] = df["Quantity"] * df["Price (€)"] + df["Fees (€)"]
+    df["Gross Contribution (theor)"] = (df["Gross Contribution (real)"] / 10).round() * 10
+    df["Net Invested"] = df["Quantity"] * df["Price (€)"]
+
+    summary = df.groupby("Fund").agg({
+        "Quantity": "sum",
+        "Fees (€)": "sum",
+        "Gross Contribution (theor)": "sum",
+        "Net Invested": "sum"
+    }).reset_index()
+    summary = summary.rename(columns={
+        "Gross Contribution (theor)": "Gross Contributions (€)",
+        "Net Invested": "Net Invested (€)"
+    })
+    summary["Average NAV (€)"] = (summary["Gross Contributions (€)"] - summary["Fees (€)"]) / summary["Quantity"]
+    qty_numeric = summary["Quantity"].astype(float).copy()
+
+    if len(hist_data) > 0 and "date" in hist_data.columns:
+        latest_date = pd.to_datetime(hist_data["date"]).max()
+        latest_prices = {}
+        for fund in summary["Fund"]:
+            if fund in hist_data.columns:
+                price_vals = hist_data[hist_data["date"] == latest_date][fund].values
+                if len(price_vals) > 0 and pd.notna(price_vals[0]):
+                    latest_prices[fund] = price_vals[0]
+        summary["Latest Price (€)"] = summary["Fund"].map(latest_prices)
+        summary["Market Value (€)"] = qty_numeric * summary["Latest Price (€)"].fillna(0.0)
+
+        latest_pct_map = {}
+        hist_sorted = hist_data.sort_values("date", ascending=False)
+        for fund in summary["Fund"]:
+            latest_pct_map[fund] = None
+            if fund in hist_sorted.columns:
+                s = pd.to_numeric(hist_sorted[fund], errors="coerce")
+                if len(s) > 1 and pd.notna(s.iloc[0]) and pd.notna(s.iloc[1]):
+                    latest_pct_map[fund] = round(float((s.iloc[0] / s.iloc[1] - 1.0) * 100.0), 2)
+    else:
+        summary["Latest Price (€)"] = 0.0
+        summary["Market Value (€)"] = 0.0
+        latest_pct_map = {f: None for f in summary["Fund"]}
+    summary["Latest Change (%)"] = summary["Fund"].map(latest_pct_map).astype(float)
+
+    summary["Total Return (€)"] = summary["Market Value (€)"] - summary["Gross Contributions (€)"]
+    summary["Total Return (%)"] = (summary["Total Return (€)"] / summary["Gross Contributions (€)"] * 100).round(2)
+    summary["Net Return (€)"] = summary["Market Value (€)"] - summary["Net Invested (€)"]
+    summary["Net Return (%)"] = (summary["Net Return (€)"] / summary["Net Invested (€)"] * 100).round(2)
+
+    df["month"] = df["Date"].dt.to_period("M")
+    current_month = df["month"].max()
+    prev_month = current_month - 1
+    mom_performance = {}
+    for fund in summary["Fund"]:
+        fund_df = df[df["Fund"] == fund]
+        current_month_price = fund_df[fund_df["month"] == current_month]["Price (€)"].mean()
+        prev_month_price = fund_df[fund_df["month"] == prev_month]["Price (€)"].mean()
+        if pd.notna(prev_month_price) and prev_month_price > 0 and pd.notna(current_month_price):
+            mom_performance[fund] = ((current_month_price - prev_month_price) / prev_month_price * 100)
+        else:
+            mom_performance[fund] = 0.0
+    summary["MoM performance (%)"] = summary["Fund"].map(mom_performance).round(2)
+
+    total_market_value = summary["Market Value (€)"].sum()
+    summary["Weight (Mkt Value)"] = (summary["Market Value (€)"] / total_market_value * 100).round(2)
+    summary["fund_order"] = summary["Fund"].map({f: i for i, f in enumerate(fund_order)})
+    return summary.sort_values("fund_order").reset_index(drop=True)
+
+
+def holdings_evolution(hist_data: pd.DataFrame, transactions: pd.DataFrame, filter_funds):
+    """Daily P/L and market value with t-1 holdings from per-fund ``merge_asof`` (ascending)."""
+    hist_asc = hist_data[["date"] + list(filter_funds)].copy()
+    hist_asc["date"] = pd.to_datetime(hist_asc["date"], errors="coerce")
+    hist_asc = hist_asc.dropna(subset=["date"])
+    hist_asc = hist_asc.sort_values("date").reset_index(drop=True)
+
+    tx_sorted = transactions.copy()
+    tx_sorted["Date"] = pd.to_datetime(tx_sorted["Date"], errors="coerce")
+    tx_sorted = tx_sorted.dropna(subset=["Date"]).sort_values("Date")
+    first_tx_date_by_fund = tx_sorted.groupby("Fund")["Date"].min().to_dict()
+
+    qty_prev_df = pd.DataFrame({"date": hist_asc["date"]})
+    for fund in filter_funds:
+        fund_tx = tx_sorted[tx_sorted["Fund"] == fund][["Date", "Quantity"]].copy()
+        if len(fund_tx) == 0:
+            qty_prev_df[fund] = 0.0
+            continue
+        fund_tx["cum_qty"] = fund_tx["Quantity"].cumsum()
+        merged = pd.merge_asof(
+            hist_asc[["date"]],
+            fund_tx[["Date", "cum_qty"]].sort_values("Date"),
+            left_on="date",
+            right_on="Date",
+            direction="backward",
+        )
+        qty_series = merged["cum_qty"].fillna(0.0)
+        qty_prev_df[fund] = qty_series.shift(1).fillna(0.0)
+
+    pnl_df = hist_asc[["date"]].copy()
+    for fund in filter_funds:
+        price_col = pd.to_numeric(hist_asc[fund], errors="coerce")
+        price_diff = price_col.diff()
+        qty_prev = qty_prev_df[fund]
+        pnl_df[f"{fund} (€)"] = qty_prev * price_diff
+        pnl_df[f"{fund} (%)"] = (price_diff / price_col.shift(1)) * 100
+    abs_change_series = pd.DataFrame([pnl_df[f"{f} (€)"] for f in filter_funds]).sum(axis=0)
+    pnl_df["Daily P/L (€)"] = abs_change_series
+    prev_portfolio_value = pd.DataFrame([qty_prev_df[f] * pd.to_numeric(hist_asc[f], errors="coerce").shift(1) for f in filter_funds]).sum(axis=0)
+    pnl_df["Daily P/L (%)"] = (abs_change_series / prev_portfolio_value.replace({0: pd.NA})) * 100
+
+    mv_df = hist_asc[["date"]].copy()
+    for fund in filter_funds:
+        price_col = pd.to_numeric(hist_asc[fund], errors="coerce")
+        qty_prev = qty_prev_df[fund]
+        mv_df[f"{fund} MV (€)"] = qty_prev * price_col
+        prev_price = price_col.shift(1)
+        mv_df[f"{fund} MV Δ (€)"] = (qty_prev * price_col) - (qty_prev * prev_price)
+        mv_df[f"{fund} MV Δ (%)"] = (price_col / prev_price - 1) * 100
+    total_mv = pd.DataFrame([mv_df[f"{f} MV (€)"] for f in filter_funds]).sum(axis=0)
+    prev_total_mv = total_mv.shift(1)
+    mv_df["Daily MV (€)"] = total_mv
+    mv_df["Daily MV Δ (€)"] = total_mv - prev_total_mv
+    mv_df["Daily MV Δ (%)"] = ((total_mv - prev_total_mv) / prev_total_mv.replace({0: pd.NA})) * 100
+    return pnl_df, mv_df, first_tx_date_by_fund
+
+
+def investment_evolution(transactions: pd.DataFrame, hist_data: pd.DataFrame):
+    """Gross Contribution stair line (``iterrows``) and market value (scan per price date)."""
+    df = transactions.copy()
+    df["date_dt"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df.dropna(subset=["date_dt"])
+    df_sorted = df.sort_values("date_dt")
+    df_sorted["Gross Contribution (real)"] = df_sorted["Quantity"] * df_sorted["Price (€)"] + df_sorted["Fees (€)"]
+    df_sorted["Gross Contribution (theor)"] = (df_sorted["Gross Contribution (real)"] / 10).round() * 10
+
+    daily_data = df_sorted.groupby("date_dt").agg({"Gross Contribution (theor)": "sum"}).reset_index()
+    daily_data["Gross Contribution"] = daily_data["Gross Contribution (theor)"].cumsum()
+    daily_data = daily_data.sort_values("date_dt")
+    stair_dates = []
+    stair_values = []
+    for idx, row in daily_data.iterrows():
+        if idx > 0:
+            stair_dates.append(row["date_dt"])
+            stair_values.append(daily_data.iloc[idx - 1]["Gross Contribution"])
+        stair_dates.append(row["date_dt"])
+        stair_values.append(row["Gross Contribution"])
+    stair_df = pd.DataFrame({"date_dt": stair_dates, "Gross Contribution": stair_values})
+
+    market_value_by_date = []
+    if len(hist_data) > 0 and "date" in hist_data.columns:
+        for hist_date in sorted(hist_data["date"].unique()):
+            tx_up_to_date = df_sorted[df_sorted["date_dt"] <= hist_date]
+            if len(tx_up_to_date) == 0:
+                continue
+            mv = 0.0
+            for fund in tx_up_to_date["Fund"].unique():
+                qty = tx_up_to_date[tx_up_to_date["Fund"] == fund]["Quantity"].sum()
+                if fund in hist_data.columns:
+                    price_row = hist_data[hist_data["date"] == hist_date][fund]
+                    if len(price_row) > 0 and pd.notna(price_row.iloc[0]):
+                        mv += qty * price_row.iloc[0]
+            if mv > 0:
+                market_value_by_date.append({"date": hist_date, "market_value": mv})
+    market_value_df = pd.DataFrame(market_value_by_date) if market_value_by_date else pd.DataFrame()
+
+    if len(hist_data) > 0 and "date" in hist_data.columns and len(stair_df) > 0:
+        latest_hist_date = pd.to_datetime(hist_data["date"], errors="coerce").max()
+        latest_stair_date = pd.to_datetime(stair_df["date_dt"], errors="coerce").max()
+        if pd.notna(latest_hist_date) and pd.notna(latest_stair_date) and latest_hist_date > latest_stair_date:
+            stair_df = pd.concat([
+                stair_df,
+                pd.DataFrame({"date_dt": [latest_hist_date], "Gross Contribution": [stair_df["Gross Contribution"].iloc[-1]]})
+            ], ignore_index=True)
+    return stair_df, market_value_df
+
+
+def allocation(transactions: pd.DataFrame, funds: pd.DataFrame, hist_data: pd.DataFrame, alloc_by: str):
+    """(Gross Contributions, Market Value) pie values per category via merges and a latest-price loop."""
+    df = transactions.copy()
+    df["invested"] = df["Quantity"] * df["Price (€)"] + df["Fees (€)"]
+    if alloc_by == "Fund":
+        alloc_gc = df.groupby("Fund")["invested"].sum().reset_index()
+    elif alloc_by == "Type":
+        tmp = df.merge(funds[["Fund", "Type"]], on="Fund", how="left")
+        alloc_gc = tmp.groupby("Type")["invested"].sum().reset_index()
+    else:
+        tmp = df.merge(funds[["Fund", "Fund Name"]], on="Fund", how="left")
+        tmp["Asset Manager"] = tmp["Fund Name"].str.split().str[0]
+        alloc_gc = tmp.groupby("Asset Manager")["invested"].sum().reset_index()
+    alloc_gc = alloc_gc.sort_values("invested", ascending=False)
+    alloc_gc.columns = ["Category", "Value"]
+
+    mv_map = {}
+    if len(hist_data) > 0 and "date" in hist_data.columns:
+        latest_d = pd.to_datetime(hist_data["date"], errors="coerce").max()
+        qty_by_fund = df.groupby("Fund")["Quantity"].sum()
+        for fund in qty_by_fund.index:
+            if fund in hist_data.columns:
+                price_vals = hist_data[hist_data["date"] == latest_d][fund].values
+                if len(price_vals) > 0 and pd.notna(price_vals[0]):
+                    mv_map[fund] = float(qty_by_fund.loc[fund]) * float(price_vals[0])
+    mv_df = pd.DataFrame({"Fund": list(mv_map.keys()), "MV": list(mv_map.values())})
+    if alloc_by == "Fund":
+        alloc_mv = mv_df.rename(columns={"Fund": "Category", "MV": "Value"})
+    elif alloc_by == "Type":
+        mv_df = mv_df.merge(funds[["Fund", "Type"]], on="Fund", how="left")
+        alloc_mv = mv_df.groupby("Type")["MV"].sum().reset_index().rename(columns={"Type": "Category", "MV": "Value"})
+    else:
+        mv_df = mv_df.merge(funds[["Fund", "Fund Name"]], on="Fund", how="left")
+        mv_df["Asset Manager"] = mv_df["Fund Name"].str.split().str[0]
+        alloc_mv = mv_df.groupby("Asset Manager")["MV"].sum().reset_index().rename(columns={"Asset Manager": "Category", "MV": "Value"})
+    return alloc_gc, alloc_mv.sort_values("Value", ascending=False)
+
+
+def historical_table(hist_data: pd.DataFrame, transactions: pd.DataFrame, selected_funds):
+    """Historical Data table: prices newest first, % change via ``pct_change(periods=-1)`` and transaction days."""
+    historical_data_df = hist_data[["date"] + list(selected_funds)].copy()
+    historical_data_df["date"] = pd.to_datetime(historical_data_df["date"])
+    historical_data_df = historical_data_df.sort_values("date", ascending=False).reset_index(drop=True)
+    historical_data_df["date"] = historical_data_df["date"].dt.strftime("%Y-%m-%d")
+
+    tx_tmp = transactions.copy()
+    tx_tmp["Date"] = pd.to_datetime(tx_tmp["Date"], errors="coerce")
+    tx_tmp = tx_tmp.dropna(subset=["Date"])
+    changes = pd.DataFrame(index=historical_data_df.index)
+    traded = pd.DataFrame(index=historical_data_df.index)
+    for col in selected_funds:
+        perf = historical_data_df[col].pct_change(periods=-1) * 100
+        # The table shows and colours round(p, 2)
+        changes[col] = [None if pd.isna(p) else round(float(p), 2) for p in perf]
+        tx_dates = set(tx_tmp[tx_tmp["Fund"] == col]["Date"].dt.strftime("%Y-%m-%d").tolist())
+        traded[col] = [d in tx_dates for d in historical_data_df["date"].tolist()]
+    return historical_data_df, changes.astype(float), traded
+
+
+def reconcile_transactions(trans_df: pd.DataFrame) -> pd.DataFrame:
+    """Transaction History derived columns."""
+    trans_df = trans_df.copy()
+    trans_df["Gross Contribution (real)"] = trans_df["Quantity"] * trans_df["Price (€)"] + trans_df["Fees (€)"]
+    trans_df["Gross Contribution (theor)"] = (trans_df["Gross Contribution (real)"] / 10).round() * 10
+    trans_df["Net Invested"] = trans_df["Quantity"] * trans_df["Price (€)"]
+    trans_df["Δ Net Inv vs Exp"] = trans_df["Net Invested"] - trans_df["Gross Contribution (theor)"] + trans_df["Fees (€)"]
+    trans_df["Quantity (theor)"] = (trans_df["Gross Contribution (theor)"] - trans_df["Fees (€)"]) / trans_df["Price (€)"]
+    trans_df["Δ Quantity"] = trans_df["Quantity"] - trans_df["Quantity (theor)"]
+    return trans_df
+
+
+def pl_quantity_approx(trans_df: pd.DataFrame, hist_data: pd.DataFrame, fund_qty_decimals: dict):
+    """P/L Quantity approx. (at the transaction price, and now) with one ``iterrows`` pass."""
+    pl_qty_approx = 0.0
+    pl_qty_approx_now = 0.0
+    latest_date = pd.to_datetime(hist_data["date"]).max()
+    for _, row in trans_df.iterrows():
+        fund = row["Fund"]
+        delta_qty_raw = row["Δ Quantity"]
+        dp = fund_qty_decimals.get(fund, 3)
+        delta_qty = round(delta_qty_raw, dp) if pd.notna(delta_qty_raw) else None
+        if delta_qty is not None and abs(delta_qty) < 10 ** (-dp):
+            delta_qty = 0.0
+        if pd.notna(delta_qty):
+            pl_qty_approx += delta_qty * row["Price (€)"]
+            if fund in hist_data.columns:
+                latest_price = hist_data[hist_data["date"] == latest_date][fund].values
+                if len(latest_price) > 0 and pd.notna(latest_price[0]):
+                    pl_qty_approx_now += delta_qty * latest_price[0]
+    return pl_qty_approx, pl_qty_approx_now
+
+
+def avg_nav_by_fund(transactions: pd.DataFrame, start, end) -> dict:
+    """Average NAV per fund over [start, end] from a filtered groupby."""
+    avg_nav = {}
+    tx_range = transactions.copy()
+    tx_range["Date"] = pd.to_datetime(tx_range.get("Date"), errors="coerce")
+    tx_range = tx_range.dropna(subset=["Date"])
+    tx_range = tx_range[(tx_range["Date"] >= pd.to_datetime(start)) & (tx_range["Date"] <= pd.to_datetime(end))]
+    if len(tx_range) > 0:
+        tx_range["Gross Contribution"] = tx_range["Quantity"] * tx_range["Price (€)"] + tx_range["Fees (€)"]
+        grouped = tx_range.groupby("Fund").agg({"Gross Contribution": "sum", "Quantity": "sum"})
+        for fund, row in grouped.iterrows():
+            qty = row["Quantity"]
+            if qty and qty != 0:
+                avg_nav[fund] = row["Gross Contribution"] / qty
+    return avg_nav
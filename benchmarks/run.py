@@ -0,0 +1,282 @@
+"""Time each computation stage of the app on real and synthetic datasets.
+
+    python -m benchmarks.run --scale real small medium large --output bench.json
+    python -m benchmarks.run --scale medium --compare bench.json
+
+Stages mirror what a cold Overview / Transaction History / Historical Data
+render computes, through the same ``portfolio`` / ``formatting`` / ``charts``
+functions main.py uses. The JSON report records per-stage min/median/mean
+seconds plus the commit, so reports from two commits can be compared with
+``--compare``.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+
+import formatting as fmt
+import portfolio
+from benchmarks.synthetic import SCALES, dataset_paths
+from charts import downsample, line_trace, transaction_markers
+from data_store import PriceStore, TransactionStore, read_prices
+
+REPORT_SCHEMA = 1
+CHART_MAX_POINTS = 1500
+HIST_TABLE_PAGE_SIZE = 100
+
+
+def load(paths: dict) -> dict:
+    """Read the three CSVs and build the stores, as main.py does on a cold start."""
+    funds = pd.read_csv(paths["funds"])
+    transactions = pd.read_csv(paths["transactions"], parse_dates=["Date"])
+    price_store = PriceStore(read_prices(paths["prices"], funds))
+    transaction_store = TransactionStore(transactions)
+    fund_list = funds["Fund"].tolist()
+    return {
+        "funds": funds,
+        "transactions": transactions,
+        "price_store": price_store,
+        "transaction_store": transaction_store,
+        "fund_list": fund_list,
+        "priced_funds": [f for f in fund_list if f in price_store.frame.columns],
+        "colors": dict(zip(funds["Fund"], funds["Colour"])),
+    }
+
+
+def summary(data: dict) -> pd.DataFrame:
+    return portfolio.fund_summary(data["transactions"], data["price_store"], data["transaction_store"], data["fund_list"])
+
+
+def pnl_mv(data: dict):
+    return portfolio.holdings_evolution(data["price_store"].frame, data["transactions"], data["priced_funds"])
+
+
+def evolution(data: dict):
+    prices = data["price_store"].frame
+    steps = portfolio.contribution_steps(data["transactions"], until=prices["date"].max())
+    return steps, portfolio.market_value_history(data["transactions"], prices)
+
+
+def allocation(data: dict):
+    cube = portfolio.allocation_cube(data["transactions"], data["funds"], data["colors"], data["price_store"].latest_prices())
+    return {by: portfolio.allocation_totals(cube, by) for by in ["Fund", "Type", "Asset Manager"]}
+
+
+def historical_table(data: dict):
+    return portfolio.historical_table(data["price_store"].frame, data["transaction_store"].frame, tuple(data["priced_funds"]))
+
+
+def reconcile(data: dict):
+    trans_df = data["transaction_store"].frame.sort_values("Date", ascending=False).reset_index(drop=True)
+    recon = portfolio.reconcile_transactions(trans_df, data["transaction_store"].quantity_decimals)
+    return recon, portfolio.pl_quantity_approx(recon, data["price_store"].latest_prices())
+
+
+def table_formatting(data: dict, outputs: dict):
+    """Display strings and style frames for the summary, P/L, transactions and one historical page."""
+    summary_df = outputs["summary"]
+    decimals = data["transaction_store"].quantity_decimals
+    display_summary = pd.DataFrame({
+        "Fund": summary_df["Fund"],
+        "Gross Contributions (€)": fmt.currency(summary_df["Gross Contributions (€)"]),
+        "Latest Price (€)": fmt.with_note(
+            fmt.currency(summary_df["Latest Price (€)"].fillna(0.0)),
+            np.where(summary_df["Latest Change (%)"].isna(), "", fmt.percent(summary_df["Latest Change (%)"], signed=True)),
+        ),
+        "Quantity": fmt.quantity(summary_df["Quantity"], summary_df["Fund"].map(decimals).fillna(3)),
+        "Market Value (€)": fmt.currency(summary_df["Market Value (€)"]),
+        "MoM performance (%)": fmt.percent(summary_df["MoM performance (%)"]),
+    })
+    summary_css = fmt.style_frame(display_summary, {
+        "Fund": fmt.fund_backgrounds(display_summary["Fund"], data["colors"]),
+        "MoM performance (%)": np.where(summary_df["MoM performance (%)"].to_numpy() >= 0, fmt.POSITIVE_BG, fmt.NEGATIVE_BG),
+    })
+
+    pnl_df = outputs["pnl_mv"][0].sort_values("date", ascending=False).reset_index(drop=True)
+    display_pnl = pd.DataFrame({"Date": pnl_df["date"].dt.strftime("%Y-%m-%d")})
+    pnl_styles = {}
+    for fund in data["priced_funds"]:
+        display_pnl[fund] = fmt.signed_currency(pnl_df[f"{fund} (€)"])
+        pnl_styles[fund] = fmt.sign_styles(pnl_df[f"{fund} (€)"], fmt.GAIN_CSS, fmt.LOSS_CSS)
+    display_pnl["Daily P/L"] = fmt.currency_change(pnl_df["Daily P/L (€)"], pnl_df["Daily P/L (%)"])
+    pnl_css = fmt.style_frame(display_pnl, pnl_styles)
+
+    recon = outputs["reconcile"][0]
+    qty_dp = recon["Fund"].map(decimals).fillna(3).astype(int).to_numpy()
+    display_tx = pd.DataFrame({
+        "Price (€)": fmt.currency(recon["Price (€)"], prefix="€"),
+        "Quantity": fmt.quantity(recon["Quantity"], qty_dp),
+        "Quantity (theor)": fmt.quantity(recon["Quantity (theor)"], qty_dp, strip=False),
+        "Δ Quantity": fmt.signed_quantity(recon["Δ Quantity"], qty_dp),
+        "Δ Net Inv vs Exp": fmt.signed_currency(recon["Δ Net Inv vs Exp"]),
+    })
+    tx_css = fmt.style_frame(display_tx, {"Δ Quantity": fmt.sign_styles(recon["Δ Quantity (rounded)"], fmt.POSITIVE_BG, fmt.NEGATIVE_BG)})
+
+    prices, changes, traded = outputs["historical_table"]
+    page = slice(0, HIST_TABLE_PAGE_SIZE)
+    hist_css = pd.DataFrame(
+        np.where(traded.iloc[page].to_numpy(), fmt.POSITIVE_BG, ""), columns=traded.columns
+    ) + pd.DataFrame(fmt.sign_styles(changes.iloc[page].to_numpy(), fmt.POSITIVE_BG, fmt.NEGATIVE_BG), columns=changes.columns)
+    return (display_summary, summary_css), (display_pnl, pnl_css), (display_tx, tx_css), hist_css
+
+
+def figures(data: dict, outputs: dict) -> list:
+    """Revenue, investment evolution, allocation pies and the combined price chart."""
+    mv_df = outputs["pnl_mv"][1]
+    mv_dates = mv_df["date"].to_numpy()
+    fig_revenue = go.Figure()
+    for name, col in [("Portfolio MV", "Daily MV (€)")] + [(f, f"{f} MV (€)") for f in data["priced_funds"]]:
+        x, y = downsample(mv_dates, mv_df[col].to_numpy(), CHART_MAX_POINTS)
+        fig_revenue.add_trace(line_trace(x, y, mode="lines", name=name))
+
+    steps, market_value = outputs["evolution"]
+    fig_evolution = go.Figure()
+    fig_evolution.add_trace(go.Scatter(x=steps["date_dt"], y=steps["Gross Contribution"], mode="lines"))
+    if len(market_value) > 0:
+        fig_evolution.add_trace(go.Scatter(x=market_value["date"], y=market_value["market_value"], mode="lines"))
+
+    pies = []
+    for alloc_gc, alloc_mv in outputs["allocation"].values():
+        for totals in (alloc_gc, alloc_mv):
+            pies.append(go.Figure(data=[go.Pie(labels=totals["Category"], values=totals["Value"], hole=0.4)]))
+
+    fig_prices = go.Figure()
+    tx = data["transaction_store"].frame
+    for fund in data["priced_funds"]:
+        fund_df = data["price_store"].frame[["date", fund]].dropna()
+        x, y = downsample(fund_df["date"].to_numpy(), fund_df[fund].to_numpy(), CHART_MAX_POINTS)
+        fig_prices.add_trace(line_trace(x, y, mode="lines", name=fund))
+        fund_trans = tx[tx["Fund"] == fund]
+        if len(fund_trans) > 0:
+            trans_dates, trans_prices, hover_texts = transaction_markers(fund_df.reset_index(drop=True), fund, fund_trans)
+            fig_prices.add_trace(go.Scatter(x=trans_dates, y=trans_prices, mode="markers", hovertext=hover_texts))
+    return [fig_revenue, fig_evolution, *pies, fig_prices]
+
+
+def figure_json(data: dict, outputs: dict) -> int:
+    """Serialized size of every figure, i.e. what st.plotly_chart ships to the browser."""
+    return sum(len(fig.to_json()) for fig in outputs["figures"])
+
+
+# (stage name, function of (data, outputs)); each stage's result is kept for the later ones
+STAGES = [
+    ("summary", lambda data, outputs: summary(data)),
+    ("pnl_mv", lambda data, outputs: pnl_mv(data)),
+    ("evolution", lambda data, outputs: evolution(data)),
+    ("allocation", lambda data, outputs: allocation(data)),
+    ("historical_table", lambda data, outputs: historical_table(data)),
+    ("reconcile", lambda data, outputs: reconcile(data)),
+    ("table_formatting", table_formatting),
+    ("figures", figures),
+    ("figure_json", figure_json),
+]
+
+
+def _timed(func, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return result, runs
+
+
+def _stats(runs: list) -> dict:
+    return {"min": min(runs), "median": statistics.median(runs), "mean": statistics.fmean(runs), "runs": runs}
+
+
+def run_dataset(paths: dict, repeat: int, stages=None) -> dict:
+    """Per-stage timings (seconds) for one dataset; ``load`` covers reading the CSVs into stores."""
+    data, load_runs = _timed(lambda: load(paths), repeat)
+    timings = {"load": _stats(load_runs)}
+    outputs = {}
+    for name, func in STAGES:
+        if stages is not None and name not in stages:
+            continue
+        outputs[name], runs = _timed(lambda: func(data, outputs), repeat)
+        timings[name] = _stats(runs)
+    return {
+        "funds": len(data["funds"]),
+        "transactions": len(data["transactions"]),
+        "price_rows": len(data["price_store"]),
+        "stages": timings,
+        "total_median": sum(stage["median"] for stage in timings.values()),
+    }
+
+
+def _git(*args) -> str | None:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plotly": plotly.__version__,
+        "machine": platform.machine(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def compare(old: dict, new: dict) -> str:
+    """Text table of median seconds per dataset/stage with the old/new speedup."""
+    lines = [f"{'dataset':<8} {'stage':<18} {'old (s)':>10} {'new (s)':>10} {'speedup':>8}"]
+    for dataset, result in new["results"].items():
+        old_stages = old.get("results", {}).get(dataset, {}).get("stages", {})
+        for stage, timing in result["stages"].items():
+            before = old_stages.get(stage, {}).get("median")
+            after = timing["median"]
+            speedup = f"{before / after:.2f}x" if before and after else "-"
+            lines.append(f"{dataset:<8} {stage:<18} {before if before is not None else float('nan'):>10.4f} {after:>10.4f} {speedup:>8}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the portfolio computation stages.")
+    parser.add_argument("--scale", nargs="+", choices=["real", *SCALES], default=["real", "small", "medium"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "sbronze-bench"), help="where synthetic datasets are generated (reused across runs)")
+    parser.add_argument("--stage", nargs="+", choices=[name for name, _ in STAGES], help="only run these stages (plus load)")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="previous JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    report = {"schema": REPORT_SCHEMA, "environment": environment(), "repeat": args.repeat, "seed": args.seed, "results": {}}
+    for name in args.scale:
+        paths = dataset_paths(name, args.data_dir, seed=args.seed)
+        result = run_dataset(paths, args.repeat, args.stage)
+        report["results"][name] = result
+        print(f"{name}: {result['funds']} funds, {result['transactions']} transactions, {result['price_rows']} price rows", file=sys.stderr)
+        for stage, timing in result["stages"].items():
+            print(f"  {stage:<18} {timing['median']:.4f}s", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(json.load(f), report))
+    elif not args.output:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Synthetic funds.csv / transaction_history.csv / historical_data.csv at benchmark scale.
+
+Files use the same layout as the real ones: funds with a ticker, ISIN,
+"<Manager> ..." fund name, type and colour; transactions in ascending date
+order; prices newest first with one column per fund. Each fund starts
+trading at a random date (NaN before it) and has a few missing days, so the
+NaN handling paths are exercised too.
+"""
+import argparse
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+FUND_TYPES = ["Equity", "Bond", "Mixed", "Commodity", "Alternative", "Other"]
+MANAGERS = [
+    "JPMorgan", "Fidelity", "BlackRock", "Amundi", "Vanguard", "Schroder",
+    "Pictet", "Invesco", "Allianz", "Nordea", "Robeco", "Eurizon",
+]
+
+
+@dataclass(frozen=True)
+class Scale:
+    funds: int
+    transactions: int
+    years: int = 35
+
+
+SCALES = {
+    "small": Scale(funds=6, transactions=60),
+    "medium": Scale(funds=50, transactions=5_000),
+    "large": Scale(funds=200, transactions=50_000),
+}
+
+
+def generate(scale: Scale, seed: int = 0, end="2026-01-28"):
+    """(funds, transactions, prices) frames in the CSV layout, reproducible for a given seed."""
+    rng = np.random.default_rng(seed)
+    n = scale.funds
+    fund_ids = [f"F{i:03d}" for i in range(1, n + 1)]
+    types = rng.choice(FUND_TYPES, size=n)
+    managers = rng.choice(MANAGERS, size=n)
+    funds = pd.DataFrame({
+        "Fund": fund_ids,
+        "Ticker": [f"0PSYN{i:05d}" for i in range(1, n + 1)],
+        "ISIN": [f"LU{num:010d}" for num in rng.integers(0, 10**10, size=n)],
+        "Fund Name": [f"{m} Funds - Synthetic {t} Fund {i} Acc - Eur" for i, (m, t) in enumerate(zip(managers, types), 1)],
+        "Type": types,
+        "Colour": [f"#{rgb:06X}" for rgb in rng.integers(0, 0xFFFFFF, size=n)],
+    })
+
+    # Business-day random walks; each fund has an inception day and ~0.5% missing days
+    dates = pd.bdate_range(end=pd.Timestamp(end), periods=scale.years * 261)
+    n_days = len(dates)
+    log_returns = rng.normal(0.0002, 0.01, size=(n_days, n))
+    start_prices = rng.uniform(10.0, 300.0, size=n)
+    levels = np.round(start_prices * np.exp(np.cumsum(log_returns, axis=0)), 2)
+    inception = rng.integers(0, int(n_days * 0.8), size=n)
+    inception[0] = 0  # at least one fund covers the whole history
+    day = np.arange(n_days)[:, None]
+    levels[day < inception] = np.nan
+    holes = rng.random(size=levels.shape) < 0.005
+    holes[inception, np.arange(n)] = False
+    levels[holes] = np.nan
+    prices = pd.DataFrame(levels, columns=fund_ids)
+    prices.insert(0, "Date", dates.strftime("%Y-%m-%d"))
+    prices = prices.iloc[::-1].reset_index(drop=True)
+
+    # Contributions on priced days after each fund's inception, at that day's price
+    fund_idx = rng.integers(0, n, size=scale.transactions)
+    day_idx = inception[fund_idx] + (rng.random(scale.transactions) * (n_days - inception[fund_idx])).astype(int)
+    price = levels[day_idx, fund_idx]
+    missing = np.isnan(price)
+    # Trades drawn on a missing day move to the fund's (always priced) inception day
+    day_idx[missing] = inception[fund_idx[missing]]
+    price = levels[day_idx, fund_idx]
+    amount = rng.integers(5, 101, size=scale.transactions) * 10.0
+    fees = np.where(rng.random(scale.transactions) < 0.2, np.round(rng.uniform(0.5, 3.0, size=scale.transactions), 2), 0.0)
+    quantity = np.round((amount - fees) / price, 3)
+    transactions = pd.DataFrame({
+        "Date": dates[day_idx],
+        "Fund": np.asarray(fund_ids)[fund_idx],
+        "Price (€)": price,
+        "Quantity": quantity,
+        "Fees (€)": fees,
+    }).sort_values("Date", kind="mergesort").reset_index(drop=True)
+    transactions["Date"] = transactions["Date"].dt.strftime("%Y-%m-%d")
+    return funds, transactions, prices
+
+
+def write_dataset(directory: str, funds: pd.DataFrame, transactions: pd.DataFrame, prices: pd.DataFrame) -> dict:
+    """Write the three CSVs into ``directory``; returns their paths keyed funds/transactions/prices."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "funds": os.path.join(directory, "funds.csv"),
+        "transactions": os.path.join(directory, "transaction_history.csv"),
+        "prices": os.path.join(directory, "historical_data.csv"),
+    }
+    funds.to_csv(paths["funds"], index=False)
+    transactions.to_csv(paths["transactions"], index=False)
+    prices.to_csv(paths["prices"], index=False)
+    return paths
+
+
+def dataset_paths(name: str, root: str, seed: int = 0) -> dict:
+    """Paths of the ``name`` dataset under ``root``, generating it on first use.
+
+    ``"real"`` points at the CSVs in the repository root instead.
+    """
+    if name == "real":
+        repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return {
+            "funds": os.path.join(repo, "funds.csv"),
+            "transactions": os.path.join(repo, "transaction_history.csv"),
+            "prices": os.path.join(repo, "historical_data.csv"),
+        }
+    directory = os.path.join(root, f"{name}-seed{seed}")
+    paths = {
+        "funds": os.path.join(directory, "funds.csv"),
+        "transactions": os.path.join(directory, "transaction_history.csv"),
+        "prices": os.path.join(directory, "historical_data.csv"),
+    }
+    if not all(os.path.exists(path) for path in paths.values()):
+        paths = write_dataset(directory, *generate(SCALES[name], seed=seed))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic portfolio dataset.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--funds", type=int, help="override the scale's fund count")
+    parser.add_argument("--transactions", type=int, help="override the scale's transaction count")
+    parser.add_argument("--years", type=int, help="override the 35 years of daily prices")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    scale = Scale(
+        funds=args.funds or scale.funds,
+        transactions=args.transactions or scale.transactions,
+        years=args.years or scale.years,
+    )
+    paths = write_dataset(args.out_dir, *generate(scale, seed=args.seed))
+    for path in paths.values():
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Trace-building helpers shared by the Plotly charts in main.py."""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Browsers cap live WebGL contexts (often 8-16 per page); each Scattergl figure takes one
+WEBGL_MAX_FIGURES = 8
+
+
+def nearest_positions(sorted_dates, targets) -> np.ndarray:
+    """Position of the nearest entry in ascending ``sorted_dates`` for each target.
+
+    One ``searchsorted`` call for all targets; ties resolve to the earlier date
+    (same as ``(dates - target).abs().idxmin()`` on an ascending frame).
+    """
+    dates = np.asarray(sorted_dates, dtype="datetime64[ns]").astype(np.int64)
+    points = np.asarray(targets, dtype="datetime64[ns]").astype(np.int64)
+    if len(dates) == 0:
+        return np.zeros(len(points), dtype=np.intp)
+    right = np.clip(np.searchsorted(dates, points, side="left"), 0, len(dates) - 1)
+    left = np.clip(right - 1, 0, len(dates) - 1)
+    use_left = np.abs(points - dates[left]) <= np.abs(dates[right] - points)
+    return np.where(use_left, left, right)
+
+
+def transaction_markers(fund_df: pd.DataFrame, fund: str, fund_trans: pd.DataFrame):
+    """Marker x, y and hover text for a fund's transactions on its price line.
+
+    ``fund_df`` holds ascending ``date`` and ``fund`` price columns without gaps;
+    each transaction is pinned to the price on the closest available date.
+    """
+    trans_dates = pd.to_datetime(fund_trans["Date"]).reset_index(drop=True)
+    positions = nearest_positions(fund_df["date"].to_numpy(), trans_dates.to_numpy())
+    trans_prices = fund_df[fund].to_numpy()[positions]
+
+    quantity = fund_trans["Quantity"].to_numpy(dtype=float)
+    price = fund_trans["Price (€)"].to_numpy(dtype=float)
+    fees = fund_trans["Fees (€)"].to_numpy(dtype=float)
+    hover_texts = (
+        "<b>Transaction</b><br>Date: " + trans_dates.dt.strftime("%Y-%m-%d")
+        + "<br>Quantity: " + np.char.mod("%.3f", quantity)
+        + "<br>Price: €" + np.char.mod("%.2f", price)
+        + "<br>Fees: €" + np.char.mod("%.2f", fees)
+        + "<br>Total: €" + np.char.mod("%.2f", quantity * price + fees)
+    )
+    return trans_dates, trans_prices, hover_texts.to_numpy()
+
+
+def _minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices keeping the first/last point plus each bucket's min and max."""
+    n = len(y)
+    n_buckets = max(1, (max_points - 2) // 2)
+    starts = np.linspace(1, n - 1, n_buckets + 1).astype(np.intp)[:-1]
+    starts = np.unique(starts)
+    bucket_id = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n - 1)))
+    body = y[1 : n - 1]
+    mins = np.fmin.reduceat(body, starts - 1)
+    maxs = np.fmax.reduceat(body, starts - 1)
+    offset = np.arange(1, n - 1)
+    # First occurrence of each bucket's min and max; all-NaN buckets keep their first point as a gap
+    first_min = np.unique(bucket_id[body == mins[bucket_id]], return_index=True)[1]
+    first_max = np.unique(bucket_id[body == maxs[bucket_id]], return_index=True)[1]
+    hit_min = offset[body == mins[bucket_id]][first_min]
+    hit_max = offset[body == maxs[bucket_id]][first_max]
+    gaps = starts[np.isnan(mins)]
+    return np.unique(np.concatenate([[0, n - 1], hit_min, hit_max, gaps]))
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets selection on NaN-free numeric x/y."""
+    n = len(y)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_lo, next_hi = hi, max(edges[i + 2] if i + 2 < len(edges) else n, hi + 1)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        selected[i + 1] = prev
+    return np.unique(selected)
+
+
+def downsample(x, y, max_points: int, method: str = "minmax"):
+    """Reduce an (x, y) line to about ``max_points`` points for display.
+
+    Series already within ``max_points`` are returned at full resolution.
+    ``"minmax"`` keeps every bucket's extrema (and NaN gaps); ``"lttb"`` keeps
+    the visually dominant shape and ignores NaN points.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if max_points is None or max_points < 4 or len(y) <= max_points:
+        return x, y
+    if method == "lttb":
+        valid = ~np.isnan(y)
+        x, y = x[valid], y[valid]
+        if len(y) <= max_points:
+            return x, y
+        x_num = x.astype("datetime64[ns]").astype(np.int64).astype(float) if np.issubdtype(x.dtype, np.datetime64) else x.astype(float)
+        keep = _lttb_indices(x_num, y, max_points)
+    else:
+        keep = _minmax_indices(y, max_points)
+    return x[keep], y[keep]
+
+
+def padded_range(arrays, padding_pct: float = 0.01):
+    """NaN-aware (min - padding, max + padding) over several y arrays.
+
+    Each array is reduced with ``np.fmin``/``np.fmax`` (None counts as NaN);
+    returns (None, None) when there is no finite value. Identical min and max
+    are padded by ``padding_pct`` of the value itself (1.0 around zero).
+    """
+    y_min, y_max = np.nan, np.nan
+    for y in arrays:
+        y = np.asarray(y, dtype=float)
+        if y.size:
+            y_min = np.fmin(y_min, np.fmin.reduce(y, axis=None))
+            y_max = np.fmax(y_max, np.fmax.reduce(y, axis=None))
+    if np.isnan(y_min):
+        return None, None
+    if y_max == y_min:
+        padding = abs(y_min) * padding_pct if y_min != 0 else 1.0
+    else:
+        padding = (y_max - y_min) * padding_pct
+    return float(y_min - padding), float(y_max + padding)
+
+
+def trace_y_range(traces, padding_pct: float = 0.01):
+    """``padded_range`` over the y arrays of a figure's traces (downsampled data when used)."""
+    return padded_range((trace.y for trace in traces if getattr(trace, "y", None) is not None), padding_pct)
+
+
+def epoch_ms(x) -> np.ndarray:
+    """Dates as float epoch milliseconds (Plotly date axes accept them directly)."""
+    return np.asarray(x, dtype="datetime64[ms]").astype(np.int64).astype(np.float64)
+
+
+def line_trace(x, y, webgl: bool = False, **kwargs):
+    """Scatter trace for a date/value series.
+
+    With ``webgl`` the trace is a ``Scattergl`` carrying epoch-ms x and float y
+    NumPy arrays, which serialize compactly (typed arrays on plotly>=6) instead
+    of per-point timestamp strings. The axis must then be ``type="date"`` with a
+    ``hoverformat``; ``%{x|...}`` in the hovertemplate falls back to ``%{x}``.
+    """
+    if not webgl:
+        return go.Scatter(x=x, y=y, **kwargs)
+    if "hovertemplate" in kwargs:
+        kwargs["hovertemplate"] = kwargs["hovertemplate"].replace("%{x|%Y-%m-%d}", "%{x}")
+    return go.Scattergl(x=epoch_ms(x), y=np.asarray(y, dtype=np.float64), **kwargs)
+
+
+def value_labels_trace(x, y, texts, colors, size: int = 13, webgl: bool = False):
+    """One text-only trace with right-edge value labels, replacing one annotation per series."""
+    return go.Scatter(
+        x=epoch_ms(x) if webgl else list(x),
+        y=list(y),
+        text=list(texts),
+        mode="text",
+        textposition="middle right",
+        textfont=dict(size=size, color=list(colors)),
+        hoverinfo="skip",
+        showlegend=False,
+        cliponaxis=False,
+    )
+
+
+class FigureCache:
+    """Thread-safe LRU of prebuilt figures keyed by view parameters.
+
+    Cached figures are shared between reruns and sessions, so callers must
+    treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def evict(self, stale) -> int:
+        """Drop the entries whose key satisfies ``stale(key)``; returns how many were dropped."""
+        with self._lock:
+            keys = [key for key in self._entries if stale(key)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
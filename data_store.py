@@ -0,0 +1,307 @@
+"""Date-indexed stores for price and transaction data.
+
+Frames are kept sorted on a ``DatetimeIndex`` so a date window is located with
+two ``searchsorted`` calls and returned as a positional slice, instead of a
+boolean mask that scans and copies the whole frame.
+
+The CSVs are written through ``append_csv_rows`` (app edits),
+``write_csv_atomic`` (the price fetch scripts) and ``write_bytes_atomic``
+(live price refresh), which serialize writers with an advisory lock on
+``<file>.lock``.
+"""
+import csv
+import os
+import tempfile
+from contextlib import contextmanager, suppress
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Quantities are shown with at most this many decimals
+QUANTITY_DECIMALS_CAP = 3
+
+
+def file_version(path: str):
+    """Cheap content version for a file on disk: (mtime_ns, size), or None if missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def read_prices(path: str, funds: pd.DataFrame) -> pd.DataFrame:
+    """Read historical_data.csv with a ``date`` column and fund-named price columns.
+
+    Yahoo-style ``<ticker>.F`` columns are renamed to the fund they belong to
+    in ``funds``.
+    """
+    df = pd.read_csv(path)
+    if "Date" in df.columns:
+        df = df.rename(columns={"Date": "date"})
+    ticker_columns = {}
+    for ticker, fund in zip(funds["Ticker"], funds["Fund"]):
+        ticker_columns.setdefault(f"{ticker}.F", fund)
+    return df.rename(columns={col: fund for col, fund in ticker_columns.items() if col in df.columns})
+
+
+@contextmanager
+def locked(path: str):
+    """Hold an exclusive advisory lock for writing ``path``.
+
+    The lock is taken on a ``<path>.lock`` sidecar so it survives ``path``
+    being replaced by a rename. Without ``fcntl`` (Windows) writes are not
+    serialized.
+    """
+    with open(f"{path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _replace_file(path: str, write):
+    """Call ``write(f)`` on a text handle to a temp file next to ``path``, then rename it over ``path``."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+def _replace_csv(path: str, frame: pd.DataFrame):
+    _replace_file(path, lambda f: frame.to_csv(f, index=False))
+
+
+def write_csv_atomic(path: str, frame: pd.DataFrame):
+    """Rewrite ``path`` with ``frame`` through a temp file and a rename, so readers never see a partial file."""
+    with locked(path):
+        _replace_csv(path, frame)
+
+
+def write_bytes_atomic(path: str, data: bytes):
+    """Replace ``path`` with ``data`` (e.g. a downloaded CSV) through a temp file and a rename, under its lock."""
+    with locked(path):
+        _replace_file(path, lambda f: f.buffer.write(data))
+
+
+def _csv_header(path: str) -> list[str] | None:
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), None)
+    except FileNotFoundError:
+        return None
+
+
+def append_csv_rows(path: str, rows: pd.DataFrame, unique=()):
+    """Append ``rows`` to the CSV at ``path`` under its lock, without rewriting the existing rows.
+
+    Values are written in the file's header order (columns the rows lack
+    are left empty); a missing or empty file is created with ``rows``'
+    header. For each column in ``unique`` the file's values are read and a
+    ``ValueError`` is raised if a new row repeats one, so concurrent editors
+    cannot both add the same key.
+    """
+    with locked(path):
+        header = _csv_header(path)
+        if not header:
+            _replace_csv(path, rows)
+            return
+        unknown = [col for col in rows.columns if col not in header]
+        if unknown:
+            raise ValueError(f"{os.path.basename(path)} has no column(s) {', '.join(map(str, unknown))}")
+        if unique:
+            existing = pd.read_csv(path, usecols=list(unique), dtype=str, keep_default_na=False)
+            for col in unique:
+                new_values = rows[col].astype(str)
+                clash = new_values[new_values.isin(existing[col]) | new_values.duplicated()]
+                if len(clash) > 0:
+                    raise ValueError(f"{col} '{clash.iloc[0]}' already exists")
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            needs_newline = False
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) not in (b"\n", b"\r")
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            if needs_newline:
+                f.write("\n")
+            rows.reindex(columns=header).to_csv(f, header=False, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class DateIndexedStore:
+    """A frame sorted ascending by ``date_col`` with a matching DatetimeIndex.
+
+    The index is left unnamed so ``date_col`` stays an unambiguous column label
+    for the existing ``df["date"]`` / ``sort_values("date")`` call sites.
+    """
+
+    def __init__(self, frame: pd.DataFrame, date_col: str, version=None):
+        self.date_col = date_col
+        self.version = version
+        df = frame.copy()
+        if date_col in df.columns:
+            df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
+            df = df.dropna(subset=[date_col])
+            # Stable sort keeps the file order for rows sharing a date
+            df = df.sort_values(date_col, kind="mergesort")
+            df.index = pd.DatetimeIndex(df[date_col].to_numpy())
+        else:
+            df.index = pd.DatetimeIndex([])
+        self.frame = df
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def min_date(self):
+        return self.frame.index[0] if len(self.frame) > 0 else None
+
+    @property
+    def max_date(self):
+        return self.frame.index[-1] if len(self.frame) > 0 else None
+
+    def bounds(self, start=None, end=None) -> tuple[int, int]:
+        """Positional [lo, hi) bounds of rows with start <= date <= end (both inclusive)."""
+        index = self.frame.index
+        lo = 0 if start is None else int(index.searchsorted(pd.Timestamp(start), side="left"))
+        hi = len(index) if end is None else int(index.searchsorted(pd.Timestamp(end), side="right"))
+        return lo, max(lo, hi)
+
+    def between(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        """Rows within [start, end], optionally restricted to ``columns``.
+
+        Rows are sliced positionally first, so column selection only copies
+        the output window.
+        """
+        lo, hi = self.bounds(start, end)
+        window = self.frame.iloc[lo:hi]
+        if columns is not None:
+            window = window[list(columns)]
+        return window
+
+
+class PriceStore(DateIndexedStore):
+    """Historical prices: one ``date`` column plus one price column per fund."""
+
+    def __init__(self, frame: pd.DataFrame, version=None):
+        super().__init__(frame, "date", version=version)
+
+    @property
+    def fund_columns(self) -> list[str]:
+        return [c for c in self.frame.columns if c != self.date_col]
+
+    def latest_prices(self) -> pd.Series:
+        """Fund -> price on the latest date (NaN where a fund has no price that day)."""
+        if len(self.frame) == 0:
+            return pd.Series(dtype=float)
+        lo, _ = self.bounds(self.max_date, None)
+        return pd.to_numeric(self.frame.iloc[lo][self.fund_columns], errors="coerce")
+
+
+def quantity_decimals(frame: pd.DataFrame, cap: int = QUANTITY_DECIMALS_CAP) -> dict:
+    """Display precision per fund: the most decimals any of its quantities uses, capped at ``cap``.
+
+    Quantities are read at 6 decimals with trailing zeros dropped, in one
+    vectorized pass over the column.
+    """
+    if len(frame) == 0 or "Quantity" not in frame.columns:
+        return {}
+    qty = pd.to_numeric(frame["Quantity"], errors="coerce")
+    valid = qty.notna().to_numpy()
+    text = np.char.rstrip(np.char.mod("%.6f", qty.to_numpy(dtype=float)[valid]), "0")
+    decimals = np.char.str_len(text) - np.char.find(text, ".") - 1
+    per_fund = pd.Series(decimals, index=frame["Fund"].to_numpy()[valid]).groupby(level=0).max()
+    result = {fund: 0 for fund in frame["Fund"].unique()}
+    result.update({fund: min(int(d), cap) for fund, d in per_fund.items()})
+    return result
+
+
+class PrefixSums:
+    """Cumulative sums of value columns over ascending dates.
+
+    Built in one linear pass; the total of any column over [start, end]
+    (both inclusive) is then the difference of two prefix values located by
+    binary search. NaN values count as 0.
+    """
+
+    def __init__(self, dates, values: dict):
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self._sums = {
+            name: np.concatenate([[0.0], np.cumsum(np.nan_to_num(np.asarray(column, dtype=float)))])
+            for name, column in values.items()
+        }
+
+    def bounds(self, start=None, end=None) -> tuple[int, int]:
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), "ns"), side="left"))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), "ns"), side="right"))
+        return lo, max(lo, hi)
+
+    def total(self, name: str, start=None, end=None) -> float:
+        lo, hi = self.bounds(start, end)
+        sums = self._sums[name]
+        return float(sums[hi] - sums[lo])
+
+    def totals(self, start=None, end=None) -> dict:
+        lo, hi = self.bounds(start, end)
+        return {name: float(sums[hi] - sums[lo]) for name, sums in self._sums.items()}
+
+
+class TransactionStore(DateIndexedStore):
+    """Transaction history keyed on the ``Date`` column.
+
+    Derived once per store, i.e. once per transactions file version:
+    ``quantity_decimals`` (fund -> display precision) and ``fund_sums``
+    (fund -> ``PrefixSums`` over quantity, gross contribution, fees and
+    price), so windowed totals such as the average NAV are O(log n).
+    """
+
+    def __init__(self, frame: pd.DataFrame, version=None):
+        super().__init__(frame, "Date", version=version)
+        self.quantity_decimals = quantity_decimals(frame)
+        self.fund_sums = {}
+        if len(self.frame) > 0 and "Fund" in self.frame.columns:
+            for fund, rows in self.frame.groupby("Fund", sort=False):
+                quantity = rows["Quantity"].to_numpy(dtype=float)
+                price = rows["Price (€)"].to_numpy(dtype=float)
+                fees = rows["Fees (€)"].to_numpy(dtype=float)
+                self.fund_sums[fund] = PrefixSums(rows.index, {
+                    "quantity": quantity,
+                    "gross_contribution": quantity * price + fees,
+                    "fees": fees,
+                    "price": price,
+                    "priced": ~np.isnan(price),
+                })
+
+    def avg_nav(self, fund: str, start=None, end=None):
+        """Gross contribution per unit bought in [start, end], or None if no quantity was bought."""
+        sums = self.fund_sums.get(fund)
+        if sums is None:
+            return None
+        window = sums.totals(start, end)
+        return window["gross_contribution"] / window["quantity"] if window["quantity"] else None
+
+    def mean_price(self, fund: str, start=None, end=None) -> float:
+        """Mean transaction price in [start, end] (NaN when the fund has no priced transaction there)."""
+        sums = self.fund_sums.get(fund)
+        if sums is None:
+            return float("nan")
+        window = sums.totals(start, end)
+        return window["price"] / window["priced"] if window["priced"] else float("nan")
@@ -0,0 +1,201 @@
+"""Cached computations arranged as a dependency graph with content versions.
+
+Source nodes are files: their version is a hash of the file content, re-read
+only when the file's (mtime_ns, size) changes. A derived node lists its
+inputs and is recomputed only when one of their versions changed. Its own
+version is a hash of its inputs' versions, or, for nodes with a
+``fingerprint``, a hash of that fingerprint of the result, so an unchanged
+result stops invalidation there (e.g. a colour edit in funds.csv leaves the
+ticker map, and therefore the parsed prices, as they were).
+
+Nodes can be parameterized (e.g. by the selected funds); parameterized
+inputs are resolved with the same parameters, and the most recent
+``max_entries`` parameter sets are kept per node.
+
+Nodes declared with ``persist=True`` are also kept in an optional
+``DiskCache`` keyed by node, code version, parameters and input versions,
+so after a restart they are loaded instead of recomputed (their inputs are
+still resolved to obtain the versions). The code version hashes the source
+of the compute function, of the modules listed in ``code`` and, through
+their code versions, of every upstream node, so a deploy that changes how a
+value is computed never reloads results of the old code.
+"""
+import hashlib
+import inspect
+import threading
+from collections import Counter, OrderedDict
+
+import profiling
+from data_store import file_version
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def _source(obj) -> str:
+    """Source text of a function, class or module; bytecode when the source file is unavailable."""
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        code = getattr(obj, "__code__", None)
+        return repr((code.co_code, code.co_consts, code.co_names)) if code is not None else repr(obj)
+
+
+class _Node:
+    def __init__(self, name, inputs, compute, fingerprint, parameterized, max_entries, persist, code_version):
+        self.name = name
+        self.inputs = list(inputs)
+        self.compute = compute
+        self.fingerprint = fingerprint
+        self.parameterized = parameterized
+        self.max_entries = max_entries
+        self.persist = persist
+        self.code_version = code_version
+        # params -> (input versions, value, version), least recently used first
+        self.entries = OrderedDict()
+        # Held while this node's entries are read or computed; inputs are resolved before taking it
+        self.lock = threading.Lock()
+
+
+class DependencyGraph:
+    """Nodes are resolved on demand with ``resolve`` / ``get`` / ``version``; safe to share between threads.
+
+    Each node has its own lock, so a thread only waits for another while
+    both need the same node and it is being computed; other nodes resolve
+    meanwhile.
+    """
+
+    def __init__(self, disk_cache=None):
+        self.disk_cache = disk_cache
+        self._nodes = {}
+        self._files = {}  # source name -> path
+        self._file_digests = {}  # path -> ((mtime_ns, size), content digest)
+        self._lock = threading.Lock()  # guards the file digests
+        self.computed = Counter()  # node name -> recomputations
+        self.loaded = Counter()  # node name -> loads from the disk cache
+
+    def file(self, name: str, path: str):
+        """Declare a source node for ``path``; its value is the path, its version a content hash (None if missing)."""
+        self._files[name] = path
+
+    def node(self, name: str, inputs, compute, fingerprint=None, parameterized: bool = False, max_entries: int = 8, persist: bool = False, code=()):
+        """Declare ``name = compute(*input values, *params)``; inputs must be declared first.
+
+        ``fingerprint(value)`` (hashable via ``repr``, e.g. bytes or a
+        tuple) makes the node's version follow its content instead of its
+        inputs. ``persist`` stores results in the graph's disk cache;
+        ``code`` lists the modules (or functions) ``compute`` relies on, whose
+        source is part of the node's code version.
+        """
+        unknown = [input_name for input_name in inputs if input_name not in self._nodes and input_name not in self._files]
+        if unknown:
+            raise ValueError(f"{name}: undeclared inputs {unknown}")
+        code_version = _digest(
+            [_source(obj) for obj in (compute, *code)],
+            [self._nodes[input_name].code_version for input_name in inputs if input_name in self._nodes],
+        )
+        self._nodes[name] = _Node(name, inputs, compute, fingerprint, parameterized, max_entries, persist, code_version)
+
+    def _file_version(self, path: str):
+        stat = file_version(path)
+        if stat is None:
+            return None
+        with self._lock:
+            cached = self._file_digests.get(path)
+            if cached is None or cached[0] != stat:
+                with open(path, "rb") as f:
+                    cached = (stat, hashlib.sha1(f.read()).hexdigest()[:16])
+                self._file_digests[path] = cached
+            return cached[1]
+
+    def _resolve(self, name: str, params: tuple):
+        if name in self._files:
+            path = self._files[name]
+            return path, self._file_version(path)
+        node = self._nodes[name]
+        params = params if node.parameterized else ()
+        resolved = [self._resolve(input_name, params) for input_name in node.inputs]
+        input_versions = tuple(version for _, version in resolved)
+        with node.lock:
+            entry = node.entries.get(params)
+            if entry is not None and entry[0] == input_versions:
+                node.entries.move_to_end(params)
+                return entry[1], entry[2]
+
+            disk_key = (name, node.code_version, params, input_versions)
+            stored = None
+            if node.persist and self.disk_cache is not None:
+                stored = self.disk_cache.get(disk_key)
+            if stored is not None:
+                value, version = stored
+                self.loaded[name] += 1
+            else:
+                value = node.compute(*(value for value, _ in resolved), *params)
+                self.computed[name] += 1
+                profiler = profiling.current()
+                if profiler is not None:
+                    profiler.misses[name] += 1
+                if node.fingerprint is not None:
+                    version = _digest(name, params, node.fingerprint(value))
+                else:
+                    version = _digest(name, params, input_versions)
+                if node.persist and self.disk_cache is not None:
+                    self.disk_cache.put(disk_key, (value, version))
+            node.entries[params] = (input_versions, value, version)
+            node.entries.move_to_end(params)
+            while len(node.entries) > node.max_entries:
+                node.entries.popitem(last=False)
+            return value, version
+
+    def resolve(self, name: str, *params):
+        """``(value, version)`` of ``name``, recomputing it only if an input changed."""
+        profiler = profiling.current()
+        if profiler is not None:
+            profiler.calls[name] += 1
+        return self._resolve(name, params)
+
+    def get(self, name: str, *params):
+        return self.resolve(name, *params)[0]
+
+    def version(self, name: str, *params) -> str | None:
+        """Content version of ``name``; resolving it computes the node if needed."""
+        return self._resolve(name, params)[1]
+
+    def dependents(self, name: str) -> set:
+        """``name`` and every node that depends on it, directly or transitively."""
+        affected = {name}
+        for node in self._nodes.values():
+            if affected.intersection(node.inputs):
+                affected.add(node.name)
+        return affected
+
+    def invalidate(self, name: str) -> set:
+        """Re-check ``name`` after its source changed; returns the nodes whose version changed.
+
+        Unparameterized dependents that were already computed are recomputed
+        now and only count as changed if their version moved, so propagation
+        stops at an unchanged fingerprint. Parameterized dependents below a
+        change are dropped rather than recomputed for every cached parameter
+        set. Reads never need this (versions follow the files); it lets
+        callers drop exactly the downstream caches that went stale.
+        """
+        if name in self._files:
+            path = self._files[name]
+            with self._lock:
+                before = self._file_digests.pop(path, (None, None))[1]
+            changed = {name} if self._file_version(path) != before else set()
+        else:
+            changed = {name}
+        for node in self._nodes.values():
+            if not changed.intersection(node.inputs):
+                continue
+            with node.lock:
+                entry = node.entries.get(())
+                if node.parameterized or entry is None:
+                    node.entries.clear()
+                    changed.add(node.name)
+                    continue
+            if self._resolve(node.name, ())[1] != entry[2]:
+                changed.add(node.name)
+        return changed
@@ -0,0 +1,127 @@
+"""On-disk cache of derived data that survives process restarts.
+
+Values are pickled, zlib-compressed and written one file per key (temp file
++ rename, so readers never see a partial entry). Reading an entry refreshes
+its mtime, and after each write the least recently used files are deleted
+until the directory fits in ``max_bytes``. Keys should include the content
+versions of everything the value is derived from; a stale key is simply
+never read again and ages out.
+
+Entries are trusted pickles written by this process or a previous one, so
+the directory must not be writable by anyone else.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import zlib
+from contextlib import suppress
+
+# Bumped when the pickled layouts change; entries from other formats are never read
+FORMAT = 1
+SUFFIX = ".pkl.z"
+
+
+class DiskCache:
+    """Size-bounded LRU of pickled values in ``directory``; I/O errors only cost a cache miss."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # An unwritable location (e.g. a read-only app directory) leaves the cache disabled: every get misses
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.enabled = True
+        except OSError:
+            self.enabled = False
+
+    def _path(self, key) -> str:
+        digest = hashlib.sha1(repr((FORMAT, key)).encode()).hexdigest()
+        return os.path.join(self.directory, digest + SUFFIX)
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except Exception:
+            # Truncated or unreadable (e.g. written by another library version): drop it
+            self.misses += 1
+            self._remove(path)
+            return default
+        # Recency for the LRU; a read-only directory still serves its entries
+        with suppress(OSError):
+            os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        try:
+            data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        except Exception:
+            return  # not picklable; stays memory-only
+        if len(data) > self.max_bytes:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".entry-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+        except OSError:
+            return
+        self._evict()
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    def _entries(self):
+        """(path, size, mtime) of every entry."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(SUFFIX):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
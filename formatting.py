@@ -0,0 +1,154 @@
+"""Column-at-a-time string formatting for the summary, evolution and transaction tables.
+
+Every helper takes a whole column (Series or array) and returns a NumPy
+string array of the same length, so table build cost no longer scales with
+Python-level row lambdas. ``masked=True`` swaps the values for the
+"🔒 Hide Data" placeholders.
+"""
+import numpy as np
+import pandas as pd
+
+MASK_CURRENCY = "***.*€"
+MASK_PERCENT = "***.*%"
+MASK_QUANTITY = "***"
+MASK_CHANGE = f"{MASK_CURRENCY} ({MASK_PERCENT})"
+
+POSITIVE_BG = "background-color: rgba(46, 160, 67, 0.15);"
+NEGATIVE_BG = "background-color: rgba(248, 81, 73, 0.15);"
+# Daily changes in the P/L and Market Value evolution tables
+GAIN_CSS = "background-color: rgba(107, 203, 119, 0.15); color: #2d6a3f;"
+LOSS_CSS = "background-color: rgba(226, 106, 106, 0.15); color: #8b2e2e;"
+
+_format = np.frompyfunc(format, 2, 1)
+
+
+def _floats(values) -> np.ndarray:
+    if isinstance(values, pd.Series):
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return np.asarray(values, dtype=float)
+
+
+def masked_column(values, text: str) -> np.ndarray:
+    """``text`` repeated once per value."""
+    return np.full(len(values), text, dtype=object)
+
+
+def number(values, spec, na: str = "") -> np.ndarray:
+    """``format(value, spec)`` for every value; ``spec`` is one spec or one per value. NaN becomes ``na``."""
+    v = _floats(values)
+    out = _format(v, spec).astype(str)
+    return np.where(np.isnan(v), na, out)
+
+
+def _with_prefix(prefix, v, formatted, na):
+    return np.where(np.isnan(v), na, np.char.add(prefix, formatted))
+
+
+def _plus(v) -> np.ndarray:
+    """"+" where the value is positive; zero and losses carry their own sign (or none)."""
+    return np.where(v > 0, "+", "")
+
+
+def currency(values, masked: bool = False, na: str = "", prefix: str = "€ ") -> np.ndarray:
+    """"€ 1,234.56" with thousands separators."""
+    if masked:
+        return masked_column(values, MASK_CURRENCY)
+    v = _floats(values)
+    return _with_prefix(prefix, v, number(v, ",.2f"), na)
+
+
+def signed_currency(values, masked: bool = False, na: str = "-") -> np.ndarray:
+    """"+€12.34" for gains and "€-12.34" for losses, as in the evolution tables."""
+    if masked:
+        return masked_column(values, MASK_CURRENCY)
+    v = _floats(values)
+    return _with_prefix(np.char.add(_plus(v), "€"), v, number(v, ".2f"), na)
+
+
+def percent(values, masked: bool = False, na: str = "", signed: bool = False) -> np.ndarray:
+    """"1.23%", or "+1.23%" with ``signed`` (only positive values get a "+")."""
+    if masked:
+        return masked_column(values, MASK_PERCENT)
+    v = _floats(values)
+    formatted = np.char.add(number(v, ".2f"), "%")
+    if signed:
+        formatted = np.char.add(_plus(v), formatted)
+    return np.where(np.isnan(v), na, formatted)
+
+
+def currency_change(values, pct, masked: bool = False, na: str = "-") -> np.ndarray:
+    """"+€12.34 (+0.56%)"; ``na`` where either part is missing."""
+    if masked:
+        return masked_column(values, MASK_CHANGE)
+    v, p = _floats(values), _floats(pct)
+    out = with_note(signed_currency(v), percent(p, signed=True))
+    return np.where(np.isnan(v) | np.isnan(p), na, out)
+
+
+def quantity(values, decimals, masked: bool = False, na: str = "", strip: bool = True) -> np.ndarray:
+    """Quantities at ``decimals`` places (scalar or one per value, e.g. per-fund precision).
+
+    With ``strip`` trailing zeros and a bare decimal point are dropped, so
+    12.500 shows as "12.5" and 3.000 as "3".
+    """
+    if masked:
+        return masked_column(values, MASK_QUANTITY)
+    v = _floats(values)
+    dp = np.broadcast_to(np.asarray(decimals, dtype=int), v.shape)
+    formatted = number(v, np.char.add(np.char.add(".", dp.astype(str)), "f"))
+    if strip:
+        stripped = np.char.rstrip(np.char.rstrip(formatted, "0"), ".")
+        formatted = np.where(np.char.find(formatted, ".") >= 0, stripped, formatted)
+        formatted = np.where(formatted == "-0", "0", formatted)
+    return np.where(np.isnan(v), na, formatted)
+
+
+def signed_quantity(values, decimals, na: str = "") -> np.ndarray:
+    """"+0.125" / "-0.125" at ``decimals`` places (scalar or one per value); zero keeps its "+"."""
+    v = _floats(values)
+    dp = np.broadcast_to(np.asarray(decimals, dtype=int), v.shape)
+    return number(v, np.char.add(np.char.add("+.", dp.astype(str)), "f"), na=na)
+
+
+def with_note(base, note) -> np.ndarray:
+    """"base (note)" where ``note`` is non-empty, else ``base``."""
+    base = np.asarray(base, dtype=str)
+    note = np.asarray(note, dtype=str)
+    return np.where(note == "", base, np.char.add(np.char.add(base, " ("), np.char.add(note, ")")))
+
+
+def round_to(values, decimals) -> np.ndarray:
+    """Round to ``decimals`` places (scalar or one per value), with -0.0 normalised to 0.0."""
+    v = _floats(values)
+    scale = 10.0 ** np.asarray(decimals, dtype=float)
+    return np.round(v * scale) / scale + 0.0
+
+
+def sign_styles(values, positive: str, negative: str, zero: str = "") -> np.ndarray:
+    """CSS per value by sign; NaN counts as zero."""
+    v = _floats(values)
+    return np.where(v > 0, positive, np.where(v < 0, negative, zero))
+
+
+def fund_backgrounds(funds, colors: dict, alpha: float = 0.15, default: str = "#000000") -> np.ndarray:
+    """``background-color`` CSS per row from each fund's hex colour at ``alpha``."""
+    funds = pd.Series(funds, dtype=object)
+    css = {}
+    for fund in funds.unique():
+        hex_color = colors.get(fund, default).lstrip("#")
+        r, g, b = int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
+        css[fund] = f"background-color: rgba({r}, {g}, {b}, {alpha})"
+    return funds.map(css).to_numpy(dtype=object)
+
+
+def style_frame(display_df: pd.DataFrame, column_styles: dict) -> pd.DataFrame:
+    """A CSS frame shaped like ``display_df`` for ``Styler.apply(..., axis=None)``.
+
+    ``column_styles`` maps column names to per-row CSS arrays; other
+    columns stay unstyled.
+    """
+    css = pd.DataFrame("", index=display_df.index, columns=display_df.columns)
+    for col, styles in column_styles.items():
+        if col in css.columns:
+            css[col] = styles
+    return css
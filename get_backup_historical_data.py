@@ -1,5 +1,6 @@
 import yfinance as yf         # Import the yfinance library to get financial data
 import pandas as pd           # Import pandas for working with tables (dataframes)
+from data_store import write_csv_atomic  # Atomic CSV rewrite (temp file + rename)
 
 # Load tickers dynamically from funds.csv and append .F suffix; keep mapping to Fund names
 funds = pd.read_csv("funds.csv")
@@ -45,7 +46,7 @@ for ticker in fund_map.keys():
         rename_map[ticker_col] = fund_map[ticker]
 table = table.rename(columns=rename_map)
 
-# Save the table to CSV
-table.to_csv("historical_data.csv", index=False)
+# Save the table to CSV (atomically, so a running app never reads a half-written file)
+write_csv_atomic("historical_data.csv", table)
 
 print("Saved historical_data.csv with", len(table), "rows and", len(table.columns), "columns")
\ No newline at end of file
@@ -6,6 +6,8 @@ from datetime import datetime
 from io import BytesIO
 import warnings
 
+from data_store import write_csv_atomic
+
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
 
 # Load funds configuration
@@ -138,7 +140,8 @@ if dfs:
     available_cols = ["Date"] + [col for col in funds["Fund"].tolist() if col in merged_table.columns]
     merged_table = merged_table[available_cols]
     
-    merged_table.to_csv("historical_data.csv", index=False, na_rep='')
+    # Temp file + rename, so a running app never reads a half-written file
+    write_csv_atomic("historical_data.csv", merged_table)
     print(f"\n✓ Saved historical_data.csv with {len(merged_table)} rows and {len(merged_table.columns)} columns")
 else:
     print("✗ No data fetched")
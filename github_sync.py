@@ -0,0 +1,111 @@
+"""Push data files to the GitHub repository, several files per commit.
+
+``GitHubSync`` keeps one pooled ``requests.Session`` and the blob SHA of
+every file on the branch. A change set is committed through the Git data
+API (ref -> commit -> tree, then new tree / commit / ref update), so any
+number of files lands in a single commit and files whose content already
+matches the branch are left out without being uploaded. ``api_url`` can point
+at a local stand-in server.
+"""
+import hashlib
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_URL = "https://api.github.com"
+
+
+class GitHubSyncError(Exception):
+    """A GitHub API call failed (``status`` is the HTTP status, None for connection errors)."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+def blob_sha(content: bytes) -> str:
+    """Git blob SHA-1 of ``content``, as GitHub reports it for a file."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class GitHubSync:
+    """Commits file change sets to ``branch`` of ``repo`` ("owner/name").
+
+    Not thread-safe: callers that push from several threads must serialize
+    ``commit_files``.
+    """
+
+    def __init__(self, repo: str, token: str, branch: str = "main", api_url: str = DEFAULT_API_URL, timeout=(5, 30)):
+        self.repo = repo
+        self.branch = branch
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Last branch commit seen, its tree and the blob SHA per path in that tree
+        self._head = None
+        self._tree = None
+        self._blob_shas = {}
+
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        url = f"{self.api_url}/repos/{self.repo}/{path}"
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as exc:
+            raise GitHubSyncError(f"{method} {path}: {exc}") from exc
+        if not 200 <= response.status_code < 300:
+            raise GitHubSyncError(f"{method} {path}: HTTP {response.status_code} {response.text[:200]}", response.status_code)
+        return response.json()
+
+    def _refresh(self):
+        """Read the branch head and, if it moved, the blob SHAs of its tree."""
+        head = self._request("GET", f"git/ref/heads/{self.branch}")["object"]["sha"]
+        if head != self._head:
+            tree_sha = self._request("GET", f"git/commits/{head}")["tree"]["sha"]
+            tree = self._request("GET", f"git/trees/{tree_sha}", params={"recursive": "1"})
+            self._blob_shas = {entry["path"]: entry["sha"] for entry in tree["tree"] if entry["type"] == "blob"}
+            self._tree = tree_sha
+            self._head = head
+        return head
+
+    def changed(self, files: dict) -> dict:
+        """The subset of ``files`` (path -> bytes) whose content differs from the cached branch tree."""
+        return {path: content for path, content in files.items() if self._blob_shas.get(path) != blob_sha(content)}
+
+    def commit_files(self, files: dict, message: str, attempts: int = 3) -> str | None:
+        """Commit ``files`` (repo path -> bytes) to the branch as one commit.
+
+        Returns the new commit SHA, or None when every file already matches
+        the branch. If the branch moves between reading and updating it (a
+        concurrent push), the commit is rebuilt on the new head, up to
+        ``attempts`` times. Raises ``GitHubSyncError`` on API failures.
+        """
+        for attempt in range(attempts):
+            head = self._refresh()
+            pending = self.changed(files)
+            if not pending:
+                return None
+            entries = [
+                {"path": path, "mode": "100644", "type": "blob", "content": content.decode("utf-8")}
+                for path, content in pending.items()
+            ]
+            tree = self._request("POST", "git/trees", json={"base_tree": self._tree, "tree": entries})
+            commit = self._request("POST", "git/commits", json={"message": message, "tree": tree["sha"], "parents": [head]})
+            try:
+                self._request("PATCH", f"git/refs/heads/{self.branch}", json={"sha": commit["sha"]})
+            except GitHubSyncError as exc:
+                # 422: not a fast-forward any more; retry on top of the new head
+                if exc.status != 422 or attempt == attempts - 1:
+                    raise
+                continue
+            self._head, self._tree = commit["sha"], tree["sha"]
+            self._blob_shas.update({path: blob_sha(content) for path, content in pending.items()})
+            return commit["sha"]
+        return None
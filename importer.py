@@ -0,0 +1,179 @@
+"""Bulk transaction import from broker statements (CSV / XLSX).
+
+A statement is read as-is, its columns are mapped onto the
+transaction_history.csv columns, and every row is validated and checked
+against the existing transactions in one vectorized pass. ``plan_import``
+returns the rows to add, the duplicates and the rejected rows, so the caller
+can preview them and write the new rows in a single append.
+"""
+import csv
+import io
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+TRANSACTION_COLUMNS = ["Date", "Fund", "Price (€)", "Quantity", "Fees (€)"]
+REQUIRED_COLUMNS = ["Date", "Fund", "Price (€)", "Quantity"]
+
+# Lower-cased statement headers recognised for each transaction column
+COLUMN_ALIASES = {
+    "Date": ["date", "trade date", "transaction date", "execution date", "settlement date", "value date", "data", "data operazione"],
+    "Fund": ["fund", "isin", "ticker", "symbol", "instrument", "security", "product", "fondo", "titolo"],
+    "Price (€)": ["price (€)", "price", "unit price", "nav", "price per unit", "execution price", "prezzo"],
+    "Quantity": ["quantity", "units", "shares", "qty", "number of units", "quantità", "quote"],
+    "Fees (€)": ["fees (€)", "fees", "fee", "commission", "commissions", "charges", "costs", "commissioni"],
+}
+
+# Rounding used to compare numbers when looking for duplicates
+DEDUP_DECIMALS = 6
+
+
+@dataclass
+class ImportPreview:
+    """Outcome of ``plan_import``.
+
+    ``new`` holds the rows to append in the transaction_history.csv layout,
+    ``duplicates`` the valid rows already present, and ``rejected`` the raw
+    statement rows that failed validation with a ``Reason`` column.
+    """
+    new: pd.DataFrame
+    duplicates: pd.DataFrame
+    rejected: pd.DataFrame
+
+
+def read_statement(data: bytes, filename: str) -> pd.DataFrame:
+    """Parse a statement file's bytes; ``.xlsx`` / ``.xls`` need openpyxl / xlrd, anything else is read as CSV.
+
+    The CSV delimiter (``,`` ``;`` tab or ``|``) is detected from the first
+    lines; all values are kept as strings for ``map_statement``.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in (".xlsx", ".xls"):
+        return pd.read_excel(io.BytesIO(data), dtype=str)
+    text = data.decode("utf-8-sig", errors="replace")
+    try:
+        delimiter = csv.Sniffer().sniff(text[:4096], delimiters=",;\t|").delimiter
+    except csv.Error:
+        delimiter = ","
+    return pd.read_csv(io.StringIO(text), sep=delimiter, dtype=str, skipinitialspace=True)
+
+
+def guess_mapping(columns) -> dict:
+    """Transaction column -> statement column, for the ones recognised by name (first alias match wins)."""
+    normalized = {str(col).strip().lower(): col for col in columns}
+    mapping = {}
+    for target, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized and normalized[alias] not in mapping.values():
+                mapping[target] = normalized[alias]
+                break
+    return mapping
+
+
+def parse_numbers(values: pd.Series, decimal_comma: bool = False) -> pd.Series:
+    """Numbers from statement text: currency symbols and spaces are dropped, thousands separators removed."""
+    text = values.astype("string").str.replace(r"[^\d,.\-+eE]", "", regex=True)
+    if decimal_comma:
+        text = text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    else:
+        text = text.str.replace(",", "", regex=False)
+    return pd.to_numeric(text, errors="coerce").astype(float)
+
+
+def fund_lookup(funds: pd.DataFrame) -> dict:
+    """Upper-cased fund id, ISIN, ticker and ``<ticker>.F`` -> fund id."""
+    lookup = {}
+    for column in ["Ticker", "ISIN", "Fund"]:
+        if column in funds.columns:
+            keys = funds[column].astype(str).str.strip().str.upper()
+            lookup.update(zip(keys, funds["Fund"]))
+    if "Ticker" in funds.columns:
+        lookup.update(zip(funds["Ticker"].astype(str).str.strip().str.upper() + ".F", funds["Fund"]))
+    return lookup
+
+
+def map_statement(raw: pd.DataFrame, mapping: dict, funds: pd.DataFrame, dayfirst: bool = False, decimal_comma: bool = False) -> pd.DataFrame:
+    """Statement rows in the transaction columns (NaN / NaT where a value is missing or unparseable).
+
+    Funds may be given by fund id, ISIN or ticker; unknown ones become NaN.
+    Blank fees, or no fees column at all, count as 0.
+    """
+    def column(target):
+        source = mapping.get(target)
+        if source is None or source not in raw.columns:
+            return pd.Series(pd.NA, index=raw.index, dtype="string")
+        return raw[source].astype("string").str.strip()
+
+    dates = column("Date")
+    parsed_dates = pd.to_datetime(dates, errors="coerce", dayfirst=dayfirst, format="mixed")
+    return pd.DataFrame({
+        "Date": parsed_dates.dt.normalize(),
+        "Fund": column("Fund").str.upper().map(fund_lookup(funds)),
+        "Price (€)": parse_numbers(column("Price (€)"), decimal_comma),
+        "Quantity": parse_numbers(column("Quantity"), decimal_comma),
+        "Fees (€)": parse_numbers(column("Fees (€)"), decimal_comma).fillna(0.0),
+    }, index=raw.index)
+
+
+def rejection_reasons(mapped: pd.DataFrame) -> pd.Series:
+    """Why each mapped row is invalid ("; "-joined), or "" for valid rows."""
+    checks = [
+        (mapped["Date"].isna(), "invalid date"),
+        (mapped["Fund"].isna(), "unknown fund"),
+        (~(mapped["Price (€)"] > 0), "price must be > 0"),
+        (~(mapped["Quantity"] > 0), "quantity must be > 0"),
+        (~(mapped["Fees (€)"] >= 0), "fees must be >= 0"),
+    ]
+    reasons = pd.Series("", index=mapped.index, dtype=object)
+    for failed, reason in checks:
+        failed = failed.to_numpy(dtype=bool)
+        reasons[failed] = np.where(reasons[failed] == "", reason, reasons[failed] + "; " + reason)
+    return reasons
+
+
+def _dedup_keys(frame: pd.DataFrame) -> pd.MultiIndex:
+    """(date, fund, price, quantity, fees, occurrence) per row; the occurrence number keeps repeated identical trades apart."""
+    keys = pd.DataFrame({
+        "Date": pd.to_datetime(frame["Date"], errors="coerce").dt.normalize(),
+        "Fund": frame["Fund"].astype(str),
+        "Price": frame["Price (€)"].astype(float).round(DEDUP_DECIMALS),
+        "Quantity": frame["Quantity"].astype(float).round(DEDUP_DECIMALS),
+        "Fees": frame["Fees (€)"].astype(float).fillna(0.0).round(DEDUP_DECIMALS),
+    })
+    keys["n"] = keys.groupby(list(keys.columns), dropna=False).cumcount()
+    return pd.MultiIndex.from_frame(keys)
+
+
+def plan_import(raw: pd.DataFrame, mapping: dict, funds: pd.DataFrame, existing: pd.DataFrame, dayfirst: bool = False, decimal_comma: bool = False) -> ImportPreview:
+    """Validate ``raw`` statement rows and split them into new, duplicate and rejected rows.
+
+    A row is a duplicate when ``existing`` already holds the same
+    date/fund/price/quantity/fees; identical rows are matched one to one, so
+    a statement with three identical trades against a history with one adds
+    the other two, and re-importing a statement adds nothing.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if mapping.get(col) is None]
+    if missing:
+        raise ValueError(f"Map a statement column to {', '.join(missing)}")
+
+    mapped = map_statement(raw, mapping, funds, dayfirst=dayfirst, decimal_comma=decimal_comma)
+    reasons = rejection_reasons(mapped)
+    invalid = (reasons != "").to_numpy()
+    rejected = raw[invalid].assign(Reason=reasons[invalid])
+    valid = mapped[~invalid]
+
+    # Identical rows are numbered 0, 1, ... on both sides before matching
+    if len(existing) > 0:
+        seen = _dedup_keys(existing.reindex(columns=TRANSACTION_COLUMNS))
+        duplicate = _dedup_keys(valid).isin(seen)
+    else:
+        duplicate = np.zeros(len(valid), dtype=bool)
+    new = valid[~duplicate].sort_values("Date", kind="mergesort").reset_index(drop=True)
+    return ImportPreview(new=new[TRANSACTION_COLUMNS], duplicates=valid[duplicate].reset_index(drop=True), rejected=rejected)
+
+
+def to_csv_rows(new: pd.DataFrame) -> pd.DataFrame:
+    """``new`` rows with dates as YYYY-MM-DD strings, ready for ``append_csv_rows``."""
+    return new.assign(Date=new["Date"].dt.strftime("%Y-%m-%d"))
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import date, datetime
 import os
 import plotly.express as px
@@ -8,8 +9,21 @@ import yfinance as yf
 import warnings
 import subprocess
 import sys
-import base64
-import requests
+import functools
+import threading
+import time
+import data_store
+from data_store import PriceStore, TransactionStore, append_csv_rows, read_prices
+from dependency_graph import DependencyGraph
+from disk_cache import DiskCache
+import formatting as fmt
+import importer
+import portfolio
+import profiling
+from github_sync import DEFAULT_API_URL, GitHubSync
+from sync_queue import SyncQueue
+from price_refresh import PriceRefresher, raw_file_url
+from charts import WEBGL_MAX_FIGURES, FigureCache, downsample, line_trace, padded_range, trace_y_range, transaction_markers, value_labels_trace
 
 # ---------- AUTHENTICATION ----------
 OWNER_PASSWORD = "123"
@@ -25,27 +39,116 @@ if "data_masked" not in st.session_state:
 st.set_page_config(page_title="Sbronze Treasure Hunt", layout="wide")
 st.title("📊 Sbronze Treasure Hunt")
 
+# ---------- RENDER PROFILING ----------
+# Opt-in with ?profile=1 or the owner's sidebar toggle; times every section of this run
+def render_profiling_enabled() -> bool:
+    return str(st.query_params.get("profile", "")).lower() in ("1", "true", "yes") or st.session_state.get("profile_renders", False)
+
+profiling.activate(profiling.RenderProfiler("full run") if render_profiling_enabled() else None)
+
 FUNDS_FILE = "funds.csv"
 TRANSACTIONS_FILE = "transaction_history.csv"
+HISTORICAL_FILE = "historical_data.csv"
+
+# Settings come from st.secrets, falling back to environment variables
+def _get_secret(name: str, default: str | None = None) -> str | None:
+    try:
+        return st.secrets.get(name, os.environ.get(name, default))
+    except Exception:
+        return os.environ.get(name, default)
 
 # ---------- COLOR MAPPING ----------
 FUND_COLORS = {}
 
 # ---------- LOAD DATA ----------
-def load_data():
-    if os.path.exists(FUNDS_FILE):
-        funds = pd.read_csv(FUNDS_FILE)
-    else:
-        funds = pd.DataFrame(columns=["Fund", "Ticker", "ISIN", "Fund Name", "Type", "Colour"])
-
-    if os.path.exists(TRANSACTIONS_FILE):
-        transactions = pd.read_csv(TRANSACTIONS_FILE, parse_dates=["Date"])
-    else:
-        transactions = pd.DataFrame(columns=["Date", "Fund", "Price (€)", "Quantity", "Fees (€)"])
-
-    return funds, transactions
-
-funds, transactions = load_data()
+def read_funds(path):
+    if os.path.exists(path):
+        return pd.read_csv(path)
+    return pd.DataFrame(columns=["Fund", "Ticker", "ISIN", "Fund Name", "Type", "Colour"])
+
+def read_transactions(path):
+    if os.path.exists(path):
+        return pd.read_csv(path, parse_dates=["Date"])
+    return pd.DataFrame(columns=["Date", "Fund", "Price (€)", "Quantity", "Fees (€)"])
+
+def _price_dates(store):
+    return portfolio.ascending_prices(store.frame, [])["date"]
+
+def _pnl_mv(prices_asc, holdings, *funds):
+    qty_prev_df, first_tx_date_by_fund = holdings
+    return (*portfolio.pnl_and_market_value(prices_asc, qty_prev_df, funds), first_tx_date_by_fund)
+
+def _summary(tx, price_store, transaction_store, funds, *filter_funds):
+    df = tx.copy()
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df.dropna(subset=["Date"])
+    if filter_funds:
+        df = df[df["Fund"].isin(filter_funds)]
+    return portfolio.fund_summary(df, price_store, transaction_store, funds["Fund"].tolist())
+
+def _allocation_cube(transaction_store, price_store, funds):
+    latest_prices = price_store.latest_prices() if price_store is not None else None
+    colors = dict(zip(funds["Fund"], funds["Colour"]))
+    return portfolio.allocation_cube(transaction_store.frame, funds, colors, latest_prices)
+
+def _read_price_store(path, ticker_map):
+    # Ticker columns (e.g. 0P0001CRXW.F) are mapped to fund names (e.g. US); dates are already tz-naive (Europe/Rome)
+    return PriceStore(read_prices(path, ticker_map)) if os.path.exists(path) else None
+
+def _price_trace(store, fund, start, end, max_points):
+    """Downsampled (dates, prices) line for one fund over [start, end]."""
+    fund_df = store.between(start, end, columns=["date", fund]).dropna()
+    return downsample(fund_df["date"].to_numpy(), fund_df[fund].to_numpy(), max_points, CHART_DOWNSAMPLE_METHOD)
+
+def _historical_table(price_store, transaction_store, *funds):
+    """Historical Data table inputs for ``funds``: (prices, % changes, transaction days), newest first.
+
+    Computed by ``portfolio.historical_table``; the page view only slices
+    these frames.
+    """
+    return portfolio.historical_table(price_store.frame, transaction_store.frame, funds)
+
+# Derived data kept on disk across restarts, keyed by the data files' content hashes; "" disables
+DERIVED_CACHE_DIR = _get_secret("DERIVED_CACHE_DIR", ".derived_cache")
+DERIVED_CACHE_MAX_MB = float(_get_secret("DERIVED_CACHE_MAX_MB", "200"))
+
+@st.cache_resource(show_spinner=False)
+def get_data_graph() -> DependencyGraph:
+    """Process-wide graph of everything derived from the data files.
+
+    files -> parsed frames -> stores -> holdings matrix -> P&L / MV; every
+    node carries a content version, so an edit to one file only recomputes
+    what depends on it (a colour change in funds.csv stops at the unchanged
+    ticker map and leaves the parsed prices alone). Persisted nodes are
+    loaded from DERIVED_CACHE_DIR after a restart.
+    """
+    disk_cache = DiskCache(DERIVED_CACHE_DIR, int(DERIVED_CACHE_MAX_MB * 1024 * 1024)) if DERIVED_CACHE_DIR else None
+    graph = DependencyGraph(disk_cache)
+    for path in (FUNDS_FILE, TRANSACTIONS_FILE, HISTORICAL_FILE):
+        graph.file(path, path)
+    graph.node("funds", [FUNDS_FILE], read_funds)
+    graph.node("transactions", [TRANSACTIONS_FILE], read_transactions)
+    graph.node("ticker_map", ["funds"], lambda funds: funds[["Ticker", "Fund"]],
+               fingerprint=lambda frame: tuple(frame.itertuples(index=False)))
+    graph.node("price_store", [HISTORICAL_FILE, "ticker_map"], _read_price_store, persist=True, code=(data_store,))
+    # Includes the per-fund quantity precision and prefix sums
+    graph.node("transaction_store", ["transactions"], TransactionStore, persist=True, code=(data_store,))
+    graph.node("allocation_cube", ["transaction_store", "price_store", "funds"], _allocation_cube, persist=True, code=(portfolio,))
+    # New price rows usually add dates; value-only corrections keep the holdings matrix
+    graph.node("price_dates", ["price_store"], _price_dates, fingerprint=lambda dates: dates.to_numpy().tobytes(), code=(portfolio,))
+    # Per selected-funds tuple
+    graph.node("summary", ["transactions", "price_store", "transaction_store", "funds"], _summary, parameterized=True, persist=True, code=(portfolio, data_store))
+    graph.node("prices_asc", ["price_store"], lambda store, *funds: portfolio.ascending_prices(store.frame, funds), parameterized=True, code=(portfolio,))
+    graph.node("holdings", ["price_dates", "transactions"], lambda dates, tx, *funds: portfolio.holdings_before(dates, tx, funds), parameterized=True, persist=True, code=(portfolio,))
+    graph.node("pnl_mv", ["prices_asc", "holdings"], _pnl_mv, parameterized=True, persist=True, code=(portfolio,))
+    # Page views: per (fund, start, end, max_points) chart line and per selected-funds table
+    graph.node("price_trace", ["price_store"], _price_trace, parameterized=True, max_entries=512)
+    graph.node("historical_table", ["price_store", "transaction_store"], _historical_table, parameterized=True, max_entries=32, code=(portfolio,))
+    return graph
+
+with profiling.section("Load funds & transactions CSV"):
+    funds = get_data_graph().get("funds")
+    transactions = get_data_graph().get("transactions")
 
 # Build FUND_COLORS and HISTORICAL_FUND_MAPPING from funds data
 for row_index, entire_row in funds.iterrows():
@@ -60,79 +163,262 @@ if "fund_filter" not in st.session_state:
 
 # ---------- GITHUB COMMIT HELPERS ----------
 
-def _get_secret(name: str, default: str | None = None) -> str | None:
-    try:
-        return st.secrets.get(name, os.environ.get(name, default))
-    except Exception:
-        return os.environ.get(name, default)
-
 GITHUB_TOKEN = _get_secret("GITHUB_TOKEN")
 GITHUB_REPO = _get_secret("GITHUB_REPO", "donutseater97/Sbronze")
 GITHUB_BRANCH = _get_secret("GITHUB_BRANCH", "main")
-
-def github_get_file_sha(path: str) -> str | None:
-    if not GITHUB_TOKEN or not GITHUB_REPO:
+# Point at a local stand-in server to try syncing without touching GitHub
+GITHUB_API_URL = _get_secret("GITHUB_API_URL", DEFAULT_API_URL)
+# Files the app edits; every edit syncs them together, unchanged ones are skipped
+GITHUB_SYNCED_FILES = (FUNDS_FILE, TRANSACTIONS_FILE)
+
+@st.cache_resource(show_spinner=False)
+def get_github_sync(repo, branch, api_url) -> GitHubSync | None:
+    """Shared GitHub client (one pooled session and blob SHA cache per repo/branch), or None without a token."""
+    if not GITHUB_TOKEN or not repo:
         return None
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{path}"
-    params = {"ref": GITHUB_BRANCH}
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}", "Accept": "application/vnd.github+json"}
-    request_get = requests.get(url, headers=headers, params=params, timeout=30)
-    if request_get.status_code == 200:
-        return request_get.json().get("sha")
-    return None
-
-def github_put_file(path: str, content_str: str, message: str) -> bool:
-    if not GITHUB_TOKEN or not GITHUB_REPO:
+    return GitHubSync(repo, GITHUB_TOKEN, branch=branch, api_url=api_url)
+
+# Pending change set of the background sync (survives restarts)
+GITHUB_SYNC_QUEUE_FILE = _get_secret("GITHUB_SYNC_QUEUE_FILE", ".github_sync_queue.json")
+
+@st.cache_resource(show_spinner=False)
+def get_sync_queue(repo, branch, api_url) -> SyncQueue | None:
+    """Process-wide background sync worker, or None when GitHub sync is not configured."""
+    sync = get_github_sync(repo, branch, api_url)
+    return SyncQueue(sync, GITHUB_SYNC_QUEUE_FILE) if sync is not None else None
+
+def queue_github_sync(paths, message: str) -> bool:
+    """Schedule ``paths`` for a background commit and return at once; False when sync is not configured."""
+    queue = get_sync_queue(GITHUB_REPO, GITHUB_BRANCH, GITHUB_API_URL)
+    if queue is None:
         return False
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{path}"
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}", "Accept": "application/vnd.github+json"}
-    sha = github_get_file_sha(path)
-    data = {
-        "message": message,
-        "content": base64.b64encode(content_str.encode("utf-8")).decode("ascii"),
-        "branch": GITHUB_BRANCH,
-    }
-    if sha:
-        data["sha"] = sha
-    request_put = requests.put(url, headers=headers, json=data, timeout=30)
-    return 200 <= request_put.status_code < 300
+    queue.enqueue(paths, message)
+    return True
+
+# ---------- CHART SETTINGS ----------
+# Target points per full-width line trace; longer series are downsampled (extrema kept) before plotting
+CHART_MAX_POINTS = int(_get_secret("CHART_MAX_POINTS", "1500"))
+CHART_DOWNSAMPLE_METHOD = _get_secret("CHART_DOWNSAMPLE_METHOD", "minmax")
+# Opt-in WebGL mode (Scattergl + compact arrays, text value labels); toggled per session from the sidebar
+CHART_WEBGL = str(_get_secret("CHART_WEBGL", "false")).lower() in ("1", "true", "yes")
+
+if "fast_charts" not in st.session_state:
+    st.session_state.fast_charts = CHART_WEBGL
+
+# Historical Data table is paged server-side; only the current page is styled and sent
+HIST_TABLE_PAGE_SIZES = [50, 100, 250, 500]
 
 # ---------- HISTORICAL PRICES DATA FETCHING (CSV cache) ----------
 
-def load_historical_prices():
-    """Load pre-generated historical_data.csv (investgo data) committed to the repo."""
-    if not os.path.exists("historical_data.csv"):
+def get_price_store() -> PriceStore | None:
+    """Date-indexed price store, or None when historical_data.csv is missing/unreadable."""
+    if not os.path.exists(HISTORICAL_FILE):
         st.error("historical_data.csv not found. It is generated by GitHub Actions or by running get_historical_data.py locally.")
-        return pd.DataFrame()
+        return None
 
     try:
-        df_historical_data = pd.read_csv("historical_data.csv")
+        return get_data_graph().get("price_store")
     except Exception as exc:  # pragma: no cover
         st.error(f"Could not read historical_data.csv: {exc}")
-        return pd.DataFrame()
-
-    # Normalize column names for UI
-    if "Date" in df_historical_data.columns:
-        df_historical_data = df_historical_data.rename(columns={"Date": "date"})
-
-    # Date column is already tz-naive from get_historical_data.py (converted to Europe/Rome)
-    if "date" in df_historical_data.columns:
-        df_historical_data["date"] = pd.to_datetime(df_historical_data["date"], errors="coerce")
+        return None
 
-    # Map ticker columns to fund names (e.g., 0P0001CRXW.F -> US)
-    for row_index, row_from_historical_data in funds.iterrows():
-        ticker = row_from_historical_data["Ticker"]
-        fund_name = row_from_historical_data["Fund"]
-        yahoo_col = f"{ticker}.F"
-        if yahoo_col in df_historical_data.columns:
-            df_historical_data = df_historical_data.rename(columns={yahoo_col: fund_name})
+def load_historical_prices():
+    """Load pre-generated historical_data.csv (investgo data) committed to the repo."""
+    store = get_price_store()
+    return store.frame if store is not None else pd.DataFrame()
+
+def get_transaction_store() -> TransactionStore:
+    """Date-indexed view of the transaction history (rebuilt when the CSV changes)."""
+    return get_data_graph().get("transaction_store")
+
+# Category colours for the allocation pies
+ALLOCATION_TYPE_COLORS = {
+    "Bond": "#1f77b4", "Equity": "#ff7f0e", "Mixed": "#2ca02c",
+    "Commodity": "#d62728", "Alternative": "#9467bd", "Other": "#8c564b"
+}
+ALLOCATION_PALETTE = [
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"
+]
+
+# ---------- FIGURE CACHE ----------
+
+@st.cache_resource(show_spinner=False)
+def _get_figure_cache() -> FigureCache:
+    return FigureCache(max_entries=128)
+
+# Graph nodes most figures are built from; a figure's key holds their versions
+FIGURE_INPUTS = ("funds", "transactions", HISTORICAL_FILE)
+
+def cached_figure(chart_id, selected, date_range, view_mode, build, depends=FIGURE_INPUTS):
+    """Return the figure for these view parameters, calling ``build()`` only on a cache miss.
+
+    The key also covers the mask/fast-chart toggles and the versions of the
+    ``depends`` graph nodes, so reruns triggered by unrelated widgets reuse
+    the prebuilt figure and a data edit only rebuilds the figures it feeds.
+    """
+    graph = get_data_graph()
+    key = (
+        chart_id,
+        tuple(selected),
+        date_range,
+        view_mode,
+        st.session_state.data_masked,
+        st.session_state.fast_charts,
+        tuple((name, graph.version(name)) for name in depends),
+    )
+    return _get_figure_cache().get_or_build(key, build)
+
+# ---------- CACHE INVALIDATION ----------
+def invalidate_caches(path):
+    """Re-check the graph after ``path`` was written and drop only the nodes and figures whose inputs changed."""
+    changed = get_data_graph().invalidate(path)
+    _get_figure_cache().evict(lambda key: any(name in changed for name, _ in key[-1]))
+    return changed
+
+# ---------- STARTUP WARM-UP ----------
+def default_date_range(price_store):
+    """Default Historical Data range: October 1, 2024 (or the first price date if later) to the last price date."""
+    min_d, max_d = price_store.min_date.date(), price_store.max_date.date()
+    return max(date(2024, 10, 1), min_d), max_d
+
+def grid_columns(n_funds):
+    """Charts per row in the Historical Data grid view."""
+    return 2 if n_funds > 6 else min(3, n_funds)
+
+def warm_up():
+    """Compute what a first visit with the default fund filter and date range needs.
+
+    Covers the stores, summary, P&L / MV, allocation cube, the grid-view
+    price traces and the Historical Data table, all as graph nodes with the
+    parameters the pages use, so their first render finds them cached. Only
+    the graph is touched: no st.cache_data or st.session_state, which would
+    need a ScriptRunContext this thread does not have.
+    """
+    graph = get_data_graph()
+    fund_list = graph.get("funds")["Fund"].tolist()
+    graph.get("transaction_store")
+    graph.get("allocation_cube")
+    if not fund_list:
+        return
+    graph.get("summary", *fund_list)
+    if not os.path.exists(HISTORICAL_FILE):
+        return
+    price_store = graph.get("price_store")
+    if len(price_store) == 0:
+        return
+    graph.get("pnl_mv", *fund_list)
+    selected_funds = [fund for fund in fund_list if fund in price_store.fund_columns]
+    if not selected_funds:
+        return
+    start_d, end_d = default_date_range(price_store)
+    for fund in selected_funds:
+        graph.get("price_trace", fund, start_d, end_d, CHART_MAX_POINTS // grid_columns(len(selected_funds)))
+    graph.get("historical_table", *selected_funds)
 
-    return df_historical_data
+def _run_warm_up():
+    started = time.perf_counter()
+    try:
+        warm_up()
+    except Exception as exc:  # the pages compute whatever is missing
+        print(f"[WARN] Cache warm-up failed: {exc}")
+        return
+    print(f"[INFO] Cache warm-up done in {time.perf_counter() - started:.2f}s")
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up() -> threading.Thread:
+    """Start ``warm_up`` once per process in a background thread.
+
+    Pages render meanwhile; the graph locks per node, so a page only waits
+    when it needs the node the warm-up is computing at that moment.
+    """
+    thread = threading.Thread(target=_run_warm_up, name="cache-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+start_warm_up()
+
+# ---------- LIVE PRICE REFRESH ----------
+# Poll the committed historical_data.csv (conditional GET on its ETag) every
+# PRICE_REFRESH_INTERVAL seconds; 0 (default) disables. PRICE_REFRESH_URL can
+# point at a local stand-in server
+PRICE_REFRESH_INTERVAL = float(_get_secret("PRICE_REFRESH_INTERVAL", "0"))
+PRICE_REFRESH_URL = _get_secret("PRICE_REFRESH_URL", raw_file_url(GITHUB_REPO, GITHUB_BRANCH, HISTORICAL_FILE))
+
+@st.cache_resource(show_spinner=False)
+def get_price_refresher(url, interval) -> PriceRefresher | None:
+    """Process-wide refresher thread; new prices replace the file and drop only price-derived caches."""
+    if not url or interval <= 0:
+        return None
+    return PriceRefresher(url, HISTORICAL_FILE, interval, on_update=lambda: invalidate_caches(HISTORICAL_FILE), token=GITHUB_TOKEN)
+
+price_refresher = get_price_refresher(PRICE_REFRESH_URL, PRICE_REFRESH_INTERVAL)
+
+# ---------- RENDER PROFILE REPORT ----------
+# Rolling JSON-lines log of profiled runs (rolled over to <file>.1 past PROFILE_LOG_MAX_BYTES)
+PROFILE_LOG = _get_secret("PROFILE_LOG", "render_profile.jsonl")
+PROFILE_LOG_MAX_BYTES = int(_get_secret("PROFILE_LOG_MAX_BYTES", "1000000"))
+
+if profiling.current() is not None:
+    profiling.current().track_figures(_get_figure_cache())
+
+def show_render_profile(profiler, label):
+    """Log the run's report and show it in a collapsed timing table."""
+    profiler.label = label
+    profiler.finish()
+    report = profiler.report()
+    profiling.append_log(PROFILE_LOG, report, max_bytes=PROFILE_LOG_MAX_BYTES)
+    with st.expander(f"⏱️ Render profile: {label} ({report['total_s'] * 1000:,.0f} ms)", expanded=False):
+        sections = pd.DataFrame(report["sections"], columns=["section", "depth", "seconds"])
+        st.dataframe(
+            pd.DataFrame({
+                "Section": ["\u2003" * depth + name for name, depth in zip(sections["section"], sections["depth"])],
+                "ms": sections["seconds"] * 1000,
+                "% of run": sections["seconds"] / report["total_s"] * 100,
+            }),
+            hide_index=True,
+            width="stretch",
+            column_config={
+                "ms": st.column_config.NumberColumn(format="%.1f"),
+                "% of run": st.column_config.NumberColumn(format="%.1f%%"),
+            },
+        )
+        if report["caches"]:
+            caches = pd.DataFrame.from_dict(report["caches"], orient="index").rename_axis("Cache").reset_index()
+            st.dataframe(caches[["Cache", "calls", "hits", "misses"]], hide_index=True, width="stretch")
+        if report["peak_rss_mb"] is not None:
+            st.caption(f"Peak RSS {report['peak_rss_mb']:,.0f} MB (+{report['peak_rss_growth_mb']:,.1f} MB this run) · logged to {PROFILE_LOG}")
+
+def profiled_section(name):
+    """Time the decorated page/fragment as a section.
+
+    A fragment-only rerun has no active profiler, so it gets one of its own
+    and shows its report below the fragment.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            if profiling.current() is not None or not render_profiling_enabled():
+                with profiling.section(name):
+                    return func(*args, **kwargs)
+            profiler = profiling.RenderProfiler(name)
+            profiler.track_figures(_get_figure_cache())
+            profiling.activate(profiler)
+            try:
+                with profiling.section(name):
+                    result = func(*args, **kwargs)
+            finally:
+                profiling.activate(None)
+            show_render_profile(profiler, f"{name} (fragment rerun)")
+            return result
+        return run
+    return decorate
 
 # ---------- GLOBAL HISTORICAL DATA AND LAST DATE ----------
-hist_data_global = load_historical_prices()
+with profiling.section("Load price store"):
+    hist_data_global = load_historical_prices()
 if len(hist_data_global) > 0 and "date" in hist_data_global.columns:
-    _latest_hist_date = pd.to_datetime(hist_data_global["date"]).max()
+    _latest_hist_date = hist_data_global["date"].iloc[-1]
     last_date_str = _latest_hist_date.strftime("%Y-%m-%d") if pd.notna(_latest_hist_date) else "-"
 else:
     last_date_str = "-"
@@ -159,12 +445,78 @@ def mask_value(value, value_type="number"):
     else:
         return f"{value:,.2f}"
 
+# ---------- FUND FILTER BUTTONS ----------
+def _toggle_fund_filter(fund):
+    if fund in st.session_state.fund_filter:
+        st.session_state.fund_filter.remove(fund)
+    else:
+        st.session_state.fund_filter.append(fund)
+
+def _reset_fund_filter(fund_list):
+    st.session_state.fund_filter = list(fund_list)
+
+def fund_filter_buttons(fund_list):
+    """Render the global fund filter buttons and return the active funds among ``fund_list``.
+
+    Buttons update ``st.session_state.fund_filter`` in on_click callbacks, so a
+    click inside an ``st.fragment`` only reruns that fragment.
+    """
+    if len(fund_list) == 0:
+        return []
+
+    st.markdown("**Filter by Fund:**")
+    # Generate custom CSS for fund buttons
+    fund_button_css = "<style>"
+    for fund in fund_list:
+        hex_color = FUND_COLORS.get(fund, "#999999")
+        if hex_color.startswith('#'):
+            hex_color = hex_color[1:]
+        r, g, b = int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
+        fund_button_css += f"""
+        button[data-testid=\"baseButton-primary\"][aria-label=\"{fund}\"] {{
+            background-color: rgba(200, 200, 200, 0.8) !important;
+            border: none !important;
+            color: rgb({r}, {g}, {b}) !important;
+            font-weight: 600 !important;
+        }}
+        """
+    fund_button_css += "</style>"
+    st.markdown(fund_button_css, unsafe_allow_html=True)
+
+    # Create columns for all buttons (fund buttons + reset button)
+    cols = st.columns(len(fund_list) + 1)
+    for idx, fund in enumerate(fund_list):
+        with cols[idx]:
+            is_active = fund in st.session_state.fund_filter
+            st.button(
+                fund,
+                key=f"fund_btn_{fund}",
+                type="primary" if is_active else "secondary",
+                width="stretch",
+                on_click=_toggle_fund_filter,
+                args=(fund,),
+            )
+
+    # Reset button in last column
+    with cols[-1]:
+        st.button("✕", key="reset_fund_filters", help="Reset filters", width="stretch", on_click=_reset_fund_filter, args=(fund_list,))
+    return [f for f in st.session_state.fund_filter if f in fund_list]
+
+@profiled_section("Overview")
 def overview_and_charts():
     # ---------- PORTFOLIO SUMMARY ----------
     # Get last date from historical data for title
     # Use global last_date_str for title
     st.header(f"📈 Portfolio Summary as of {last_date_str}")
     
+    portfolio_sections()
+    allocation_charts()
+
+@st.fragment
+@profiled_section("Portfolio sections")
+def portfolio_sections():
+    """Summary, evolution tables and revenue chart; reruns alone on filter or mask changes."""
+    profiling.lap("Mask toggle & fund filter")
     # Data masking toggle
     col_mask1, col_mask2 = st.columns([3, 1])
     with col_mask1:
@@ -173,83 +525,14 @@ def overview_and_charts():
         st.session_state.data_masked = st.toggle("🔒 Hide Data", value=st.session_state.data_masked, key="data_mask_toggle")
 
     # Fund filter buttons (global)
-    if len(funds) > 0:
-        st.markdown("**Filter by Fund:**")
-        # Generate custom CSS for fund buttons
-        fund_button_css = "<style>"
-        for fund in funds["Fund"].tolist():
-            hex_color = FUND_COLORS.get(fund, "#999999")
-            if hex_color.startswith('#'):
-                hex_color = hex_color[1:]
-            r, g, b = int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
-            fund_button_css += f"""
-            button[data-testid=\"baseButton-primary\"][aria-label=\"{fund}\"] {{
-                background-color: rgba(200, 200, 200, 0.8) !important;
-                border: none !important;
-                color: rgb({r}, {g}, {b}) !important;
-                font-weight: 600 !important;
-            }}
-            """
-        fund_button_css += "</style>"
-        st.markdown(fund_button_css, unsafe_allow_html=True)
-
-        # Create columns for all buttons (fund buttons + reset button)
-        num_cols = len(funds["Fund"].tolist()) + 1
-        cols = st.columns(num_cols)
-
-        for idx, fund in enumerate(funds["Fund"].tolist()):
-            with cols[idx]:
-                is_active = fund in st.session_state.fund_filter
-                hex_color = FUND_COLORS.get(fund, "#999999")
-                if st.button(fund, key=f"fund_btn_{fund}", type="primary" if is_active else "secondary", width="stretch"):
-                    if is_active:
-                        st.session_state.fund_filter.remove(fund)
-                    else:
-                        st.session_state.fund_filter.append(fund)
-                    st.rerun()
-
-        # Reset button in last column
-        with cols[-1]:
-            if st.button("✕", key="reset_fund_filters", help="Reset filters", width="stretch"):
-                st.session_state.fund_filter = funds["Fund"].tolist()
-                st.rerun()
-        filter_funds = st.session_state.fund_filter
-    else:
-        filter_funds = []
+    filter_funds = fund_filter_buttons(funds["Fund"].tolist())
     
+    profiling.lap("Summary table & totals")
     if len(transactions) > 0:
-        df = transactions.copy()
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-        df = df.dropna(subset=["Date"])
-        
-        # Apply fund filter
-        if filter_funds:
-            df = df[df["Fund"].isin(filter_funds)]
-        
-        # Calculate metrics by fund
-        # Calculate Gross Contribution (theor) per fund
-        df["Gross Contribution (real)"] = df["Quantity"] * df["Price (€)"] + df["Fees (€)"]
-        df["Gross Contribution (theor)"] = (df["Gross Contribution (real)"] / 10).round() * 10
-        df["Net Invested"] = df["Quantity"] * df["Price (€)"]
-        
-        summary = df.groupby("Fund").agg({
-            "Quantity": "sum",
-            "Fees (€)": "sum",
-            "Gross Contribution (theor)": "sum",
-            "Net Invested": "sum"
-        }).reset_index()
-        
-        # Rename columns
-        summary = summary.rename(columns={
-            "Gross Contribution (theor)": "Gross Contributions (€)",
-            "Net Invested": "Net Invested (€)"
-        })
-        summary["Fees (€)"] = summary["Fees (€)"]
-        
-        # Calculate Average NAV
-        summary["Average NAV (€)"] = (summary["Gross Contributions (€)"] - summary["Fees (€)"]) / summary["Quantity"]
+        # Holdings, returns, MoM and weights per selected fund (numeric; formatted below), cached per fund filter
+        summary = get_data_graph().get("summary", *filter_funds)
+        total_market_value = summary["Market Value (€)"].sum()
         
-        # Get latest price from historical data
         hist_data = hist_data_global
         last_hist_date = (
             pd.to_datetime(hist_data["date"]).max()
@@ -257,115 +540,8 @@ def overview_and_charts():
             else None
         )
         
-        # Per-fund decimal precision
-        def _count_decimals(num):
-            if pd.isna(num):
-                return 0
-            s = f"{float(num):.6f}".rstrip('0').rstrip('.')
-            if '.' in s:
-                return min(len(s.split('.')[-1]), 6)
-            return 0
-        try:
-            fund_qty_decimals_overview = (
-                transactions.groupby("Fund")["Quantity"].apply(
-                    lambda s: max((_count_decimals(v) for v in s if pd.notna(v)), default=0)
-                ).to_dict()
-            )
-        except Exception:
-            fund_qty_decimals_overview = {}
-        fund_qty_decimals_overview = {f: min(int(d or 0), 3) for f, d in fund_qty_decimals_overview.items()}
-        
-        # Format Quantity with per-fund precision
-        def format_qty_overview(row):
-            dp = fund_qty_decimals_overview.get(row["Fund"], 3)
-            q = row["Quantity"]
-            rounded = round(q, dp)
-            if rounded == int(rounded):
-                return str(int(rounded))
-            return f"{rounded:.{dp}f}".rstrip('0').rstrip('.')
-        
-        # Store numeric quantity before formatting for calculation (make explicit copy)
-        qty_numeric = summary["Quantity"].astype(float).copy()
-        
-        # Get latest price and calculate Market Value (before formatting Quantity)
-        if len(hist_data) > 0 and "date" in hist_data.columns:
-            latest_date = pd.to_datetime(hist_data["date"]).max()
-            latest_prices = {}
-            for fund in summary["Fund"]:
-                if fund in hist_data.columns:
-                    price_vals = hist_data[hist_data["date"] == latest_date][fund].values
-                    if len(price_vals) > 0 and pd.notna(price_vals[0]):
-                        latest_prices[fund] = price_vals[0]
-            summary["Latest Price (€)"] = summary["Fund"].map(latest_prices)
-            # Calculate Market Value with numeric quantities before formatting
-            summary["Market Value (€)"] = qty_numeric * summary["Latest Price (€)"].fillna(0.0)
-
-            # Compute per-fund latest daily % and absolute € change using historical data
-            latest_pct_map = {}
-            latest_abs_change_map = {}
-            prev_value_map = {}
-            hist_sorted = hist_data.sort_values("date", ascending=False)
-            for fund in summary["Fund"]:
-                if fund in hist_sorted.columns:
-                    s = pd.to_numeric(hist_sorted[fund], errors="coerce")
-                    if len(s) > 1 and pd.notna(s.iloc[0]) and pd.notna(s.iloc[1]):
-                        pct = (s.iloc[0] / s.iloc[1] - 1.0) * 100.0
-                        latest_pct_map[fund] = round(float(pct), 2)
-                        latest_abs_change_map[fund] = float(s.iloc[0] - s.iloc[1])
-                        prev_value_map[fund] = float(s.iloc[1])
-                    else:
-                        latest_pct_map[fund] = None
-                        latest_abs_change_map[fund] = None
-                        prev_value_map[fund] = None
-                else:
-                    latest_pct_map[fund] = None
-                    latest_abs_change_map[fund] = None
-                    prev_value_map[fund] = None
-        else:
-            summary["Latest Price (€)"] = 0.0
-            summary["Market Value (€)"] = 0.0
-            latest_pct_map = {f: None for f in summary["Fund"]}
-            latest_abs_change_map = {f: None for f in summary["Fund"]}
-            prev_value_map = {f: None for f in summary["Fund"]}
-        
-        # Now format Quantity for display
-        summary["Quantity"] = summary.apply(format_qty_overview, axis=1)
-        
-        # Calculate Total Return [€ (%)]
-        summary["Total Return (€)"] = summary["Market Value (€)"] - summary["Gross Contributions (€)"]
-        summary["Total Return (%)"] = (summary["Total Return (€)"] / summary["Gross Contributions (€)"] * 100).round(2)
-        summary["Total Return [€ (%)]"] = summary["Total Return (€)"].round(2).astype(str) + " (" + summary["Total Return (%)"].astype(str) + "%)"
-        
-        # Calculate Net Return [€ (%)]
-        summary["Net Return (€)"] = summary["Market Value (€)"] - summary["Net Invested (€)"]
-        summary["Net Return (%)"] = (summary["Net Return (€)"] / summary["Net Invested (€)"] * 100).round(2)
-        summary["Net Return [€ (%)]"] = summary["Net Return (€)"].round(2).astype(str) + " (" + summary["Net Return (%)"].astype(str) + "%)"
-        
-        # Calculate MoM performance (%)
-        # Get transactions from last 2 months for each fund
-        df["month"] = df["Date"].dt.to_period("M")
-        current_month = df["month"].max()
-        prev_month = current_month - 1
-        
-        mom_performance = {}
-        for fund in summary["Fund"]:
-            fund_df = df[df["Fund"] == fund]
-            current_month_price = fund_df[fund_df["month"] == current_month]["Price (€)"].mean()
-            prev_month_price = fund_df[fund_df["month"] == prev_month]["Price (€)"].mean()
-            if pd.notna(prev_month_price) and prev_month_price > 0 and pd.notna(current_month_price):
-                mom_performance[fund] = ((current_month_price - prev_month_price) / prev_month_price * 100)
-            else:
-                mom_performance[fund] = 0.0
-        summary["MoM performance (%)"] = summary["Fund"].map(mom_performance).round(2)
-        
-        # Calculate Weight
-        total_market_value = summary["Market Value (€)"].sum()
-        summary["Weight (Mkt Value)"] = (summary["Market Value (€)"] / total_market_value * 100).round(2)
-        
-        # Order by funds.csv order
-        fund_order = funds["Fund"].tolist()
-        summary["fund_order"] = summary["Fund"].map({f: i for i, f in enumerate(fund_order)})
-        summary = summary.sort_values("fund_order").reset_index(drop=True)
+        # Per-fund decimal precision (derived once per transactions version)
+        fund_qty_decimals_overview = get_transaction_store().quantity_decimals
         
         # Select and format final columns
         # Create display dataframe with selected columns in desired order
@@ -387,107 +563,51 @@ def overview_and_charts():
         # Rename Total Return to Return
         display_summary = display_summary.rename(columns={"Total Return [€ (%)]": "Return [€ (%)]"})
         
+        # Quantity at per-fund precision
+        display_summary["Quantity"] = fmt.quantity(summary["Quantity"], summary["Fund"].map(fund_qty_decimals_overview).fillna(3))
+        
         # Keep raw values for color logic before formatting
         display_summary["_Total_Return_raw"] = summary["Total Return (€)"]
         display_summary["_Net_Return_raw"] = summary["Net Return (€)"]
         display_summary["_MoM_raw"] = summary["MoM performance (%)"]
         
-        # Format numeric columns with masking support
-        if st.session_state.data_masked:
-            for col in ["Gross Contributions (€)", "Net Invested (€)", "Fees (€)", "Average NAV (€)"]:
-                display_summary[col] = "***.*€"
-        else:
-            for col in ["Gross Contributions (€)", "Net Invested (€)", "Fees (€)", "Average NAV (€)"]:
-                display_summary[col] = display_summary[col].apply(lambda x: f"€ {x:,.2f}")
+        # Format numeric columns with masking support (whole columns at once)
+        masked = st.session_state.data_masked
+        for col in ["Gross Contributions (€)", "Net Invested (€)", "Fees (€)", "Average NAV (€)"]:
+            display_summary[col] = fmt.currency(display_summary[col], masked=masked)
 
         # Latest Price (€) with daily % annotation
-        def _fmt_latest_price_row(row):
-            fund = row["Fund"]
-            price = summary.loc[summary["Fund"] == fund, "Latest Price (€)"].values[0]
-            if st.session_state.data_masked:
-                base = "***.*€"
-            else:
-                base = f"€ {float(price):,.2f}" if pd.notna(price) else "€ 0.00"
-            pct = latest_pct_map.get(fund)
-            if pct is None:
-                return base
-            if st.session_state.data_masked:
-                return "***.*€ (***.*%)"
-            if pct == 0:
-                return f"{base} (0.00%)"
-            sign = "+" if pct > 0 else ""
-            return f"{base} ({sign}{pct:.2f}%)"
-        display_summary["Latest Price (€)"] = display_summary.apply(_fmt_latest_price_row, axis=1)
+        latest_pct = summary["Latest Change (%)"]
+        display_summary["Latest Price (€)"] = fmt.with_note(
+            fmt.currency(summary["Latest Price (€)"].fillna(0.0), masked=masked),
+            np.where(latest_pct.isna(), "", fmt.percent(latest_pct, masked=masked, signed=True)),
+        )
 
         # Market Value (€) - without delta, use latest from Portfolio Market Value Evolution
-        def _fmt_market_value_row(row):
-            fund = row["Fund"]
-            mv = summary.loc[summary["Fund"] == fund, "Market Value (€)"].values[0]
-            if st.session_state.data_masked:
-                return "***.*€"
-            return f"€ {float(mv):,.2f}" if pd.notna(mv) else "€ 0.00"
-        display_summary["Market Value (€)"] = display_summary.apply(_fmt_market_value_row, axis=1)
-        
-        if st.session_state.data_masked:
-            display_summary["MoM performance (%)"] = "***.*%"
-            display_summary["Weight (Mkt Value)"] = "***.*%"
-            display_summary["Quantity"] = "***"
-        else:
-            display_summary["MoM performance (%)"] = display_summary["MoM performance (%)"].apply(lambda x: f"{x:.2f}%")
-            display_summary["Weight (Mkt Value)"] = display_summary["Weight (Mkt Value)"].apply(lambda x: f"{x:.2f}%")
-        
-        # Format Return columns with masking
-        if st.session_state.data_masked:
-            display_summary["Return [€ (%)]"] = "***.*€ (***.*%)"
-            display_summary["Net Return [€ (%)]"] = "***.*€ (***.*%)"
-        else:
-            # Format with actual values
-            def fmt_return_col(val):
-                if pd.isna(val):
-                    return ""
-                if isinstance(val, str):
-                    return val
-                return val
-            # The Return columns already have formatted values from summary
-        
-        # Store raw values for lookup
-        raw_values = display_summary[["Fund", "_Total_Return_raw", "_Net_Return_raw", "_MoM_raw"]].set_index("Fund")
-        
-        # Remove helper columns from display
+        display_summary["Market Value (€)"] = fmt.currency(summary["Market Value (€)"].fillna(0.0), masked=masked)
+        
+        display_summary["MoM performance (%)"] = fmt.percent(display_summary["MoM performance (%)"], masked=masked)
+        display_summary["Weight (Mkt Value)"] = fmt.percent(display_summary["Weight (Mkt Value)"], masked=masked)
+        if masked:
+            display_summary["Quantity"] = fmt.MASK_QUANTITY
+            display_summary["Return [€ (%)]"] = fmt.MASK_CHANGE
+            display_summary["Net Return [€ (%)]"] = fmt.MASK_CHANGE
+        
+        # Keep raw return values for color logic, then remove helper columns from display
+        total_return_raw = display_summary["_Total_Return_raw"].to_numpy()
+        net_return_raw = display_summary["_Net_Return_raw"].to_numpy()
+        mom_raw = display_summary["_MoM_raw"].to_numpy()
         display_summary = display_summary.drop(columns=["_Total_Return_raw", "_Net_Return_raw", "_MoM_raw"])
         
-        # Apply color coding
-        def style_fund_rows(row):
-            fund_name = row["Fund"]
-            hex_color = FUND_COLORS.get(fund_name, "#000000")
-            # Convert hex to rgba with light alpha
-            if hex_color.startswith('#'):
-                hex_color = hex_color[1:]
-            rgba = f"rgba({int(hex_color[0:2], 16)}, {int(hex_color[2:4], 16)}, {int(hex_color[4:6], 16)}, 0.15)"
-            
-            # Get raw values for this fund
-            total_return_raw = raw_values.loc[fund_name, "_Total_Return_raw"]
-            net_return_raw = raw_values.loc[fund_name, "_Net_Return_raw"]
-            mom_raw = raw_values.loc[fund_name, "_MoM_raw"]
-            
-            styles = []
-            for col in row.index:
-                if col == "Fund":
-                    styles.append("background-color: " + rgba)
-                elif col == "Return [€ (%)]":
-                    bg_color = "background-color: rgba(46, 160, 67, 0.15);" if total_return_raw >= 0 else "background-color: rgba(248, 81, 73, 0.15);"
-                    styles.append(bg_color)
-                elif col == "Net Return [€ (%)]":
-                    bg_color = "background-color: rgba(46, 160, 67, 0.15);" if net_return_raw >= 0 else "background-color: rgba(248, 81, 73, 0.15);"
-                    styles.append(bg_color)
-                elif col == "MoM performance (%)":
-                    bg_color = "background-color: rgba(46, 160, 67, 0.15);" if mom_raw >= 0 else "background-color: rgba(248, 81, 73, 0.15);"
-                    styles.append(bg_color)
-                else:
-                    styles.append("")
-            return styles
+        # Apply color coding: fund hue plus green/red for non-negative/negative returns
+        summary_css = fmt.style_frame(display_summary, {
+            "Fund": fmt.fund_backgrounds(display_summary["Fund"], FUND_COLORS),
+            "Return [€ (%)]": np.where(total_return_raw >= 0, fmt.POSITIVE_BG, fmt.NEGATIVE_BG),
+            "Net Return [€ (%)]": np.where(net_return_raw >= 0, fmt.POSITIVE_BG, fmt.NEGATIVE_BG),
+            "MoM performance (%)": np.where(mom_raw >= 0, fmt.POSITIVE_BG, fmt.NEGATIVE_BG),
+        })
         
-        styled_summary = display_summary.style.apply(style_fund_rows, axis=1)
+        styled_summary = display_summary.style.apply(lambda _: summary_css, axis=None)
         st.dataframe(styled_summary, width="stretch", hide_index=False)
         
         # Totals row
@@ -497,7 +617,6 @@ def overview_and_charts():
         total_gross = summary["Gross Contributions (€)"].sum()
         total_fees = summary["Fees (€)"].sum()
         total_net = summary["Net Invested (€)"].sum()
-        total_quantity = summary["Quantity"].sum()
         total_return = summary["Total Return (€)"].sum()
         total_net_return = summary["Net Return (€)"].sum()
         
@@ -572,6 +691,7 @@ def overview_and_charts():
         st.info("No transactions yet")
 
     # ---------- EVOLUTION OF PORTFOLIO ----------
+    profiling.lap("P&L / MV evolution tables")
     st.divider()
     st.header("📊 Evolution of Portfolio")
     
@@ -579,77 +699,8 @@ def overview_and_charts():
         # Load historical prices for performance calculation
         hist_data = hist_data_global
         if len(hist_data) > 0 and "date" in hist_data.columns:
-            # Prepare historical data in ascending order for calculations
-            hist_asc = hist_data[["date"] + filter_funds].copy()
-            hist_asc["date"] = pd.to_datetime(hist_asc["date"], errors="coerce")
-            hist_asc = hist_asc.dropna(subset=["date"])
-            hist_asc = hist_asc.sort_values("date").reset_index(drop=True)
-
-            # Get transactions sorted by date
-            tx_sorted = transactions.copy()
-            tx_sorted["Date"] = pd.to_datetime(tx_sorted["Date"], errors="coerce")
-            tx_sorted = tx_sorted.dropna(subset=["Date"]).sort_values("Date")
-
-            # Get first transaction date per fund
-            first_tx_date_by_fund = tx_sorted.groupby("Fund")["Date"].min().to_dict()
-
-            # Calculate quantity at t-1 for each date (for P/L calculation)
-            qty_prev_df = pd.DataFrame({"date": hist_asc["date"]})
-
-            for fund in filter_funds:
-                fund_tx = tx_sorted[tx_sorted["Fund"] == fund][["Date", "Quantity"]].copy()
-                if len(fund_tx) == 0:
-                    qty_prev_df[fund] = 0.0
-                    continue
-                fund_tx["cum_qty"] = fund_tx["Quantity"].cumsum()
-                merged = pd.merge_asof(
-                    hist_asc[["date"]],
-                    fund_tx[["Date", "cum_qty"]].sort_values("Date"),
-                    left_on="date",
-                    right_on="Date",
-                    direction="backward",
-                )
-                qty_series = merged["cum_qty"].fillna(0.0)
-                qty_prev_df[fund] = qty_series.shift(1).fillna(0.0)
-
-            # Calculate daily P/L (absolute change in € per fund)
-            pnl_df = hist_asc[["date"]].copy()
-            
-            for fund in filter_funds:
-                price_col = pd.to_numeric(hist_asc[fund], errors="coerce")
-                price_diff = price_col.diff()  # t - t-1 in ascending order
-                qty_prev = qty_prev_df[fund]
-                pnl_df[f"{fund} (€)"] = qty_prev * price_diff
-                pnl_df[f"{fund} (%)"] = (price_diff / price_col.shift(1)) * 100
-
-            # Calculate portfolio P/L (daily total)
-            abs_change_series = pd.DataFrame([pnl_df[f"{f} (€)"] for f in filter_funds]).sum(axis=0)
-            pnl_df["Daily P/L (€)"] = abs_change_series
-            
-            prev_portfolio_value = pd.DataFrame([qty_prev_df[f] * pd.to_numeric(hist_asc[f], errors="coerce").shift(1) for f in filter_funds]).sum(axis=0)
-            pnl_df["Daily P/L (%)"] = (abs_change_series / prev_portfolio_value.replace({0: pd.NA})) * 100
-
-            # Calculate daily Market Value (price * qty at t-1 for yesterday's holdings)
-            mv_df = hist_asc[["date"]].copy()
-            
-            for fund in filter_funds:
-                price_col = pd.to_numeric(hist_asc[fund], errors="coerce")
-                qty_prev = qty_prev_df[fund]
-                # Market value = yesterday's quantity * today's price
-                mv_df[f"{fund} MV (€)"] = qty_prev * price_col
-                # MV change: today's MV - yesterday's MV
-                prev_price = price_col.shift(1)
-                mv_change = (qty_prev * price_col) - (qty_prev * prev_price)
-                mv_pct = (price_col / prev_price - 1) * 100
-                mv_df[f"{fund} MV Δ (€)"] = mv_change
-                mv_df[f"{fund} MV Δ (%)"] = mv_pct
-
-            # Calculate portfolio Market Value
-            total_mv = pd.DataFrame([mv_df[f"{f} MV (€)"] for f in filter_funds]).sum(axis=0)
-            prev_total_mv = total_mv.shift(1)
-            mv_df["Daily MV (€)"] = total_mv
-            mv_df["Daily MV Δ (€)"] = total_mv - prev_total_mv
-            mv_df["Daily MV Δ (%)"] = ((total_mv - prev_total_mv) / prev_total_mv.replace({0: pd.NA})) * 100
+            # Daily P/L and market value per fund, holding yesterday's quantity (graph node, shared frames: read-only)
+            pnl_df, mv_df, first_tx_date_by_fund = get_data_graph().get("pnl_mv", *filter_funds)
 
             # Sort descending by date for display
             pnl_df_display = pnl_df.sort_values("date", ascending=False).reset_index(drop=True)
@@ -658,143 +709,56 @@ def overview_and_charts():
             # ===== PORTFOLIO P/L EVOLUTION TABLE =====
             st.subheader("💹 Portfolio P/L Evolution")
             
-            display_pnl = pnl_df_display[["date"]].copy()
-            display_pnl["Date"] = display_pnl["date"].dt.strftime("%Y-%m-%d")
-            display_pnl = display_pnl.drop(columns=["date"])
+            masked = st.session_state.data_masked
+            pnl_dates = pnl_df_display["date"]
+            display_pnl = pd.DataFrame({"Date": pnl_dates.dt.strftime("%Y-%m-%d")})
+            pnl_styles = {}
             
-            # Get first transaction date for each fund to filter rows
+            # Fund columns show "-" before the fund's first transaction
             for fund in filter_funds:
                 first_date = first_tx_date_by_fund.get(fund)
                 if first_date:
-                    first_date = pd.to_datetime(first_date)
-                    
-                    def fmt_pnl(val, fund_name, hist_asc_local=hist_asc, pnl_df_local=pnl_df, first_date_local=first_date):
-                        if st.session_state.data_masked:
-                            return "***.*€"
-                        if pd.isna(val):
-                            return "-"
-                        sign = "+" if val > 0 else ""
-                        return f"{sign}€{val:.2f}"
-                    
-                    display_pnl[fund] = [
-                        fmt_pnl(pnl_df_display[f"{fund} (€)"].iloc[i], fund) 
-                        if pd.to_datetime(pnl_df_display["date"].iloc[i]) >= first_date else "-"
-                        for i in range(len(pnl_df_display))
-                    ]
+                    held = (pnl_dates >= pd.to_datetime(first_date)).to_numpy()
+                    display_pnl[fund] = np.where(held, fmt.signed_currency(pnl_df_display[f"{fund} (€)"], masked=masked), "-")
+                    pnl_styles[fund] = fmt.sign_styles(pnl_df_display[f"{fund} (€)"], fmt.GAIN_CSS, fmt.LOSS_CSS)
             
             # Add Daily P/L column with special formatting: €value (%)
-            def fmt_daily_pnl(idx):
-                if st.session_state.data_masked:
-                    return "***.*€ (***.*%)"
-                eur = pnl_df_display["Daily P/L (€)"].iloc[idx]
-                pct = pnl_df_display["Daily P/L (%)"].iloc[idx]
-                if pd.isna(eur) or pd.isna(pct):
-                    return "-"
-                eur_sign = "+" if eur > 0 else ""
-                pct_sign = "+" if pct > 0 else ""
-                return f"{eur_sign}€{eur:.2f} ({pct_sign}{pct:.2f}%)"
-            
-            display_pnl["Daily P/L"] = [fmt_daily_pnl(i) for i in range(len(pnl_df_display))]
-            
-            # Style function for P/L table - green for positive, red for negative
-            def style_pnl_table(row):
-                styles = [""] * len(row)
-                idx = row.name
-                
-                # Color each fund column
-                for col_idx, fund in enumerate(filter_funds, start=1):
-                    val = pnl_df_display[f"{fund} (€)"].iloc[idx]
-                    if pd.isna(val) or val == 0:
-                        styles[col_idx] = ""
-                    elif val > 0:
-                        styles[col_idx] = "background-color: rgba(107, 203, 119, 0.15); color: #2d6a3f;"
-                    else:
-                        styles[col_idx] = "background-color: rgba(226, 106, 106, 0.15); color: #8b2e2e;"
-                
-                # Color Daily P/L column
-                daily_pnl_col_idx = len(filter_funds) + 1
-                daily_val = pnl_df_display["Daily P/L (€)"].iloc[idx]
-                if pd.isna(daily_val) or daily_val == 0:
-                    styles[daily_pnl_col_idx] = ""
-                elif daily_val > 0:
-                    styles[daily_pnl_col_idx] = "background-color: rgba(107, 203, 119, 0.15); color: #2d6a3f; font-weight: 600;"
-                else:
-                    styles[daily_pnl_col_idx] = "background-color: rgba(226, 106, 106, 0.15); color: #8b2e2e; font-weight: 600;"
-                
-                return styles
+            display_pnl["Daily P/L"] = fmt.currency_change(pnl_df_display["Daily P/L (€)"], pnl_df_display["Daily P/L (%)"], masked=masked)
+            pnl_styles["Daily P/L"] = fmt.sign_styles(
+                pnl_df_display["Daily P/L (€)"], fmt.GAIN_CSS + " font-weight: 600;", fmt.LOSS_CSS + " font-weight: 600;"
+            )
             
-            styled_pnl = display_pnl.style.apply(style_pnl_table, axis=1)
+            # Green for positive, red for negative; one style frame for the whole table
+            pnl_css = fmt.style_frame(display_pnl, pnl_styles)
+            styled_pnl = display_pnl.style.apply(lambda _: pnl_css, axis=None)
             st.dataframe(styled_pnl, width="stretch", hide_index=True)
             
             # ===== PORTFOLIO MARKET VALUE EVOLUTION TABLE =====
             st.subheader("📈 Portfolio Market Value Evolution")
             
-            display_mv = mv_df_display[["date"]].copy()
-            display_mv["Date"] = display_mv["date"].dt.strftime("%Y-%m-%d")
-            display_mv = display_mv.drop(columns=["date"])
+            mv_dates = mv_df_display["date"]
+            display_mv = pd.DataFrame({"Date": mv_dates.dt.strftime("%Y-%m-%d")})
+            mv_styles = {}
             
             for fund in filter_funds:
                 first_date = first_tx_date_by_fund.get(fund)
                 if first_date:
-                    first_date = pd.to_datetime(first_date)
-                    
-                    def fmt_mv(val, pct_val, fund_name, first_date_local=first_date):
-                        if st.session_state.data_masked:
-                            return "***.*€ (***.*%)"
-                        if pd.isna(val) or pd.isna(pct_val):
-                            return "-"
-                        mv_sign = "+" if val > 0 else ""
-                        pct_sign = "+" if pct_val > 0 else ""
-                        return f"{mv_sign}€{val:.2f} ({pct_sign}{pct_val:.2f}%)"
-                    
-                    display_mv[fund] = [
-                        fmt_mv(mv_df_display[f"{fund} MV Δ (€)"].iloc[i], mv_df_display[f"{fund} MV Δ (%)"].iloc[i], fund)
-                        if pd.to_datetime(mv_df_display["date"].iloc[i]) >= first_date else "-"
-                        for i in range(len(mv_df_display))
-                    ]
+                    held = (mv_dates >= pd.to_datetime(first_date)).to_numpy()
+                    display_mv[fund] = np.where(
+                        held,
+                        fmt.currency_change(mv_df_display[f"{fund} MV Δ (€)"], mv_df_display[f"{fund} MV Δ (%)"], masked=masked),
+                        "-",
+                    )
+                    mv_styles[fund] = fmt.sign_styles(mv_df_display[f"{fund} MV Δ (€)"], fmt.GAIN_CSS, fmt.LOSS_CSS)
             
             # Add Daily MV column
-            def fmt_daily_mv(idx):
-                if st.session_state.data_masked:
-                    return "***.*€ (***.*%)"
-                eur = mv_df_display["Daily MV Δ (€)"].iloc[idx]
-                pct = mv_df_display["Daily MV Δ (%)"].iloc[idx]
-                if pd.isna(eur) or pd.isna(pct):
-                    return "-"
-                eur_sign = "+" if eur > 0 else ""
-                pct_sign = "+" if pct > 0 else ""
-                return f"{eur_sign}€{eur:.2f} ({pct_sign}{pct:.2f}%)"
-            
-            display_mv["Daily MV"] = [fmt_daily_mv(i) for i in range(len(mv_df_display))]
-            
-            # Style function for MV table
-            def style_mv_table(row):
-                styles = [""] * len(row)
-                idx = row.name
-                
-                # Color each fund column
-                for col_idx, fund in enumerate(filter_funds, start=1):
-                    val = mv_df_display[f"{fund} MV Δ (€)"].iloc[idx]
-                    if pd.isna(val) or val == 0:
-                        styles[col_idx] = ""
-                    elif val > 0:
-                        styles[col_idx] = "background-color: rgba(107, 203, 119, 0.15); color: #2d6a3f;"
-                    else:
-                        styles[col_idx] = "background-color: rgba(226, 106, 106, 0.15); color: #8b2e2e;"
-                
-                # Color Daily MV column
-                daily_mv_col_idx = len(filter_funds) + 1
-                daily_val = mv_df_display["Daily MV Δ (€)"].iloc[idx]
-                if pd.isna(daily_val) or daily_val == 0:
-                    styles[daily_mv_col_idx] = ""
-                elif daily_val > 0:
-                    styles[daily_mv_col_idx] = "background-color: rgba(107, 203, 119, 0.15); color: #2d6a3f; font-weight: 600;"
-                else:
-                    styles[daily_mv_col_idx] = "background-color: rgba(226, 106, 106, 0.15); color: #8b2e2e; font-weight: 600;"
-                
-                return styles
+            display_mv["Daily MV"] = fmt.currency_change(mv_df_display["Daily MV Δ (€)"], mv_df_display["Daily MV Δ (%)"], masked=masked)
+            mv_styles["Daily MV"] = fmt.sign_styles(
+                mv_df_display["Daily MV Δ (€)"], fmt.GAIN_CSS + " font-weight: 600;", fmt.LOSS_CSS + " font-weight: 600;"
+            )
             
-            styled_mv = display_mv.style.apply(style_mv_table, axis=1)
+            mv_css = fmt.style_frame(display_mv, mv_styles)
+            styled_mv = display_mv.style.apply(lambda _: mv_css, axis=None)
             st.dataframe(styled_mv, width="stretch", hide_index=True)
             
             # Store these dataframes in session state for use in Portfolio Summary and Revenue P/L
@@ -807,6 +771,7 @@ def overview_and_charts():
 
 
     # ---------- CHARTS ----------
+    profiling.lap("Revenue P&L chart")
     st.divider()
     st.header("📊 Charts")
     
@@ -816,128 +781,145 @@ def overview_and_charts():
         
         # Use the market value evolution data if available
         if "mv_df" in st.session_state and len(st.session_state.mv_df) > 0:
-            mv_df_chart = st.session_state.mv_df.copy()
-            # Sort ascending for cumulative calculations
-            mv_df_chart = mv_df_chart.sort_values("date", ascending=True).reset_index(drop=True)
-            mv_df_chart["date"] = pd.to_datetime(mv_df_chart["date"])
+            def build_revenue_figure():
+                mv_df_chart = st.session_state.mv_df.copy()
+                # Sort ascending for cumulative calculations
+                mv_df_chart = mv_df_chart.sort_values("date", ascending=True).reset_index(drop=True)
+                mv_df_chart["date"] = pd.to_datetime(mv_df_chart["date"])
             
-            # Calculate cumulative market value (starting from first transaction)
-            fig_revenue = go.Figure()
+                # Calculate cumulative market value (starting from first transaction)
+                fig_revenue = go.Figure()
+                fast_charts = st.session_state.fast_charts
+                value_labels = []  # (y, text, color) collected into one text trace in fast mode
             
-            # Get latest date for reference
-            latest_date = mv_df_chart["date"].max()
-            
-            # Add total market value line
-            fig_revenue.add_trace(go.Scatter(
-                x=mv_df_chart["date"],
-                y=mv_df_chart["Daily MV (€)"],
-                mode="lines",
-                name="Portfolio MV",
-                line=dict(color="#667eea", width=3),
-                fill="tozeroy",
-                fillcolor="rgba(102, 126, 234, 0.1)",
-                hovertemplate="<b>Portfolio Market Value</b><br>%{x|%Y-%m-%d}<br>€%{y:,.2f}<extra></extra>"
-            ))
+                # Get latest date for reference
+                latest_date = mv_df_chart["date"].max()
             
-            # Add annotation for last point
-            last_mv = mv_df_chart["Daily MV (€)"].iloc[-1]
-            fig_revenue.add_annotation(
-                x=latest_date,
-                y=last_mv,
-                text=f"€{last_mv:,.0f}",
-                showarrow=False,
-                xanchor="left",
-                xshift=10,
-                font=dict(size=14, color="#667eea"),
-                bordercolor="#667eea",
-                borderwidth=2,
-                borderpad=4,
-                bgcolor="rgba(255,255,255,0)"
-            )
+                # Add total market value line
+                mv_dates = mv_df_chart["date"].to_numpy()
+                total_x, total_y = downsample(mv_dates, mv_df_chart["Daily MV (€)"].to_numpy(), CHART_MAX_POINTS, CHART_DOWNSAMPLE_METHOD)
+                fig_revenue.add_trace(line_trace(
+                    total_x,
+                    total_y,
+                    webgl=fast_charts,
+                    mode="lines",
+                    name="Portfolio MV",
+                    line=dict(color="#667eea", width=3),
+                    fill="tozeroy",
+                    fillcolor="rgba(102, 126, 234, 0.1)",
+                    hovertemplate="<b>Portfolio Market Value</b><br>%{x|%Y-%m-%d}<br>€%{y:,.2f}<extra></extra>"
+                ))
             
-            # Add individual fund lines
-            for fund in filter_funds:
-                fund_col = f"{fund} MV (€)"
-                if fund_col in mv_df_chart.columns:
-                    fig_revenue.add_trace(go.Scatter(
-                        x=mv_df_chart["date"],
-                        y=mv_df_chart[fund_col],
-                        mode="lines",
-                        name=fund,
-                        line=dict(color=FUND_COLORS.get(fund, "#999999"), width=2, dash="dot"),
-                        hovertemplate=f"<b>{fund}</b><br>%{{x|%Y-%m-%d}}<br>€%{{y:,.2f}}<extra></extra>"
-                    ))
-                    
-                    # Add annotation for last point
-                    last_fund_mv = mv_df_chart[fund_col].iloc[-1]
+                # Add annotation for last point
+                last_mv = mv_df_chart["Daily MV (€)"].iloc[-1]
+                if fast_charts:
+                    value_labels.append((last_mv, f"€{last_mv:,.0f}", "#667eea"))
+                else:
                     fig_revenue.add_annotation(
                         x=latest_date,
-                        y=last_fund_mv,
-                        text=f"€{last_fund_mv:,.0f}",
+                        y=last_mv,
+                        text=f"€{last_mv:,.0f}",
                         showarrow=False,
                         xanchor="left",
                         xshift=10,
-                        font=dict(size=13, color=FUND_COLORS.get(fund, "#999999")),
-                        bordercolor=FUND_COLORS.get(fund, "#999999"),
-                        borderwidth=1.5,
+                        font=dict(size=14, color="#667eea"),
+                        bordercolor="#667eea",
+                        borderwidth=2,
                         borderpad=4,
                         bgcolor="rgba(255,255,255,0)"
                     )
             
-            # Calculate y-axis range
-            all_mv_values = [mv_df_chart["Daily MV (€)"].min(), mv_df_chart["Daily MV (€)"].max()]
-            for fund in filter_funds:
-                fund_col = f"{fund} MV (€)"
-                if fund_col in mv_df_chart.columns:
-                    all_mv_values.extend([mv_df_chart[fund_col].min(), mv_df_chart[fund_col].max()])
+                # Add individual fund lines
+                for fund in filter_funds:
+                    fund_col = f"{fund} MV (€)"
+                    if fund_col in mv_df_chart.columns:
+                        fund_x, fund_y = downsample(mv_dates, mv_df_chart[fund_col].to_numpy(), CHART_MAX_POINTS, CHART_DOWNSAMPLE_METHOD)
+                        fig_revenue.add_trace(line_trace(
+                            fund_x,
+                            fund_y,
+                            webgl=fast_charts,
+                            mode="lines",
+                            name=fund,
+                            line=dict(color=FUND_COLORS.get(fund, "#999999"), width=2, dash="dot"),
+                            hovertemplate=f"<b>{fund}</b><br>%{{x|%Y-%m-%d}}<br>€%{{y:,.2f}}<extra></extra>"
+                        ))
+                    
+                        # Add annotation for last point
+                        last_fund_mv = mv_df_chart[fund_col].iloc[-1]
+                        if fast_charts:
+                            value_labels.append((last_fund_mv, f"€{last_fund_mv:,.0f}", FUND_COLORS.get(fund, "#999999")))
+                        else:
+                            fig_revenue.add_annotation(
+                                x=latest_date,
+                                y=last_fund_mv,
+                                text=f"€{last_fund_mv:,.0f}",
+                                showarrow=False,
+                                xanchor="left",
+                                xshift=10,
+                                font=dict(size=13, color=FUND_COLORS.get(fund, "#999999")),
+                                bordercolor=FUND_COLORS.get(fund, "#999999"),
+                                borderwidth=1.5,
+                                borderpad=4,
+                                bgcolor="rgba(255,255,255,0)"
+                            )
             
-            max_mv = max(all_mv_values) if all_mv_values else 1000
-            min_mv = min(all_mv_values) if all_mv_values else 0
-            padding = (max_mv - min_mv) * 0.05
+                if value_labels:
+                    label_y, label_text, label_color = zip(*value_labels)
+                    fig_revenue.add_trace(value_labels_trace([latest_date] * len(value_labels), label_y, label_text, label_color, webgl=True))
             
-            fig_revenue.update_layout(
-                height=600,
-                hovermode="x unified",
-                xaxis_title="",
-                yaxis_title="Market Value (€)",
-                template="plotly_white",
-                showlegend=True,
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                dragmode="pan",
-                uirevision="revenue_pnl",
-                newshape=dict(line_color="#888888"),
-                margin=dict(r=100),
-                yaxis=dict(range=[min_mv - padding, max_mv + padding])
-            )
+                # Calculate y-axis range (5% padding) from the plotted columns, NaN-aware
+                mv_cols = ["Daily MV (€)"] + [f"{fund} MV (€)" for fund in filter_funds if f"{fund} MV (€)" in mv_df_chart.columns]
+                min_mv, max_mv = padded_range((mv_df_chart[col].to_numpy(dtype=float) for col in mv_cols), padding_pct=0.05)
             
-            fig_revenue.update_xaxes(
-                rangeslider=dict(visible=True, thickness=0.07),
-                rangeselector=dict(
-                    buttons=[
-                        dict(count=1, label="1M", step="month", stepmode="backward"),
-                        dict(count=3, label="3M", step="month", stepmode="backward"),
-                        dict(count=6, label="6M", step="month", stepmode="backward"),
-                        dict(count=1, label="YTD", step="year", stepmode="todate"),
-                        dict(count=1, label="1Y", step="year", stepmode="backward"),
-                        dict(step="all", label="All"),
-                    ]
-                ),
-                showspikes=True,
-                spikemode="across",
-                spikesnap="cursor",
-                spikethickness=1,
-                spikecolor="#888888"
-            )
+                fig_revenue.update_layout(
+                    height=600,
+                    hovermode="x unified",
+                    xaxis_title="",
+                    yaxis_title="Market Value (€)",
+                    template="plotly_white",
+                    showlegend=True,
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                    dragmode="pan",
+                    uirevision="revenue_pnl",
+                    newshape=dict(line_color="#888888"),
+                    margin=dict(r=100),
+                    yaxis=dict(range=[min_mv, max_mv])
+                )
             
-            fig_revenue.update_yaxes(
-                rangemode="normal",
-                fixedrange=False,
-                showspikes=True,
-                spikemode="across",
-                zeroline=True,
-                zerolinecolor="rgba(150,150,150,0.5)",
-                zerolinewidth=2,
-            )
+                fig_revenue.update_xaxes(
+                    rangeslider=dict(visible=True, thickness=0.07),
+                    rangeselector=dict(
+                        buttons=[
+                            dict(count=1, label="1M", step="month", stepmode="backward"),
+                            dict(count=3, label="3M", step="month", stepmode="backward"),
+                            dict(count=6, label="6M", step="month", stepmode="backward"),
+                            dict(count=1, label="YTD", step="year", stepmode="todate"),
+                            dict(count=1, label="1Y", step="year", stepmode="backward"),
+                            dict(step="all", label="All"),
+                        ]
+                    ),
+                    showspikes=True,
+                    spikemode="across",
+                    spikesnap="cursor",
+                    spikethickness=1,
+                    spikecolor="#888888"
+                )
+            
+                if fast_charts:
+                    fig_revenue.update_xaxes(type="date", hoverformat="%Y-%m-%d")
+            
+                fig_revenue.update_yaxes(
+                    rangemode="normal",
+                    fixedrange=False,
+                    showspikes=True,
+                    spikemode="across",
+                    zeroline=True,
+                    zerolinecolor="rgba(150,150,150,0.5)",
+                    zerolinewidth=2,
+                )
+                return fig_revenue
+
+            fig_revenue = cached_figure("revenue_pnl", filter_funds, None, None, build_revenue_figure)
             
             st.plotly_chart(fig_revenue, use_container_width=True, config=dict(
                 scrollZoom=True,
@@ -957,6 +939,10 @@ def overview_and_charts():
             st.info("Portfolio Market Value Evolution data not available yet.")
 
     
+@st.fragment
+@profiled_section("Allocation & evolution charts")
+def allocation_charts():
+    """Allocation pies and investment evolution; reruns alone when "Group by" changes."""
     if len(transactions) > 0:
         df = transactions.copy()
         df["invested"] = df["Quantity"] * df["Price (€)"] + df["Fees (€)"]
@@ -964,153 +950,29 @@ def overview_and_charts():
         df["date_dt"] = pd.to_datetime(df["Date"], errors="coerce")
         df = df.dropna(subset=["date_dt"])  
         if len(df) > 0:
-            # Build cumulative Gross Contribution (theor) and market value evolution
-            df_sorted = df.sort_values("date_dt")
-            df_sorted["Gross Contribution (real)"] = df_sorted["Quantity"] * df_sorted["Price (€)"] + df_sorted["Fees (€)"]
-            df_sorted["Gross Contribution (theor)"] = (df_sorted["Gross Contribution (real)"] / 10).round() * 10
-            
-            # Get daily cumulative for all funds combined using (theor) values
-            daily_data = df_sorted.groupby("date_dt").agg({
-                "Gross Contribution (theor)": "sum"
-            }).reset_index()
-            daily_data["Gross Contribution"] = daily_data["Gross Contribution (theor)"].cumsum()
-            daily_data = daily_data.sort_values("date_dt")
-            
-            # Create stair-step data: add points before and after each contribution to create flat line effect
-            stair_dates = []
-            stair_values = []
-            for idx, row in daily_data.iterrows():
-                if idx > 0:
-                    # Add point just before this contribution (at previous value)
-                    prev_value = daily_data.iloc[idx - 1]["Gross Contribution"]
-                    stair_dates.append(row["date_dt"])
-                    stair_values.append(prev_value)
-                # Add point at contribution
-                stair_dates.append(row["date_dt"])
-                stair_values.append(row["Gross Contribution"])
-            
-            stair_df = pd.DataFrame({"date_dt": stair_dates, "Gross Contribution": stair_values})
-            
-            # Calculate market value over time (requires historical data)
-            hist_data = load_historical_prices()
-            market_value_by_date = []
-            if len(hist_data) > 0 and "date" in hist_data.columns:
-                # Get unique dates from historical data (closest available prices)
-                hist_dates = sorted(hist_data["date"].unique())
-                
-                for hist_date in hist_dates:
-                    # Get all transactions up to this historical date
-                    tx_up_to_date = df_sorted[df_sorted["date_dt"] <= hist_date]
-                    if len(tx_up_to_date) == 0:
-                        continue
-                    
-                    # Get market value as of that historical date
-                    mv = 0.0
-                    for fund in tx_up_to_date["Fund"].unique():
-                        fund_tx = tx_up_to_date[tx_up_to_date["Fund"] == fund]
-                        qty = fund_tx["Quantity"].sum()
-                        
-                        # Get price on exact hist_date
-                        if fund in hist_data.columns:
-                            price_row = hist_data[hist_data["date"] == hist_date][fund]
-                            if len(price_row) > 0 and pd.notna(price_row.iloc[0]):
-                                price = price_row.iloc[0]
-                                mv += qty * price
-                    
-                    if mv > 0:
-                        market_value_by_date.append({"date": hist_date, "market_value": mv})
-            
-            market_value_df = pd.DataFrame(market_value_by_date) if market_value_by_date else pd.DataFrame()
-
-            # Extend Gross Contribution line horizontally to latest historical date
-            if len(hist_data) > 0 and "date" in hist_data.columns and len(stair_df) > 0:
-                latest_hist_date = pd.to_datetime(hist_data["date"], errors="coerce").max()
-                latest_stair_date = pd.to_datetime(stair_df["date_dt"], errors="coerce").max()
-                if pd.notna(latest_hist_date) and pd.notna(latest_stair_date) and latest_hist_date > latest_stair_date:
-                    last_value = stair_df["Gross Contribution"].iloc[-1]
-                    stair_df = pd.concat([
-                        stair_df,
-                        pd.DataFrame({"date_dt": [latest_hist_date], "Gross Contribution": [last_value]})
-                    ], ignore_index=True)
-            
             # Create side-by-side layout
             col_pie, col_evolution = st.columns([1, 1.2])
             
             with col_pie:
+                profiling.lap("Allocation pies")
                 st.subheader("💰 Allocation")
                 alloc_by = st.selectbox("Group by:", ["Fund", "Type", "Asset Manager"], key="alloc_selectbox")
 
-                # Colors per category
-                default_type_colors = {
-                    "Bond": "#1f77b4", "Equity": "#ff7f0e", "Mixed": "#2ca02c",
-                    "Commodity": "#d62728", "Alternative": "#9467bd", "Other": "#8c564b"
-                }
-                asset_manager_palette = [
-                    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
-                    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"
-                ]
-
-                # Gross Contributions (left pie)
-                if alloc_by == "Fund":
-                    alloc_gc = df.groupby("Fund")["invested"].sum().reset_index()
-                    alloc_gc = alloc_gc.sort_values("invested", ascending=False)
-                    alloc_gc.columns = ["Category", "Value"]
-                    color_map = {cat: FUND_COLORS.get(cat, "#999999") for cat in alloc_gc["Category"]}
-                elif alloc_by == "Type":
-                    tmp = df.merge(funds[["Fund", "Type"]], on="Fund", how="left")
-                    alloc_gc = tmp.groupby("Type")["invested"].sum().reset_index()
-                    alloc_gc = alloc_gc.sort_values("invested", ascending=False)
-                    alloc_gc.columns = ["Category", "Value"]
-                    color_map = {cat: default_type_colors.get(cat, "#999999") for cat in alloc_gc["Category"]}
-                else:  # Asset Manager
-                    tmp = df.merge(funds[["Fund", "Fund Name"]], on="Fund", how="left")
-                    tmp["Asset Manager"] = tmp["Fund Name"].str.split().str[0]
-                    alloc_gc = tmp.groupby("Asset Manager")["invested"].sum().reset_index()
-                    alloc_gc = alloc_gc.sort_values("invested", ascending=False)
-                    alloc_gc.columns = ["Category", "Value"]
-                    color_map = {}
-                    for idx, cat in enumerate(alloc_gc["Category"].tolist()):
-                        color_map[cat] = asset_manager_palette[idx % len(asset_manager_palette)]
-
-                # Market Value (right pie) based on latest historical prices
-                hist_latest = load_historical_prices()
-                mv_map = {}
-                if len(hist_latest) > 0 and "date" in hist_latest.columns:
-                    latest_d = pd.to_datetime(hist_latest["date"], errors="coerce").max()
-                    # quantities by fund
-                    qty_by_fund = df.groupby("Fund")["Quantity"].sum()
-                    for fund in qty_by_fund.index:
-                        if fund in hist_latest.columns:
-                            price_vals = hist_latest[hist_latest["date"] == latest_d][fund].values
-                            if len(price_vals) > 0 and pd.notna(price_vals[0]):
-                                mv_map[fund] = float(qty_by_fund.loc[fund]) * float(price_vals[0])
-                # Build MV allocation grouped as requested
-                if alloc_by == "Fund":
-                    alloc_mv = pd.DataFrame({"Category": list(mv_map.keys()), "Value": list(mv_map.values())})
-                    alloc_mv = alloc_mv.sort_values("Value", ascending=False)
-                elif alloc_by == "Type":
-                    mv_df = pd.DataFrame({"Fund": list(mv_map.keys()), "MV": list(mv_map.values())})
-                    mv_df = mv_df.merge(funds[["Fund", "Type"]], on="Fund", how="left")
-                    alloc_mv = mv_df.groupby("Type")["MV"].sum().reset_index().rename(columns={"Type": "Category", "MV": "Value"})
-                    alloc_mv = alloc_mv.sort_values("Value", ascending=False)
-                    # ensure color map includes types
-                    for cat in alloc_mv["Category"].tolist():
-                        color_map.setdefault(cat, default_type_colors.get(cat, "#999999"))
-                else:  # Asset Manager
-                    mv_df = pd.DataFrame({"Fund": list(mv_map.keys()), "MV": list(mv_map.values())})
-                    mv_df = mv_df.merge(funds[["Fund", "Fund Name"]], on="Fund", how="left")
-                    mv_df["Asset Manager"] = mv_df["Fund Name"].str.split().str[0]
-                    alloc_mv = mv_df.groupby("Asset Manager")["MV"].sum().reset_index().rename(columns={"Asset Manager": "Category", "MV": "Value"})
-                    alloc_mv = alloc_mv.sort_values("Value", ascending=False)
-                    # ensure color map includes asset managers
-                    next_idx = len(color_map)
-                    for idx, cat in enumerate(alloc_mv["Category"].tolist()):
-                        color_map.setdefault(cat, asset_manager_palette[(next_idx + idx) % len(asset_manager_palette)])
-
-                # Render two pies side by side
-                pie_left, pie_right = st.columns(2)
-                with pie_left:
-                    st.caption("Gross Contributions")
+                def build_allocation_figures():
+                    # One reduction of the cached fund cube gives both pies; funds without a category are left out
+                    cube = get_data_graph().get("allocation_cube")
+                    alloc_gc, alloc_mv = portfolio.allocation_totals(cube, alloc_by)
+
+                    # Colors per category
+                    if alloc_by == "Fund":
+                        color_map = cube.set_index("Fund")["Colour"].to_dict()
+                    elif alloc_by == "Type":
+                        color_map = {cat: ALLOCATION_TYPE_COLORS.get(cat, "#999999") for cat in cube["Type"].dropna().unique()}
+                    else:  # Asset Manager: palette in Gross Contributions order, then any MV-only managers
+                        ordered = list(dict.fromkeys(list(alloc_gc["Category"]) + list(alloc_mv["Category"])))
+                        color_map = {cat: ALLOCATION_PALETTE[idx % len(ALLOCATION_PALETTE)] for idx, cat in enumerate(ordered)}
+
+                    # Gross Contributions (left) and Market Value (right) pies
                     fig_gc = go.Figure(data=[go.Pie(
                         labels=alloc_gc["Category"],
                         values=alloc_gc["Value"],
@@ -1122,10 +984,7 @@ def overview_and_charts():
                         hovertemplate="<b>%{label}</b><br>€%{value:,.2f}<br>%{percent}<extra></extra>"
                     )])
                     fig_gc.update_layout(height=520, showlegend=False, hovermode="closest", font=dict(family="Arial Black"))
-                    st.plotly_chart(fig_gc, use_container_width=True)
 
-                with pie_right:
-                    st.caption("Market Value")
                     fig_mv = go.Figure(data=[go.Pie(
                         labels=alloc_mv["Category"],
                         values=alloc_mv["Value"],
@@ -1137,80 +996,110 @@ def overview_and_charts():
                         hovertemplate="<b>%{label}</b><br>€%{value:,.2f}<br>%{percent}<extra></extra>"
                     )])
                     fig_mv.update_layout(height=520, showlegend=False, hovermode="closest", font=dict(family="Arial Black"))
+
+                    # Unified legend centered below the pies
+                    legend_row_style = "display:flex; justify-content:center; flex-wrap:nowrap; gap:16px; align-items:center; overflow-x:auto; padding:6px 0; border-top:1px solid rgba(150,150,150,.2);"
+                    cats_union = list(dict.fromkeys(list(alloc_gc["Category"]) + list(alloc_mv["Category"])))
+                    alloc_legend = f"<div style='{legend_row_style}'>" + "".join([
+                        f"<div><span style='display:inline-block;width:12px;height:12px;border-radius:2px;background:{color_map.get(cat, '#999999')};border:1px solid rgba(0,0,0,.35);margin-right:6px;vertical-align:middle;'></span>{cat}</div>"
+                        for cat in cats_union
+                    ]) + "</div>"
+                    return fig_gc, fig_mv, alloc_legend
+
+                fig_gc, fig_mv, alloc_legend = cached_figure("allocation", [], None, alloc_by, build_allocation_figures)
+
+                # Render two pies side by side
+                pie_left, pie_right = st.columns(2)
+                with pie_left:
+                    st.caption("Gross Contributions")
+                    st.plotly_chart(fig_gc, use_container_width=True)
+
+                with pie_right:
+                    st.caption("Market Value")
                     st.plotly_chart(fig_mv, use_container_width=True)
 
-                # Unified legend centered below the pies
-                legend_row_style = "display:flex; justify-content:center; flex-wrap:nowrap; gap:16px; align-items:center; overflow-x:auto; padding:6px 0; border-top:1px solid rgba(150,150,150,.2);"
-                cats_union = list(dict.fromkeys(list(alloc_gc["Category"]) + list(alloc_mv["Category"])))
-                alloc_legend = f"<div style='{legend_row_style}'>" + "".join([
-                    f"<div><span style='display:inline-block;width:12px;height:12px;border-radius:2px;background:{color_map.get(cat, '#999999')};border:1px solid rgba(0,0,0,.35);margin-right:6px;vertical-align:middle;'></span>{cat}</div>"
-                    for cat in cats_union
-                ]) + "</div>"
                 st.markdown(alloc_legend, unsafe_allow_html=True)
             
             with col_evolution:
+                profiling.lap("Investment evolution")
                 st.subheader("📈 Investment Evolution")
-                fig_evolution = go.Figure()
-                
-                # Stair-step gross contribution with always-visible hover
-                fig_evolution.add_trace(go.Scatter(
-                    x=stair_df["date_dt"],
-                    y=stair_df["Gross Contribution"],
-                    mode="lines",
-                    name="Gross Contribution",
-                    line=dict(color="#667eea", width=2.5),
-                    hovertemplate="<b>%{x|%Y-%m-%d}</b><br>€%{y:,.2f}<extra></extra>",
-                    fill="tozeroy",
-                    fillcolor="rgba(102, 126, 234, 0.1)",
-                ))
+
+                def build_evolution_figure():
+                    # Cumulative Gross Contribution (theor) stair line and market value on every price date
+                    tx_dated = df.assign(Date=df["date_dt"])
+                    hist_data = load_historical_prices()
+                    if len(hist_data) > 0 and "date" in hist_data.columns:
+                        stair_df = portfolio.contribution_steps(tx_dated, until=pd.to_datetime(hist_data["date"], errors="coerce").max())
+                        market_value_df = portfolio.market_value_history(tx_dated, hist_data)
+                    else:
+                        stair_df = portfolio.contribution_steps(tx_dated)
+                        market_value_df = pd.DataFrame()
+
+                    fig_evolution = go.Figure()
                 
-                # Market value overlay
-                if len(market_value_df) > 0:
+                    # Stair-step gross contribution with always-visible hover
                     fig_evolution.add_trace(go.Scatter(
-                        x=market_value_df["date"],
-                        y=market_value_df["market_value"],
+                        x=stair_df["date_dt"],
+                        y=stair_df["Gross Contribution"],
                         mode="lines",
-                        name="Market Value",
-                        line=dict(color="#f093fb", width=2.5),
+                        name="Gross Contribution",
+                        line=dict(color="#667eea", width=2.5),
                         hovertemplate="<b>%{x|%Y-%m-%d}</b><br>€%{y:,.2f}<extra></extra>",
+                        fill="tozeroy",
+                        fillcolor="rgba(102, 126, 234, 0.1)",
                     ))
                 
-                fig_evolution.update_layout(
-                    height=520,
-                    hovermode="x unified",
-                    xaxis_title="",
-                    yaxis_title="Value (€)",
-                    template="plotly_white",
-                    showlegend=False,
-                    dragmode="pan",
-                    uirevision="overview_evolution",
-                    newshape=dict(line_color="#888888"),
-                )
-                fig_evolution.update_xaxes(
-                    rangeslider=dict(visible=True, thickness=0.07),
-                    rangeselector=dict(
-                        buttons=[
-                            dict(count=1, label="1M", step="month", stepmode="backward"),
-                            dict(count=3, label="3M", step="month", stepmode="backward"),
-                            dict(count=6, label="6M", step="month", stepmode="backward"),
-                            dict(count=1, label="YTD", step="year", stepmode="todate"),
-                            dict(count=1, label="1Y", step="year", stepmode="backward"),
-                            dict(step="all", label="All"),
-                        ]
-                    ),
-                    showspikes=True,
-                    spikemode="across",
-                    spikesnap="cursor",
-                    spikethickness=1,
-                    spikecolor="#888888",
-                )
-                fig_evolution.update_yaxes(
-                    autorange=True,
-                    rangemode="normal",
-                    fixedrange=False,
-                    showspikes=True,
-                    spikemode="across",
-                )
+                    # Market value overlay
+                    if len(market_value_df) > 0:
+                        fig_evolution.add_trace(go.Scatter(
+                            x=market_value_df["date"],
+                            y=market_value_df["market_value"],
+                            mode="lines",
+                            name="Market Value",
+                            line=dict(color="#f093fb", width=2.5),
+                            hovertemplate="<b>%{x|%Y-%m-%d}</b><br>€%{y:,.2f}<extra></extra>",
+                        ))
+                
+                    fig_evolution.update_layout(
+                        height=520,
+                        hovermode="x unified",
+                        xaxis_title="",
+                        yaxis_title="Value (€)",
+                        template="plotly_white",
+                        showlegend=False,
+                        dragmode="pan",
+                        uirevision="overview_evolution",
+                        newshape=dict(line_color="#888888"),
+                    )
+                    fig_evolution.update_xaxes(
+                        rangeslider=dict(visible=True, thickness=0.07),
+                        rangeselector=dict(
+                            buttons=[
+                                dict(count=1, label="1M", step="month", stepmode="backward"),
+                                dict(count=3, label="3M", step="month", stepmode="backward"),
+                                dict(count=6, label="6M", step="month", stepmode="backward"),
+                                dict(count=1, label="YTD", step="year", stepmode="todate"),
+                                dict(count=1, label="1Y", step="year", stepmode="backward"),
+                                dict(step="all", label="All"),
+                            ]
+                        ),
+                        showspikes=True,
+                        spikemode="across",
+                        spikesnap="cursor",
+                        spikethickness=1,
+                        spikecolor="#888888",
+                    )
+                    fig_evolution.update_yaxes(
+                        autorange=True,
+                        rangemode="normal",
+                        fixedrange=False,
+                        showspikes=True,
+                        spikemode="across",
+                    )
+                    return fig_evolution
+
+                fig_evolution = cached_figure("investment_evolution", [], None, None, build_evolution_figure, depends=("transactions", HISTORICAL_FILE))
+
                 
                 st.plotly_chart(
                     fig_evolution,
@@ -1248,57 +1137,20 @@ def evolution_of_portfolio():
     st.header("📊 Evolution of Portfolio")
     st.info("Evolution of Portfolio page coming soon - detailed P/L and Market Value tracking with filters and totals.")
 
+@profiled_section("Transaction History")
 def transaction_history():
     st.header("📜 Transaction History")
-    
+    transaction_table()
+
+@st.fragment
+@profiled_section("Transaction table")
+def transaction_table():
+    """Fund/date filters, transaction table and totals; reruns alone on filter changes."""
+    profiling.lap("Filters")
     # Fund filter buttons (use global filter)
     # (global filter `st.session_state.fund_filter` is initialized at app start)
     
-    if len(funds) > 0:
-        st.markdown("**Filter by Fund:**")
-        
-        # Generate custom CSS for fund buttons
-        fund_button_css = "<style>"
-        for fund in funds["Fund"].tolist():
-            hex_color = FUND_COLORS.get(fund, "#999999")
-            # Convert hex to rgb
-            if hex_color.startswith('#'):
-                hex_color = hex_color[1:]
-            r, g, b = int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
-            fund_button_css += f"""
-            button[data-testid="baseButton-primary"][aria-label="{fund}"] {{
-                background-color: rgba(200, 200, 200, 0.8) !important;
-                border: none !important;
-                color: rgb({r}, {g}, {b}) !important;
-                font-weight: 600 !important;
-            }}
-            """
-        fund_button_css += "</style>"
-        st.markdown(fund_button_css, unsafe_allow_html=True)
-        
-        # Create columns for all buttons (fund buttons + reset button)
-        num_cols = len(funds["Fund"].tolist()) + 1
-        cols = st.columns(num_cols)
-        
-        for idx, fund in enumerate(funds["Fund"].tolist()):
-            with cols[idx]:
-                is_active = fund in st.session_state.fund_filter
-                hex_color = FUND_COLORS.get(fund, "#999999")
-                if st.button(fund, key=f"fund_btn_{fund}", type="primary" if is_active else "secondary", width="stretch"):
-                    if is_active:
-                        st.session_state.fund_filter.remove(fund)
-                    else:
-                        st.session_state.fund_filter.append(fund)
-                    st.rerun()
-        
-        # Reset button in last column
-        with cols[-1]:
-            if st.button("✕", key="reset_fund_filters", help="Reset filters", width="stretch"):
-                st.session_state.fund_filter = funds["Fund"].tolist()
-                st.rerun()
-        filter_funds = st.session_state.fund_filter
-    else:
-        filter_funds = []
+    filter_funds = fund_filter_buttons(funds["Fund"].tolist())
     
     # Date filters
     col1, col2 = st.columns(2)
@@ -1326,27 +1178,20 @@ def transaction_history():
         start_date = st.session_state.trans_start_date_input
     
     if len(transactions) > 0:
-        trans_df = transactions.copy()
-        trans_df["Date"] = pd.to_datetime(trans_df["Date"], errors="coerce")
-        
-        # Apply filters
+        profiling.lap("Reconcile & format table")
+        # Apply filters: date window by binary search on the sorted store, then funds
+        trans_df = get_transaction_store().between(start_date or None, end_date or None)
         if filter_funds:
             trans_df = trans_df[trans_df["Fund"].isin(filter_funds)]
-        if start_date:
-            trans_df = trans_df[trans_df["Date"] >= pd.to_datetime(start_date)]
-        if end_date:
-            trans_df = trans_df[trans_df["Date"] <= pd.to_datetime(end_date)]
         
-        trans_df = trans_df.sort_values("Date", ascending=False)
+        trans_df = trans_df.sort_values("Date", ascending=False).reset_index(drop=True)
         
         # Calculate derived fields
         trans_df["Reference Period"] = trans_df["Date"].dt.strftime("%Y %b")
-        trans_df["Gross Contribution (real)"] = trans_df["Quantity"] * trans_df["Price (€)"] + trans_df["Fees (€)"]
-        trans_df["Gross Contribution (theor)"] = (trans_df["Gross Contribution (real)"] / 10).round() * 10
-        trans_df["Net Invested"] = trans_df["Quantity"] * trans_df["Price (€)"]
-        trans_df["Δ Net Inv vs Exp"] = trans_df["Net Invested"] - trans_df["Gross Contribution (theor)"] + trans_df["Fees (€)"]
-        trans_df["Quantity (theor)"] = (trans_df["Gross Contribution (theor)"] - trans_df["Fees (€)"]) / trans_df["Price (€)"]
-        trans_df["Δ Quantity"] = trans_df["Quantity"] - trans_df["Quantity (theor)"]
+        # Planned-vs-actual columns; Δ Quantity also at the fund's display precision (per-fund decimals cached with the store)
+        fund_qty_decimals = get_transaction_store().quantity_decimals
+        trans_df = portfolio.reconcile_transactions(trans_df, fund_qty_decimals)
+        qty_dp = trans_df["Fund"].map(fund_qty_decimals).fillna(3).astype(int).to_numpy()
         trans_df["Date_str"] = trans_df["Date"].dt.strftime("%Y-%m-%d")
         
         # Select and reorder columns for display
@@ -1377,79 +1222,28 @@ def transaction_history():
             "Δ Quantity",
         ]
         
-        # Determine per-fund decimal precision based on all transactions' Quantity
-        def _count_decimals(num):
-            if pd.isna(num):
-                return 0
-            s = f"{float(num):.6f}".rstrip('0').rstrip('.')
-            if '.' in s:
-                return min(len(s.split('.')[-1]), 6)
-            return 0
-        try:
-            fund_qty_decimals = (
-                transactions.groupby("Fund")["Quantity"].apply(
-                    lambda s: max((_count_decimals(v) for v in s if pd.notna(v)), default=0)
-                ).to_dict()
-            )
-        except Exception:
-            fund_qty_decimals = {}
-        # Cap decimals to max 3
-        fund_qty_decimals = {f: min(int(d or 0), 3) for f, d in fund_qty_decimals.items()}
-        
         # Preserve raw numeric values
         display_df["_delta_net_inv_raw"] = trans_df["Δ Net Inv vs Exp"].values
         display_df["_delta_qty_raw"] = trans_df["Δ Quantity"].values
 
         # Rounded/display deltas for styling (use same precision as shown)
-        def format_delta_net_inv(val):
-            if pd.isna(val):
-                return None
-            rounded = round(val, 2)
-            return 0.0 if abs(rounded) < 0.005 else rounded
-
-        def format_delta_qty(row):
-            dq = row["_delta_qty_raw"]
-            if pd.isna(dq):
-                return None
-            dp = fund_qty_decimals.get(row["Fund"], 3)
-            rounded = round(dq, dp)
-            return 0.0 if abs(rounded) < 10 ** (-dp) else rounded
-
-        display_df["_delta_net_inv_disp"] = display_df["_delta_net_inv_raw"].apply(format_delta_net_inv)
-        display_df["_delta_qty_disp"] = display_df.apply(format_delta_qty, axis=1)
-        
-        # Quantity formatting function: max 3 decimals, no trailing zeros
-        def format_qty(val):
-            if pd.isna(val):
-                return ""
-            # Round to 3 decimals
-            rounded = round(val, 3)
-            # Format and remove trailing zeros
-            if rounded == int(rounded):
-                return str(int(rounded))
-            return f"{rounded:.3f}".rstrip('0').rstrip('.')
+        display_df["_delta_net_inv_disp"] = fmt.round_to(display_df["_delta_net_inv_raw"], 2)
+        display_df["_delta_qty_disp"] = trans_df["Δ Quantity (rounded)"].values
         
         # Combine Net Invested with delta
-        display_df["Net Invested (Δ vs Exp)"] = display_df.apply(
-            lambda row: f"{row['Net Invested']:.2f} ({row['_delta_net_inv_raw']:+.2f})" if pd.notna(row['_delta_net_inv_raw']) else f"{row['Net Invested']:.2f}",
-            axis=1
+        display_df["Net Invested (Δ vs Exp)"] = fmt.with_note(
+            fmt.number(display_df["Net Invested"], ".2f"),
+            fmt.number(display_df["_delta_net_inv_raw"], "+.2f"),
         )
         
         # Combine Quantity (theor) with delta - decimals based on fund usage
-        def format_qty_calc(row):
-            dp = fund_qty_decimals.get(row["Fund"], 3)
-            q = row["Quantity (theor)"]
-            dq = row["_delta_qty_raw"]
-            q_str = "" if pd.isna(q) else f"{round(q, dp):.{dp}f}"
-            if pd.notna(dq):
-                dq_str = f" ({round(dq, dp):+.{dp}f})"
-            else:
-                dq_str = ""
-            return q_str + dq_str
-        display_df["Quantity (theor) (Δ vs Q real)"] = display_df.apply(format_qty_calc, axis=1)
+        display_df["Quantity (theor) (Δ vs Q real)"] = fmt.with_note(
+            fmt.quantity(display_df["Quantity (theor)"], qty_dp, strip=False),
+            fmt.signed_quantity(display_df["_delta_qty_raw"], qty_dp),
+        )
         
-        # Format Quantity column with flexible decimals
-        display_df["Quantity"] = display_df["Quantity"].apply(format_qty)
+        # Format Quantity column: max 3 decimals, no trailing zeros
+        display_df["Quantity"] = fmt.quantity(display_df["Quantity"], 3)
 
         # Drop calculation columns
         display_df = display_df.drop(columns=["Net Invested", "Δ Net Inv vs Exp", "Quantity (theor)", "Δ Quantity"])
@@ -1457,43 +1251,17 @@ def transaction_history():
         # Add fund column for styling
         display_df["_fund_type"] = trans_df["Fund"].values
         
-        # Create styled dataframe with hue for Fund and deltas
-        def style_fund_rows(row):
-            fund_type = row["_fund_type"]
-            hex_color = FUND_COLORS.get(fund_type, "#000000")
-            # Convert hex to rgba with light alpha
-            if hex_color.startswith('#'):
-                hex_color = hex_color[1:]
-            fund_rgba = f"rgba({int(hex_color[0:2], 16)}, {int(hex_color[2:4], 16)}, {int(hex_color[4:6], 16)}, 0.15)"
-            green_rgba = "rgba(46, 160, 67, 0.12)"
-            red_rgba = "rgba(248, 81, 73, 0.12)"
-            styles = []
-            for col in row.index:
-                if col.startswith("_"):
-                    styles.append("display: none;")
-                elif col == "Fund":
-                    styles.append("background-color: " + fund_rgba)
-                elif col == "Net Invested (Δ vs Exp)":
-                    delta_val = row.get("_delta_net_inv_disp", None)
-                    if delta_val is None or delta_val == 0:
-                        styles.append("")
-                    elif delta_val > 0:
-                        styles.append("background-color: " + green_rgba)
-                    else:
-                        styles.append("background-color: " + red_rgba)
-                elif col == "Quantity (theor) (Δ vs Q real)":
-                    delta_val = row.get("_delta_qty_disp", None)
-                    if delta_val is None or delta_val == 0:
-                        styles.append("")
-                    elif delta_val > 0:
-                        styles.append("background-color: " + green_rgba)
-                    else:
-                        styles.append("background-color: " + red_rgba)
-                else:
-                    styles.append("")
-            return styles
+        # Hue for Fund and green/red for deltas, built as one style frame
+        green_rgba = "background-color: rgba(46, 160, 67, 0.12)"
+        red_rgba = "background-color: rgba(248, 81, 73, 0.12)"
+        trans_css = fmt.style_frame(display_df, {
+            "Fund": fmt.fund_backgrounds(display_df["_fund_type"], FUND_COLORS),
+            "Net Invested (Δ vs Exp)": fmt.sign_styles(display_df["_delta_net_inv_disp"], green_rgba, red_rgba),
+            "Quantity (theor) (Δ vs Q real)": fmt.sign_styles(display_df["_delta_qty_disp"], green_rgba, red_rgba),
+            **{col: "display: none;" for col in display_df.columns if col.startswith("_")},
+        })
         
-        styled_df = display_df.style.apply(style_fund_rows, axis=1)
+        styled_df = display_df.style.apply(lambda _: trans_css, axis=None)
         
         # Display interactive dataframe with sorting and filtering
         st.dataframe(styled_df, width="stretch", hide_index=True, column_config={
@@ -1515,6 +1283,7 @@ def transaction_history():
         """, unsafe_allow_html=True)
         
         # Totals row
+        profiling.lap("Totals")
         st.markdown("")
         st.markdown("**Totals (based on filters):**")
         # Calculate totals
@@ -1534,26 +1303,8 @@ def transaction_history():
         pl_qty_approx_now = 0.0
 
         if len(hist_data) > 0 and "date" in hist_data.columns:
-            # Use global last_date_str and latest date
-            latest_date = pd.to_datetime(hist_data["date"]).max()
-            # For each transaction: delta_qty * row_price and delta_qty * latest_price
-            for _, row in trans_df.iterrows():
-                fund = row["Fund"]
-                delta_qty_raw = row["Δ Quantity"]
-                row_price = row["Price (€)"]
-                # Use displayed precision for delta qty (per fund)
-                dp = fund_qty_decimals.get(fund, 3)
-                delta_qty = round(delta_qty_raw, dp) if pd.notna(delta_qty_raw) else None
-                if delta_qty is not None and abs(delta_qty) < 10 ** (-dp):
-                    delta_qty = 0.0
-                if pd.notna(delta_qty):
-                    # Main calculation: delta_qty * row_price
-                    pl_qty_approx += delta_qty * row_price
-                    # Now calculation: delta_qty * latest_price
-                    if fund in hist_data.columns:
-                        latest_price = hist_data[hist_data["date"] == latest_date][fund].values
-                        if len(latest_price) > 0 and pd.notna(latest_price[0]):
-                            pl_qty_approx_now += delta_qty * latest_price[0]
+            # Displayed-precision delta qty * transaction price, and * latest price
+            pl_qty_approx, pl_qty_approx_now = portfolio.pl_quantity_approx(trans_df, get_price_store().latest_prices())
 
         # Count number of contributions (transactions)
         num_contributions = len(trans_df)
@@ -1592,24 +1343,12 @@ def active_funds():
         display_funds["_fund_type"] = funds["Fund"].values
         
         # Apply color styling
-        def style_fund_rows(row):
-            fund_type = row["_fund_type"]
-            hex_color = FUND_COLORS.get(fund_type, "#000000")
-            if hex_color.startswith('#'):
-                hex_color = hex_color[1:]
-            rgba = f"rgba({int(hex_color[0:2], 16)}, {int(hex_color[2:4], 16)}, {int(hex_color[4:6], 16)}, 0.15)"
-            
-            styles = []
-            for col in row.index:
-                if col == "Fund":
-                    styles.append("background-color: " + rgba)
-                elif col == "_fund_type":
-                    styles.append("display: none;")
-                else:
-                    styles.append("")
-            return styles
+        funds_css = fmt.style_frame(display_funds, {
+            "Fund": fmt.fund_backgrounds(display_funds["_fund_type"], FUND_COLORS),
+            "_fund_type": "display: none;",
+        })
         
-        styled_funds = display_funds.style.apply(style_fund_rows, axis=1)
+        styled_funds = display_funds.style.apply(lambda _: funds_css, axis=None)
         
         st.dataframe(styled_funds, width="stretch", hide_index=True, column_config={
             "_fund_type": None  # Hide the column
@@ -1617,68 +1356,36 @@ def active_funds():
     else:
         st.info("No funds added yet")
 
+@profiled_section("Historical Data")
 def historical_prices():
     st.header("📈 Historical Data Charts")
     
-    # Helper function to calculate y-axis range with padding
-    def calculate_y_axis_range_with_padding(traces, padding_pct=0.01):
-        """Calculate y-axis range with specified padding percentage."""
-        all_y_values = []
-        for trace in traces:
-            if hasattr(trace, 'y') and trace.y is not None:
-                all_y_values.extend([y for y in trace.y if y is not None])
-        
-        if all_y_values:
-            y_min = min(all_y_values)
-            y_max = max(all_y_values)
-            y_range_size = y_max - y_min
-            
-            # Handle edge case where all values are identical
-            if y_range_size == 0:
-                # Use a small percentage of the value itself as padding
-                padding = abs(y_min) * padding_pct if y_min != 0 else 1.0
-            else:
-                padding = y_range_size * padding_pct
-            
-            return y_min - padding, y_max + padding
-        return None, None
-    
-    # Helper function to create price annotation
-    def create_price_annotation(price, fund):
-        """Create a standardized price annotation for a fund."""
-        return dict(
-            x=0,
-            y=price,
-            xref="paper",
-            yref="y",
-            text=f"€{price:,.2f}",
-            showarrow=False,
-            xanchor="right",
-            xshift=-5,
-            font=dict(size=9, color=FUND_COLORS.get(fund, "#999999")),
-            bgcolor="rgba(255,255,255,0.8)",
-            bordercolor=FUND_COLORS.get(fund, "#999999"),
-            borderwidth=1,
-            borderpad=2,
-        )
-    
     # Initialize session state for refresh
     if "force_refresh" not in st.session_state:
         st.session_state.force_refresh = False
     
-    # Refresh button (reload CSV only)
-    if st.button("🔄 Reload Cached Data", help="Reload historical_data.csv from disk"):
+    # Refresh button: fetch the latest committed prices when live refresh is on, then reload the CSV
+    reload_help = "Fetch the latest historical_data.csv from the repository and reload it" if price_refresher else "Reload historical_data.csv from disk"
+    if st.button("🔄 Reload Cached Data", help=reload_help):
         st.session_state.force_refresh = True
-        st.cache_data.clear()
+        if price_refresher is not None:
+            price_refresher.check()
+        invalidate_caches(HISTORICAL_FILE)
         st.rerun()
+    if price_refresher is not None and price_refresher.last_checked:
+        updated = f", last updated {datetime.fromtimestamp(price_refresher.last_updated):%H:%M}" if price_refresher.last_updated else ""
+        error = f" ({price_refresher.last_error})" if price_refresher.last_error else ""
+        st.caption(f"Prices checked {datetime.fromtimestamp(price_refresher.last_checked):%H:%M}{updated}{error}")
     
     # Show loading message
     if st.session_state.force_refresh:
         st.info("🔄 Reloading cached CSV...")
         st.session_state.force_refresh = False
     
+    profiling.lap("Load prices")
     with st.spinner("Loading historical price data..."):
-        hist_df = load_historical_prices()
+        price_store = get_price_store()
+        hist_df = price_store.frame if price_store is not None else pd.DataFrame()
     
     if len(hist_df) == 0:
         st.error("⚠️ No historical data available.")
@@ -1714,66 +1421,50 @@ def historical_prices():
             pass
 
     # Ensure only known funds and date
-    # Reload funds to catch any updates to funds.csv
-    funds_fresh = pd.read_csv(FUNDS_FILE) if os.path.exists(FUNDS_FILE) else funds
+    # Current funds.csv (re-read only if it changed since this run started)
+    funds_fresh = get_data_graph().get("funds")
     fund_cols = [c for c in hist_df.columns if c in funds_fresh["Fund"].tolist()]
-    hist_df_display = hist_df[["date"] + fund_cols].copy()
-    hist_df_display["date"] = pd.to_datetime(hist_df_display["date"]) 
 
-    # Fund filter buttons (use global filter)
     if "hist_view_mode" not in st.session_state:
         st.session_state.hist_view_mode = "grid"
 
-    if len(fund_cols) > 0:
-        st.markdown("**Filter by Fund:**")
-        fund_button_css = "<style>"
-        for fund in fund_cols:
-            hex_color = FUND_COLORS.get(fund, "#999999")
-            if hex_color.startswith('#'):
-                hex_color = hex_color[1:]
-            r, g, b = int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
-            fund_button_css += f"""
-            button[data-testid=\"baseButton-primary\"][aria-label=\"{fund}\"] {{
-                background-color: rgba(200, 200, 200, 0.8) !important;
-                border: none !important;
-                color: rgb({r}, {g}, {b}) !important;
-                font-weight: 600 !important;
-            }}
-            """
-        fund_button_css += "</style>"
-        st.markdown(fund_button_css, unsafe_allow_html=True)
-
-        num_cols = len(fund_cols) + 1
-        cols = st.columns(num_cols)
-        for idx, fund in enumerate(fund_cols):
-            with cols[idx]:
-                is_active = fund in st.session_state.fund_filter
-                if st.button(fund, key=f"fund_btn_{fund}", type="primary" if is_active else "secondary", width="stretch"):
-                    if is_active:
-                        st.session_state.fund_filter.remove(fund)
-                    else:
-                        st.session_state.fund_filter.append(fund)
-                    st.rerun()
-        with cols[-1]:
-            if st.button("✕", key="reset_fund_filters", help="Reset filters", width="stretch"):
-                st.session_state.fund_filter = fund_cols
-                st.rerun()
-        selected_funds = [f for f in st.session_state.fund_filter if f in fund_cols]
-    else:
-        selected_funds = []
+    profiling.lap("Charts & table")
+    historical_view(price_store, fund_cols)
+
+# Helper function to create price annotation
+def create_price_annotation(price, fund):
+    """Create a standardized price annotation for a fund."""
+    return dict(
+        x=0,
+        y=price,
+        xref="paper",
+        yref="y",
+        text=f"€{price:,.2f}",
+        showarrow=False,
+        xanchor="right",
+        xshift=-5,
+        font=dict(size=9, color=FUND_COLORS.get(fund, "#999999")),
+        bgcolor="rgba(255,255,255,0.8)",
+        bordercolor=FUND_COLORS.get(fund, "#999999"),
+        borderwidth=1,
+        borderpad=2,
+    )
+
+@st.fragment
+@profiled_section("Historical view")
+def historical_view(price_store, fund_cols):
+    """Fund filter, date range, view toggle, charts and table; reruns without reloading prices."""
+    profiling.lap("Filters")
+
+    # Fund filter buttons (use global filter)
+    selected_funds = fund_filter_buttons(fund_cols)
 
     # Date range filters + controls
     col1, col2, col3 = st.columns([2, 2, 1.5])
+    default_start, max_d = default_date_range(price_store)
     with col1:
-        min_d = hist_df_display["date"].min().date()
-        # Set default start date to October 1, 2024
-        default_start = date(2024, 10, 1)
-        # Use the later of October 1, 2024 or the minimum date in the data
-        if min_d > default_start:
-            default_start = min_d
         start_d = st.date_input("Start", value=default_start, key="hist_start_date")
     with col2:
-        max_d = hist_df_display["date"].max().date()
         end_d = st.date_input("End", value=max_d, key="hist_end_date")
     with col3:
         st.markdown("")
@@ -1781,137 +1472,149 @@ def historical_prices():
         use_combined = st.toggle(view_label, value=(st.session_state.hist_view_mode == "combined"), key="hist_view_toggle")
         st.session_state.hist_view_mode = "combined" if use_combined else "grid"
 
-    plot_df = hist_df_display[(hist_df_display["date"] >= pd.to_datetime(start_d)) & (hist_df_display["date"] <= pd.to_datetime(end_d))]
+    plot_df = price_store.between(start_d, end_d, columns=["date"] + fund_cols)
     if not selected_funds:
         st.info("Select at least one fund")
         return
 
-    # Compute average NAV per fund within selected date range (transaction history)
-    avg_nav_by_fund = {}
-    tx_range = transactions.copy()
-    tx_range["Date"] = pd.to_datetime(tx_range.get("Date"), errors="coerce")
-    tx_range = tx_range.dropna(subset=["Date"])
-    tx_range = tx_range[(tx_range["Date"] >= pd.to_datetime(start_d)) & (tx_range["Date"] <= pd.to_datetime(end_d))]
-    if len(tx_range) > 0:
-        tx_range["Gross Contribution"] = tx_range["Quantity"] * tx_range["Price (€)"] + tx_range["Fees (€)"]
-        grouped = tx_range.groupby("Fund").agg({"Gross Contribution": "sum", "Quantity": "sum"})
-        for fund, row in grouped.iterrows():
-            qty = row["Quantity"]
-            if qty and qty != 0:
-                avg_nav_by_fund[fund] = row["Gross Contribution"] / qty
+    # Average NAV per fund within selected date range, from the store's prefix sums
+    avg_nav_by_fund = portfolio.avg_nav_by_fund(get_transaction_store(), selected_funds, start_d, end_d)
+
+    fast_charts = st.session_state.fast_charts
 
+    profiling.lap(f"{st.session_state.hist_view_mode.capitalize()} charts")
     # Combined view
     if st.session_state.hist_view_mode == "combined":
-        fig_combined = go.Figure()
-        latest_prices = {}  # Collect latest prices for each fund
+        def build_combined_figure():
+            fig_combined = go.Figure()
+            latest_prices = {}  # Collect latest prices for each fund
+            fund_series = {}  # Per-fund price series (plot_df is already date-sorted)
         
-        for fund in selected_funds:
-            fund_df = plot_df[["date", fund]].dropna().sort_values("date")
-            if len(fund_df) == 0:
-                continue
+            for fund in selected_funds:
+                fund_df = plot_df[["date", fund]].dropna()
+                if len(fund_df) == 0:
+                    continue
+                fund_series[fund] = fund_df
             
-            # Get the latest price for this fund
-            latest_price = fund_df[fund].iloc[-1]
-            latest_prices[fund] = latest_price
+                # Get the latest price for this fund
+                latest_price = fund_df[fund].iloc[-1]
+                latest_prices[fund] = latest_price
             
-            fig_combined.add_trace(
-                go.Scatter(
-                    x=fund_df["date"],
-                    y=fund_df[fund],
-                    mode="lines",
-                    name=fund,
-                    line=dict(color=FUND_COLORS.get(fund, "#999999"), width=2),
-                    hovertemplate="<b>%{x|%Y-%m-%d}</b><br>€%{y:,.2f}<extra></extra>",
-                )
-            )
-
-            # Average NAV line for this fund
-            if fund in avg_nav_by_fund:
+                trace_x, trace_y = get_data_graph().get("price_trace", fund, start_d, end_d, CHART_MAX_POINTS)
                 fig_combined.add_trace(
-                    go.Scatter(
-                        x=[fund_df["date"].min(), fund_df["date"].max()],
-                        y=[avg_nav_by_fund[fund], avg_nav_by_fund[fund]],
+                    line_trace(
+                        trace_x,
+                        trace_y,
+                        webgl=fast_charts,
                         mode="lines",
-                        name=f"{fund} Avg NAV",
-                        line=dict(color=FUND_COLORS.get(fund, "#999999"), dash="dash", width=1.5),
-                        hovertemplate=f"<b>{fund} Avg NAV</b><br>€%{{y:,.2f}}<extra></extra>",
-                        showlegend=True,
+                        name=fund,
+                        line=dict(color=FUND_COLORS.get(fund, "#999999"), width=2),
+                        hovertemplate="<b>%{x|%Y-%m-%d}</b><br>€%{y:,.2f}<extra></extra>",
                     )
                 )
+
+                # Average NAV line for this fund
+                if fund in avg_nav_by_fund:
+                    fig_combined.add_trace(
+                        line_trace(
+                            [fund_df["date"].iloc[0], fund_df["date"].iloc[-1]],
+                            [avg_nav_by_fund[fund], avg_nav_by_fund[fund]],
+                            webgl=fast_charts,
+                            mode="lines",
+                            name=f"{fund} Avg NAV",
+                            line=dict(color=FUND_COLORS.get(fund, "#999999"), dash="dash", width=1.5),
+                            hovertemplate=f"<b>{fund} Avg NAV</b><br>€%{{y:,.2f}}<extra></extra>",
+                            showlegend=True,
+                        )
+                    )
         
-        # Calculate y-axis range with 1% padding
-        y_axis_min, y_axis_max = calculate_y_axis_range_with_padding(fig_combined.data)
-
-        fig_combined.update_layout(
-            height=450,
-            hovermode="x unified",
-            xaxis_title="",
-            yaxis_title="NAV (€)",
-            template="plotly_white",
-            legend_title="Fund",
-            showlegend=False,
-            dragmode="pan",
-            uirevision="hist_combined",
-            newshape=dict(line_color="#888888"),
-            margin=dict(r=100)
-        )
-        fig_combined.update_xaxes(
-            rangeslider=dict(visible=True, thickness=0.07),
-            rangeselector=dict(
-                buttons=[
-                    dict(count=1, label="1M", step="month", stepmode="backward"),
-                    dict(count=3, label="3M", step="month", stepmode="backward"),
-                    dict(count=6, label="6M", step="month", stepmode="backward"),
-                    dict(count=1, label="YTD", step="year", stepmode="todate"),
-                    dict(count=1, label="1Y", step="year", stepmode="backward"),
-                    dict(count=3, label="3Y", step="year", stepmode="backward"),
-                    dict(step="all", label="All"),
-                ]
-            ),
-            showspikes=True,
-            spikemode="across",
-            spikesnap="cursor",
-            spikethickness=1,
-            spikecolor="#888888",
-        )
+            # Calculate y-axis range with 1% padding
+            y_axis_min, y_axis_max = trace_y_range(fig_combined.data)
+
+            fig_combined.update_layout(
+                height=450,
+                hovermode="x unified",
+                xaxis_title="",
+                yaxis_title="NAV (€)",
+                template="plotly_white",
+                legend_title="Fund",
+                showlegend=False,
+                dragmode="pan",
+                uirevision="hist_combined",
+                newshape=dict(line_color="#888888"),
+                margin=dict(r=100)
+            )
+            fig_combined.update_xaxes(
+                rangeslider=dict(visible=True, thickness=0.07),
+                rangeselector=dict(
+                    buttons=[
+                        dict(count=1, label="1M", step="month", stepmode="backward"),
+                        dict(count=3, label="3M", step="month", stepmode="backward"),
+                        dict(count=6, label="6M", step="month", stepmode="backward"),
+                        dict(count=1, label="YTD", step="year", stepmode="todate"),
+                        dict(count=1, label="1Y", step="year", stepmode="backward"),
+                        dict(count=3, label="3Y", step="year", stepmode="backward"),
+                        dict(step="all", label="All"),
+                    ]
+                ),
+                showspikes=True,
+                spikemode="across",
+                spikesnap="cursor",
+                spikethickness=1,
+                spikecolor="#888888",
+            )
         
-        # Update y-axis with padding
-        yaxis_config = dict(
-            rangemode="normal",
-            fixedrange=False,
-            showspikes=True,
-            spikemode="across",
-            automargin=True,
-        )
+            # Update y-axis with padding
+            yaxis_config = dict(
+                rangemode="normal",
+                fixedrange=False,
+                showspikes=True,
+                spikemode="across",
+                automargin=True,
+            )
         
-        # Apply calculated range with padding
-        if y_axis_min is not None and y_axis_max is not None:
-            yaxis_config['range'] = [y_axis_min, y_axis_max]
-            yaxis_config['autorange'] = False
+            # Apply calculated range with padding
+            if y_axis_min is not None and y_axis_max is not None:
+                yaxis_config['range'] = [y_axis_min, y_axis_max]
+                yaxis_config['autorange'] = False
             
-            # Add data label annotations for last point of each fund
-            for fund in selected_funds:
-                fund_df = plot_df[["date", fund]].dropna().sort_values("date")
-                if len(fund_df) > 0:
-                    last_date = fund_df["date"].iloc[-1]
-                    last_price = fund_df[fund].iloc[-1]
-                    fig_combined.add_annotation(
-                        x=last_date,
-                        y=last_price,
-                        text=f"€{last_price:,.2f}",
-                        showarrow=False,
-                        xanchor="left",
-                        xshift=10,
-                        font=dict(size=13, color=FUND_COLORS.get(fund, "#999999")),
-                        bordercolor=FUND_COLORS.get(fund, "#999999"),
-                        borderwidth=1.5,
-                        borderpad=4,
-                        bgcolor="rgba(255,255,255,0)"
-                    )
-        else:
-            yaxis_config['autorange'] = True
+                # Add data label annotations for last point of each fund
+                if fast_charts and fund_series:
+                    fig_combined.add_trace(value_labels_trace(
+                        [fund_df["date"].iloc[-1] for fund_df in fund_series.values()],
+                        list(latest_prices.values()),
+                        [f"€{price:,.2f}" for price in latest_prices.values()],
+                        [FUND_COLORS.get(fund, "#999999") for fund in fund_series],
+                        webgl=True,
+                    ))
+                else:
+                    for fund, fund_df in fund_series.items():
+                        if len(fund_df) > 0:
+                            last_date = fund_df["date"].iloc[-1]
+                            last_price = fund_df[fund].iloc[-1]
+                            fig_combined.add_annotation(
+                                x=last_date,
+                                y=last_price,
+                                text=f"€{last_price:,.2f}",
+                                showarrow=False,
+                                xanchor="left",
+                                xshift=10,
+                                font=dict(size=13, color=FUND_COLORS.get(fund, "#999999")),
+                                bordercolor=FUND_COLORS.get(fund, "#999999"),
+                                borderwidth=1.5,
+                                borderpad=4,
+                                bgcolor="rgba(255,255,255,0)"
+                            )
+            else:
+                yaxis_config['autorange'] = True
+        
+            if fast_charts:
+                fig_combined.update_xaxes(type="date", hoverformat="%Y-%m-%d")
+            fig_combined.update_yaxes(**yaxis_config)
+            return fig_combined
+
+        fig_combined = cached_figure("hist_combined", selected_funds, (start_d, end_d), "combined", build_combined_figure)
         
-        fig_combined.update_yaxes(**yaxis_config)
         
         st.plotly_chart(
             fig_combined,
@@ -1933,16 +1636,12 @@ def historical_prices():
         )
     else:
         # Grid view: render each fund chart as its own Plotly figure
-        if len(selected_funds) > 6:
-            cols_per_row = 2
-        else:
-            cols_per_row = min(3, len(selected_funds))
+        cols_per_row = grid_columns(len(selected_funds))
+        # WebGL only while the number of figures stays under the browser's context limit
+        grid_webgl = fast_charts and len(selected_funds) <= WEBGL_MAX_FIGURES
         
         # Prepare transaction data for markers (filtered by date range)
-        trans_df = transactions.copy()
-        trans_df["Date"] = pd.to_datetime(trans_df["Date"], errors="coerce")
-        trans_df = trans_df.dropna(subset=["Date"])
-        trans_df = trans_df[(trans_df["Date"] >= pd.to_datetime(start_d)) & (trans_df["Date"] <= pd.to_datetime(end_d))]
+        trans_df = get_transaction_store().between(start_d, end_d)
 
         # Render charts in rows of columns
         for row_start in range(0, len(selected_funds), cols_per_row):
@@ -1950,7 +1649,7 @@ def historical_prices():
             cols = st.columns(len(row_funds))
             for col_slot, fund in zip(cols, row_funds):
                 with col_slot:
-                    fund_df = plot_df[["date", fund]].dropna().sort_values("date")
+                    fund_df = plot_df[["date", fund]].dropna()
                     if len(fund_df) == 0:
                         st.info(f"No data for {fund}")
                         continue
@@ -1958,154 +1657,150 @@ def historical_prices():
                     # Get the latest price for this fund
                     latest_price = fund_df[fund].iloc[-1]
 
-                    fig_fund = go.Figure()
-                    # Price line
-                    fig_fund.add_trace(
-                        go.Scatter(
-                            x=fund_df["date"],
-                            y=fund_df[fund],
-                            mode="lines",
-                            name=fund,
-                            line=dict(color=FUND_COLORS.get(fund, "#999999"), width=2),
-                            hovertemplate=f"<b>{fund}</b><br>%{{x|%Y-%m-%d}}<br>€%{{y:,.2f}}<extra></extra>",
-                            showlegend=False,
-                        )
-                    )
-
-                    # Average NAV line
-                    if fund in avg_nav_by_fund:
+                    def build_fund_figure():
+                        fig_fund = go.Figure()
+                        # Price line (downsampled to the narrower grid cell width)
+                        trace_x, trace_y = get_data_graph().get("price_trace", fund, start_d, end_d, CHART_MAX_POINTS // cols_per_row)
                         fig_fund.add_trace(
-                            go.Scatter(
-                                x=[fund_df["date"].min(), fund_df["date"].max()],
-                                y=[avg_nav_by_fund[fund], avg_nav_by_fund[fund]],
+                            line_trace(
+                                trace_x,
+                                trace_y,
+                                webgl=grid_webgl,
                                 mode="lines",
-                                name=f"{fund} Avg NAV",
-                                line=dict(color=FUND_COLORS.get(fund, "#999999"), dash="dash", width=1.5),
-                                hovertemplate=f"<b>{fund} Avg NAV</b><br>€%{{y:,.2f}}<extra></extra>",
+                                name=fund,
+                                line=dict(color=FUND_COLORS.get(fund, "#999999"), width=2),
+                                hovertemplate=f"<b>{fund}</b><br>%{{x|%Y-%m-%d}}<br>€%{{y:,.2f}}<extra></extra>",
                                 showlegend=False,
                             )
                         )
 
-                    # Transaction markers
-                    fund_trans = trans_df[trans_df["Fund"] == fund]
-                    if len(fund_trans) > 0:
-                        trans_prices = []
-                        trans_dates = []
-                        hover_texts = []
-
-                        for _, trans_row in fund_trans.iterrows():
-                            trans_date = trans_row["Date"]
-                            closest_idx = (fund_df["date"] - trans_date).abs().idxmin()
-                            trans_price = fund_df.loc[closest_idx, fund]
-
-                            trans_prices.append(trans_price)
-                            trans_dates.append(trans_date)
-
-                            hover_text = (
-                                f"<b>Transaction</b><br>"
-                                f"Date: {trans_date.strftime('%Y-%m-%d')}<br>"
-                                f"Quantity: {trans_row['Quantity']:.3f}<br>"
-                                f"Price: €{trans_row['Price (€)']:.2f}<br>"
-                                f"Fees: €{trans_row['Fees (€)']:.2f}<br>"
-                                f"Total: €{(trans_row['Quantity'] * trans_row['Price (€)'] + trans_row['Fees (€)']):.2f}"
+                        # Average NAV line
+                        if fund in avg_nav_by_fund:
+                            fig_fund.add_trace(
+                                line_trace(
+                                    [fund_df["date"].iloc[0], fund_df["date"].iloc[-1]],
+                                    [avg_nav_by_fund[fund], avg_nav_by_fund[fund]],
+                                    webgl=grid_webgl,
+                                    mode="lines",
+                                    name=f"{fund} Avg NAV",
+                                    line=dict(color=FUND_COLORS.get(fund, "#999999"), dash="dash", width=1.5),
+                                    hovertemplate=f"<b>{fund} Avg NAV</b><br>€%{{y:,.2f}}<extra></extra>",
+                                    showlegend=False,
+                                )
                             )
-                            hover_texts.append(hover_text)
 
-                        fig_fund.add_trace(
-                            go.Scatter(
-                                x=trans_dates,
-                                y=trans_prices,
-                                mode="markers",
-                                name=f"{fund} Transactions",
-                                marker=dict(
-                                    size=10,
-                                    color=FUND_COLORS.get(fund, "#999999"),
-                                    symbol="circle",
-                                    line=dict(width=2, color="white")
-                                ),
-                                hovertemplate="%{text}<extra></extra>",
-                                text=hover_texts,
-                                showlegend=False,
+                        # Transaction markers
+                        fund_trans = trans_df[trans_df["Fund"] == fund]
+                        if len(fund_trans) > 0:
+                            trans_dates, trans_prices, hover_texts = transaction_markers(fund_df, fund, fund_trans)
+
+                            fig_fund.add_trace(
+                                line_trace(
+                                    trans_dates,
+                                    trans_prices,
+                                    webgl=grid_webgl,
+                                    mode="markers",
+                                    name=f"{fund} Transactions",
+                                    marker=dict(
+                                        size=10,
+                                        color=FUND_COLORS.get(fund, "#999999"),
+                                        symbol="circle",
+                                        line=dict(width=2, color="white")
+                                    ),
+                                    hovertemplate="%{text}<extra></extra>",
+                                    text=hover_texts,
+                                    showlegend=False,
+                                )
                             )
-                        )
 
-                    # Calculate y-axis range with 1% padding
-                    y_axis_min, y_axis_max = calculate_y_axis_range_with_padding(fig_fund.data)
+                        # Calculate y-axis range with 1% padding
+                        y_axis_min, y_axis_max = trace_y_range(fig_fund.data)
 
-                    fig_fund.update_layout(
-                        height=320,
-                        hovermode="x unified",
-                        template="plotly_white",
-                        legend_title="",
-                        showlegend=False,
-                        margin=dict(t=40, b=30, l=10, r=100),
-                        dragmode="pan",
-                        # Use shared uirevision to maintain zoom/pan state across Streamlit reruns.
-                        # Note: Streamlit + Plotly don't support real-time synchronization between
-                        # different chart instances. Users can manually apply the same time range to
-                        # all charts using the range selector buttons (1M, 3M, 6M, etc.) on each chart.
-                        uirevision=f"hist_grid_sync",
-                        newshape=dict(line_color="#888888"),
-                    )
+                        fig_fund.update_layout(
+                            height=320,
+                            hovermode="x unified",
+                            template="plotly_white",
+                            legend_title="",
+                            showlegend=False,
+                            margin=dict(t=40, b=30, l=10, r=100),
+                            dragmode="pan",
+                            # Use shared uirevision to maintain zoom/pan state across Streamlit reruns.
+                            # Note: Streamlit + Plotly don't support real-time synchronization between
+                            # different chart instances. Users can manually apply the same time range to
+                            # all charts using the range selector buttons (1M, 3M, 6M, etc.) on each chart.
+                            uirevision=f"hist_grid_sync",
+                            newshape=dict(line_color="#888888"),
+                        )
                     
-                    # Configure x-axis
-                    xaxis_config = dict(
-                        title_text="",
-                        rangeslider=dict(visible=True, thickness=0.07),
-                        rangeselector=dict(
-                            buttons=[
-                                dict(count=1, label="1M", step="month", stepmode="backward"),
-                                dict(count=3, label="3M", step="month", stepmode="backward"),
-                                dict(count=6, label="6M", step="month", stepmode="backward"),
-                                dict(count=1, label="YTD", step="year", stepmode="todate"),
-                                dict(count=1, label="1Y", step="year", stepmode="backward"),
-                                dict(count=3, label="3Y", step="year", stepmode="backward"),
-                                dict(step="all", label="All"),
-                            ]
-                        ),
-                        showspikes=True,
-                        spikemode="across",
-                        spikesnap="cursor",
-                        spikethickness=1,
-                        spikecolor="#888888",
-                    )
+                        # Configure x-axis
+                        xaxis_config = dict(
+                            title_text="",
+                            rangeslider=dict(visible=True, thickness=0.07),
+                            rangeselector=dict(
+                                buttons=[
+                                    dict(count=1, label="1M", step="month", stepmode="backward"),
+                                    dict(count=3, label="3M", step="month", stepmode="backward"),
+                                    dict(count=6, label="6M", step="month", stepmode="backward"),
+                                    dict(count=1, label="YTD", step="year", stepmode="todate"),
+                                    dict(count=1, label="1Y", step="year", stepmode="backward"),
+                                    dict(count=3, label="3Y", step="year", stepmode="backward"),
+                                    dict(step="all", label="All"),
+                                ]
+                            ),
+                            showspikes=True,
+                            spikemode="across",
+                            spikesnap="cursor",
+                            spikethickness=1,
+                            spikecolor="#888888",
+                        )
                     
-                    fig_fund.update_xaxes(**xaxis_config)
+                        fig_fund.update_xaxes(**xaxis_config)
                     
-                    # Update y-axis with padding
-                    yaxis_config = dict(
-                        title_text="NAV (€)",
-                        rangemode="normal",
-                        fixedrange=False,
-                        showspikes=True,
-                        spikemode="across",
-                        automargin=True,
-                    )
+                        # Update y-axis with padding
+                        yaxis_config = dict(
+                            title_text="NAV (€)",
+                            rangemode="normal",
+                            fixedrange=False,
+                            showspikes=True,
+                            spikemode="across",
+                            automargin=True,
+                        )
                     
-                    # Apply calculated range with padding
-                    if y_axis_min is not None and y_axis_max is not None:
-                        yaxis_config['range'] = [y_axis_min, y_axis_max]
-                        yaxis_config['autorange'] = False
+                        # Apply calculated range with padding
+                        if y_axis_min is not None and y_axis_max is not None:
+                            yaxis_config['range'] = [y_axis_min, y_axis_max]
+                            yaxis_config['autorange'] = False
                         
-                        # Add data label annotation for last point
-                        last_date = fund_df["date"].iloc[-1]
-                        fig_fund.add_annotation(
-                            x=last_date,
-                            y=latest_price,
-                            text=f"€{latest_price:,.2f}",
-                            showarrow=False,
-                            xanchor="left",
-                            xshift=10,
-                            font=dict(size=13, color=FUND_COLORS.get(fund, "#999999")),
-                            bordercolor=FUND_COLORS.get(fund, "#999999"),
-                            borderwidth=1.5,
-                            borderpad=4,
-                            bgcolor="rgba(255,255,255,0)"
-                        )
-                    else:
-                        yaxis_config['autorange'] = True
+                            # Add data label annotation for last point
+                            last_date = fund_df["date"].iloc[-1]
+                            if fast_charts:
+                                fig_fund.add_trace(value_labels_trace(
+                                    [last_date], [latest_price], [f"€{latest_price:,.2f}"],
+                                    [FUND_COLORS.get(fund, "#999999")], webgl=grid_webgl,
+                                ))
+                            else:
+                                fig_fund.add_annotation(
+                                    x=last_date,
+                                    y=latest_price,
+                                    text=f"€{latest_price:,.2f}",
+                                    showarrow=False,
+                                    xanchor="left",
+                                    xshift=10,
+                                    font=dict(size=13, color=FUND_COLORS.get(fund, "#999999")),
+                                    bordercolor=FUND_COLORS.get(fund, "#999999"),
+                                    borderwidth=1.5,
+                                    borderpad=4,
+                                    bgcolor="rgba(255,255,255,0)"
+                                )
+                        else:
+                            yaxis_config['autorange'] = True
                     
-                    fig_fund.update_yaxes(**yaxis_config)
+                        if grid_webgl:
+                            fig_fund.update_xaxes(type="date", hoverformat="%Y-%m-%d")
+                        fig_fund.update_yaxes(**yaxis_config)
+                        return fig_fund
+
+                    fig_fund = cached_figure("hist_grid", [fund], (start_d, end_d), ("grid", cols_per_row, grid_webgl), build_fund_figure)
                     
                     st.plotly_chart(
                         fig_fund,
@@ -2140,108 +1835,135 @@ def historical_prices():
     st.markdown(legend_row_html, unsafe_allow_html=True)
 
     # Historical Data Table with colored headers
+    profiling.lap("Historical table")
     st.divider()
     st.subheader("📊 Historical Data")
-    
-    # Prepare table: selected funds with most recent dates first
-    historical_data_df = hist_df_display[["date"] + selected_funds].copy() if selected_funds else pd.DataFrame()
-    historical_data_df["date"] = pd.to_datetime(historical_data_df["date"])
-    historical_data_df = historical_data_df.sort_values("date", ascending=False).reset_index(drop=True)
-    
-    if len(historical_data_df) > 0:
-        # Format dates as YYYY-MM-DD
-        historical_data_df["date"] = historical_data_df["date"].dt.strftime("%Y-%m-%d")
-        
-        # Build CSS for colored headers based on fund colors
-        header_css = "<style>\n"
-        header_css += "table th { font-weight: 600 !important; }\n"
-        header_css += "table th:first-child { background-color: rgba(100, 100, 100, 0.3) !important; }\n"
-        for idx, fund_name in enumerate(selected_funds, start=1):
-            hex_color = FUND_COLORS.get(fund_name, "#999999")
-            if hex_color.startswith('#'):
-                hex_color = hex_color[1:]
-            r, g, b = int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
-            header_css += f"table th:nth-child({idx+1}) {{ background-color: rgba({r}, {g}, {b}, 0.3) !important; }}\n"
-        header_css += "</style>\n"
-        st.markdown(header_css, unsafe_allow_html=True)
-        
-        # Compute and format daily performance per fund
-        perf_pct_map = {}
-        display_df = historical_data_df.copy()
-        # Map of transaction dates per fund for cell highlighting
-        tx_dates_by_fund = {}
-        if len(transactions) > 0:
-            tx_tmp = transactions.copy()
-            tx_tmp["Date"] = pd.to_datetime(tx_tmp["Date"], errors="coerce")
-            tx_tmp = tx_tmp.dropna(subset=["Date"]) 
-            for f in selected_funds:
-                tx_dates_by_fund[f] = set(tx_tmp[tx_tmp["Fund"] == f]["Date"].dt.strftime("%Y-%m-%d").tolist())
-
-        for col in selected_funds:
-            # Table is sorted descending by date; compare current to the next row (previous day)
-            perf = display_df[col].pct_change(periods=-1) * 100
-            perf_pct_map[col] = perf
-            def _fmt(val, p):
-                if st.session_state.data_masked:
-                    return "***.*€ (***.*%)"
-                if pd.isna(val):
-                    return ""
-                if pd.isna(p):
-                    return f"€{val:.2f}"
-                p_fmt = round(float(p), 2)
-                if p_fmt == 0:
-                    return f"€{val:.2f} (0.00%)"
-                sign = "+" if p_fmt > 0 else ""
-                return f"€{val:.2f} ({sign}{p_fmt:.2f}%)"
-            display_df[col] = [
-                _fmt(v, perf_pct_map[col].iloc[i]) for i, v in enumerate(display_df[col].values)
-            ]
-
-        # Style positive as slight green hue, negative as slight red
-        def _colorize(column):
-            perf = perf_pct_map.get(column.name, pd.Series([None] * len(display_df)))
-            styles = []
-            for i in range(len(display_df)):
-                p = perf.iloc[i]
-                p_fmt = None if pd.isna(p) else round(float(p), 2)
-                if p_fmt is None or p_fmt == 0:
-                    styles.append("")
-                elif p_fmt > 0:
-                    styles.append("color: #6BCB77; font-weight: 600;")
-                else:
-                    styles.append("color: #E26A6A; font-weight: 600;")
-            return styles
-
-        # Highlight transaction days with a slight grey hue
-        def _highlight_transactions(column):
-            col_name = column.name
-            if col_name == "date":
-                return [""] * len(display_df)
-            tx_dates = tx_dates_by_fund.get(col_name, set())
-            styles = []
-            for d in display_df["date"].tolist():
-                if d in tx_dates:
-                    styles.append("background-color: rgba(180, 180, 180, 0.15);")
-                else:
-                    styles.append("")
-            return styles
-
-        # Style: per-fund colorization and transaction highlights
-        styler = (
-            display_df.style
-            .apply(_colorize, subset=selected_funds, axis=0)
-            .apply(_highlight_transactions, subset=selected_funds, axis=0)
-        )
 
-        # Display formatted table
-        display_df = display_df[["date"] + selected_funds]
-        st.dataframe(styler, use_container_width=True)
+    # Prices newest first with % change and transaction-day flags, computed once per data version
+    table_prices, table_changes, table_traded = get_data_graph().get("historical_table", *selected_funds)
+
+    if len(table_prices) > 0:
+        # Server-side paging: only the visible page is styled and sent to the browser
+        col_size, col_page, col_rows = st.columns([1, 1, 2])
+        with col_size:
+            page_size = st.selectbox("Rows per page", HIST_TABLE_PAGE_SIZES, index=1, key="hist_table_page_size")
+        n_pages = max(1, -(-len(table_prices) // page_size))
+        # Keep the stored page valid after a larger page size shrinks the page count
+        if st.session_state.get("hist_table_page", 1) > n_pages:
+            st.session_state.hist_table_page = n_pages
+        with col_page:
+            page = st.number_input("Page", min_value=1, max_value=n_pages, step=1, key="hist_table_page")
+        lo = (page - 1) * page_size
+        hi = min(lo + page_size, len(table_prices))
+        with col_rows:
+            st.markdown("")
+            st.caption(f"Rows {lo + 1:,}–{hi:,} of {len(table_prices):,} (newest first)")
+
+        page_prices = table_prices.iloc[lo:hi]
+        page_changes = table_changes.iloc[lo:hi]
+        page_traded = table_traded.iloc[lo:hi]
+
+        # Price and % change side by side per fund
+        page_df = pd.DataFrame({"date": page_prices["date"].to_numpy()})
+        column_config = {"date": st.column_config.DateColumn("date", format="YYYY-MM-DD")}
+        for fund in selected_funds:
+            pct_col = f"{fund} %"
+            if st.session_state.data_masked:
+                page_df[fund] = "***.*€"
+                page_df[pct_col] = "***.*%"
+                column_config[fund] = st.column_config.TextColumn(fund)
+                column_config[pct_col] = st.column_config.TextColumn(pct_col)
+            else:
+                page_df[fund] = page_prices[fund].to_numpy()
+                page_df[pct_col] = page_changes[fund].to_numpy()
+                column_config[fund] = st.column_config.NumberColumn(fund, format="€%.2f")
+                column_config[pct_col] = st.column_config.NumberColumn(pct_col, format="%+.2f%%")
+
+        # Green/red for daily moves, grey background on transaction days; one vectorized pass over the page
+        change_values = page_changes.to_numpy()
+        color_css = np.where(
+            change_values > 0, "color: #6BCB77; font-weight: 600;",
+            np.where(change_values < 0, "color: #E26A6A; font-weight: 600;", ""),
+        )
+        traded_css = np.where(page_traded.to_numpy(), "background-color: rgba(180, 180, 180, 0.15);", "")
+        fund_css = np.char.add(color_css.astype(str), traded_css.astype(str))
+        page_css = pd.DataFrame("", index=page_df.index, columns=page_df.columns)
+        for idx, fund in enumerate(selected_funds):
+            page_css[fund] = fund_css[:, idx]
+            page_css[f"{fund} %"] = fund_css[:, idx]
+
+        styler = page_df.style.apply(lambda _: page_css, axis=None)
+        st.dataframe(styler, width="stretch", hide_index=True, column_config=column_config)
     else:
         st.info("No historical data to display")
 
+def import_transactions():
+    """Bulk import from a broker statement: map its columns, preview new / duplicate / rejected rows, append once."""
+    if "import_message" in st.session_state:
+        st.success(st.session_state.pop("import_message"))
+
+    statement = st.file_uploader("Broker statement (CSV or XLSX)", type=["csv", "txt", "xlsx", "xls"], key="import_statement")
+    if statement is None:
+        return
+    try:
+        raw = importer.read_statement(statement.getvalue(), statement.name)
+    except ImportError as e:
+        st.error(f"Reading {statement.name} needs an optional package: {e}")
+        return
+    except Exception as e:
+        st.error(f"Could not read {statement.name}: {e}")
+        return
+    if len(raw) == 0:
+        st.info("The statement has no rows")
+        return
+
+    # Column mapping, pre-filled from recognised header names
+    guessed = importer.guess_mapping(raw.columns)
+    options = [None, *raw.columns]
+    mapping = {}
+    for col, target in zip(st.columns(len(importer.TRANSACTION_COLUMNS)), importer.TRANSACTION_COLUMNS):
+        with col:
+            mapping[target] = st.selectbox(
+                target,
+                options,
+                index=options.index(guessed[target]) if target in guessed else 0,
+                format_func=lambda c: "—" if c is None else str(c),
+                key=f"import_map_{target}",
+            )
+    opt1, opt2 = st.columns(2)
+    with opt1:
+        dayfirst = st.checkbox("Day-first dates (DD/MM/YYYY)", key="import_dayfirst")
+    with opt2:
+        decimal_comma = st.checkbox("Decimal comma (1.234,56)", key="import_decimal_comma")
+
+    try:
+        preview = importer.plan_import(raw, mapping, funds, transactions, dayfirst=dayfirst, decimal_comma=decimal_comma)
+    except ValueError as e:
+        st.warning(str(e))
+        return
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("New transactions", len(preview.new))
+    m2.metric("Already recorded", len(preview.duplicates))
+    m3.metric("Rejected rows", len(preview.rejected))
+    if len(preview.new) > 0:
+        st.dataframe(importer.to_csv_rows(preview.new), width="stretch", hide_index=True)
+    if len(preview.duplicates) > 0:
+        with st.expander(f"Already recorded ({len(preview.duplicates)})"):
+            st.dataframe(importer.to_csv_rows(preview.duplicates), width="stretch", hide_index=True)
+    if len(preview.rejected) > 0:
+        with st.expander(f"Rejected rows ({len(preview.rejected)})"):
+            st.dataframe(preview.rejected, width="stretch")
+
+    if st.button(f"Import {len(preview.new)} transactions", type="primary", disabled=len(preview.new) == 0):
+        # All rows in one locked append; afterwards the same statement previews as already recorded
+        append_csv_rows(TRANSACTIONS_FILE, importer.to_csv_rows(preview.new))
+        invalidate_caches(TRANSACTIONS_FILE)
+        queue_github_sync(GITHUB_SYNCED_FILES, f"Import {len(preview.new)} transactions from {statement.name} via Streamlit")
+        st.session_state.import_message = f"Imported {len(preview.new)} transactions"
+        st.rerun()
+
 def add_transactions_and_funds():
-    global funds, transactions
-    
     # ---------- AUTHENTICATION ----------
     st.subheader("🔐 Authentication")
     if not st.session_state.authenticated:
@@ -2279,8 +2001,10 @@ def add_transactions_and_funds():
                             "Quantity": quantity,
                             "Fees (€)": fees,
                         }])
-                        transactions = pd.concat([transactions, new_contrib], ignore_index=True)
-                        transactions.to_csv(TRANSACTIONS_FILE, index=False)
+                        # One locked append; the rerun reloads the file
+                        append_csv_rows(TRANSACTIONS_FILE, new_contrib)
+                        invalidate_caches(TRANSACTIONS_FILE)
+                        queue_github_sync(GITHUB_SYNCED_FILES, f"Add {fund_choice} transaction via Streamlit")
                         st.success("Transaction added")
                         st.rerun()
         else:
@@ -2288,6 +2012,14 @@ def add_transactions_and_funds():
 
     st.divider()
 
+    st.header("📥 Import Transactions")
+    if len(funds) == 0:
+        st.info("Add a fund first")
+    else:
+        import_transactions()
+
+    st.divider()
+
     st.header("➕ Add Fund")
 
     if IS_OWNER:
@@ -2310,12 +2042,6 @@ def add_transactions_and_funds():
             if submitted:
                 if not fund_cat.strip() or not isin.strip() or not ticker.strip() or not name.strip():
                     st.error("All fields are required")
-                elif fund_cat in funds["Fund"].values:
-                    st.error(f"Fund '{fund_cat}' already exists")
-                elif isin in funds["ISIN"].values:
-                    st.error(f"ISIN '{isin}' already exists")
-                elif ticker in funds["Ticker"].values:
-                    st.error(f"Ticker '{ticker}' already exists")
                 else:
                     new_fund = pd.DataFrame([{
                         "Fund": fund_cat,
@@ -2325,31 +2051,53 @@ def add_transactions_and_funds():
                         "Type": fund_type,
                         "Colour": colour,
                     }])
-                    funds = pd.concat([funds, new_fund], ignore_index=True)
-                    # Save locally first for immediate app state
-                    funds.to_csv(FUNDS_FILE, index=False)
-
-                    # Attempt to push to GitHub repository
+                    # Save locally first for immediate app state; the uniqueness
+                    # checks run under the file lock against the rows on disk
                     try:
-                        csv_str = funds.to_csv(index=False)
-                        if GITHUB_TOKEN and GITHUB_REPO:
-                            ok = github_put_file(
-                                path=FUNDS_FILE,
-                                content_str=csv_str,
-                                message=f"Add/Update fund '{fund_cat}' via Streamlit",
-                            )
-                            if ok:
-                                st.success("Fund added and pushed to GitHub. GitHub Actions will refresh prices shortly.")
-                            else:
-                                st.warning("Fund saved locally but push to GitHub failed. Please check token/permissions.")
+                        append_csv_rows(FUNDS_FILE, new_fund, unique=("Fund", "ISIN", "Ticker"))
+                    except ValueError as e:
+                        st.error(str(e))
+                    else:
+                        invalidate_caches(FUNDS_FILE)
+
+                        # Push to the GitHub repository in the background
+                        if queue_github_sync(GITHUB_SYNCED_FILES, f"Add/Update fund '{fund_cat}' via Streamlit"):
+                            st.success("Fund added; it is pushed to GitHub in the background (see the sidebar). GitHub Actions will refresh prices shortly after.")
                         else:
                             st.warning("Fund saved locally. To sync to GitHub, configure GITHUB_TOKEN and GITHUB_REPO in Streamlit secrets.")
-                    except Exception as e:
-                        st.warning(f"Fund saved locally, but push failed: {e}")
 
-                    st.rerun()
+                        st.rerun()
 
 
+def github_sync_status():
+    """Sidebar line with the background GitHub sync state; it refreshes itself while a push is outstanding."""
+    queue = get_sync_queue(GITHUB_REPO, GITHUB_BRANCH, GITHUB_API_URL)
+    if queue is None:
+        return
+
+    def show():
+        status = queue.status()
+        files = ", ".join(status["paths"])
+        if status["state"] == "idle":
+            synced = f" (last push {datetime.fromtimestamp(status['last_synced']):%H:%M:%S})" if status["last_synced"] else ""
+            st.caption(f"☁️ GitHub sync: up to date{synced}")
+        elif status["state"] == "pending":
+            st.caption(f"⏳ GitHub sync: {status['edits']} edit(s) queued ({files})")
+        elif status["state"] == "syncing":
+            st.caption(f"🔄 GitHub sync: pushing {files}")
+        else:
+            if status["state"] == "retrying":
+                wait = max(int(status["next_attempt"] - datetime.now().timestamp()), 0)
+                st.warning(f"GitHub sync attempt {status['attempts']} failed, retrying in {wait}s: {status['last_error']}")
+            else:
+                st.error(f"GitHub sync stopped: {status['last_error']}")
+            if st.button("Retry sync now", key="github_sync_retry"):
+                queue.retry_now()
+
+    # Poll only while something is waiting to be pushed
+    busy = queue.status()["state"] != "idle"
+    st.fragment(show, run_every=3 if busy else None)()
+
 # Initialize theme state
 if "theme_dark" not in st.session_state:
     st.session_state.theme_dark = True
@@ -2367,6 +2115,19 @@ pg = st.navigation({
 })
 
 
+with st.sidebar:
+    st.toggle(
+        "⚡ Fast charts (WebGL)",
+        key="fast_charts",
+        help="Render line charts with WebGL and compact numeric arrays; value labels become plain text",
+    )
+    if st.session_state.authenticated:
+        st.toggle(
+            "⏱️ Profile renders",
+            key="profile_renders",
+            help="Time each page section, count cache hits/misses and log every run (same as ?profile=1)",
+        )
+        github_sync_status()
 
 # Custom CSS for navigation styling
 st.markdown("""
@@ -2424,4 +2185,10 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-pg.run()
+try:
+    pg.run()
+finally:
+    render_profile = profiling.current()
+    profiling.activate(None)
+if render_profile is not None:
+    show_render_profile(render_profile, pg.title)
@@ -0,0 +1,315 @@
+"""Portfolio computations independent of Streamlit.
+
+Functions here take the funds/transactions/prices frames (or the stores in
+data_store.py) and return plain DataFrames, Series and arrays: fund
+summaries, daily P/L and market value, investment evolution, allocation
+totals and table inputs. main.py renders their results; benchmarks and
+tests can import them without a Streamlit runtime.
+"""
+import numpy as np
+import pandas as pd
+
+from data_store import PriceStore, TransactionStore
+
+
+def gross_contribution_theor(frame: pd.DataFrame) -> pd.Series:
+    """Quantity × price + fees, rounded to the nearest 10 € (the planned contribution)."""
+    real = frame["Quantity"] * frame["Price (€)"] + frame["Fees (€)"]
+    return (real / 10).round() * 10
+
+
+def latest_changes(price_frame: pd.DataFrame, funds) -> pd.Series:
+    """Fund -> % change between the last two price rows, rounded to 2 decimals (NaN if either is missing)."""
+    funds = [f for f in funds if f in price_frame.columns]
+    if len(price_frame) < 2 or not funds:
+        return pd.Series(np.nan, index=pd.Index(funds, dtype=object), dtype=float)
+    last_two = price_frame[funds].iloc[-2:].apply(pd.to_numeric, errors="coerce")
+    return ((last_two.iloc[1] / last_two.iloc[0] - 1.0) * 100.0).round(2)
+
+
+def fund_summary(tx: pd.DataFrame, price_store: PriceStore | None, transaction_store: TransactionStore, fund_order) -> pd.DataFrame:
+    """Per-fund holdings, returns, MoM performance and weights, ordered like ``fund_order``.
+
+    ``tx`` holds the (already fund-filtered) transactions with parsed dates.
+    Quantities stay numeric; formatting is left to the caller.
+    """
+    df = tx.copy()
+    df["Gross Contribution (theor)"] = gross_contribution_theor(df)
+    df["Net Invested"] = df["Quantity"] * df["Price (€)"]
+
+    summary = df.groupby("Fund").agg({
+        "Quantity": "sum",
+        "Fees (€)": "sum",
+        "Gross Contribution (theor)": "sum",
+        "Net Invested": "sum"
+    }).reset_index()
+    summary = summary.rename(columns={
+        "Gross Contribution (theor)": "Gross Contributions (€)",
+        "Net Invested": "Net Invested (€)"
+    })
+    summary["Average NAV (€)"] = (summary["Gross Contributions (€)"] - summary["Fees (€)"]) / summary["Quantity"]
+
+    # Latest price, market value and latest daily % per fund
+    if price_store is not None and len(price_store) > 0:
+        summary["Latest Price (€)"] = summary["Fund"].map(price_store.latest_prices())
+        summary["Market Value (€)"] = summary["Quantity"].astype(float) * summary["Latest Price (€)"].fillna(0.0)
+        summary["Latest Change (%)"] = summary["Fund"].map(latest_changes(price_store.frame, summary["Fund"]))
+    else:
+        summary["Latest Price (€)"] = 0.0
+        summary["Market Value (€)"] = 0.0
+        summary["Latest Change (%)"] = np.nan
+
+    # Total Return [€ (%)] (before fees) and Net Return [€ (%)] (after fees)
+    summary["Total Return (€)"] = summary["Market Value (€)"] - summary["Gross Contributions (€)"]
+    summary["Total Return (%)"] = (summary["Total Return (€)"] / summary["Gross Contributions (€)"] * 100).round(2)
+    summary["Total Return [€ (%)]"] = summary["Total Return (€)"].round(2).astype(str) + " (" + summary["Total Return (%)"].astype(str) + "%)"
+    summary["Net Return (€)"] = summary["Market Value (€)"] - summary["Net Invested (€)"]
+    summary["Net Return (%)"] = (summary["Net Return (€)"] / summary["Net Invested (€)"] * 100).round(2)
+    summary["Net Return [€ (%)]"] = summary["Net Return (€)"].round(2).astype(str) + " (" + summary["Net Return (%)"].astype(str) + "%)"
+
+    # MoM performance (%): mean transaction price in the latest month vs the month before
+    if len(df) > 0:
+        current_month = df["Date"].dt.to_period("M").max()
+        prev_month = current_month - 1
+        mom_performance = {}
+        for fund in summary["Fund"]:
+            current_month_price = transaction_store.mean_price(fund, current_month.start_time, current_month.end_time)
+            prev_month_price = transaction_store.mean_price(fund, prev_month.start_time, prev_month.end_time)
+            if pd.notna(prev_month_price) and prev_month_price > 0 and pd.notna(current_month_price):
+                mom_performance[fund] = ((current_month_price - prev_month_price) / prev_month_price * 100)
+            else:
+                mom_performance[fund] = 0.0
+        summary["MoM performance (%)"] = summary["Fund"].map(mom_performance).round(2)
+    else:
+        summary["MoM performance (%)"] = 0.0
+
+    total_market_value = summary["Market Value (€)"].sum()
+    summary["Weight (Mkt Value)"] = (summary["Market Value (€)"] / total_market_value * 100).round(2)
+
+    # Order by funds.csv order
+    summary["fund_order"] = summary["Fund"].map({f: i for i, f in enumerate(fund_order)})
+    return summary.sort_values("fund_order").reset_index(drop=True)
+
+
+def holdings_before(dates: pd.Series, tx: pd.DataFrame, funds):
+    """Quantity of each fund held at the previous price date (t-1), for every date in ``dates``.
+
+    ``dates`` must be ascending. Returns ``(qty_prev_df, first_tx_date_by_fund)``
+    where ``qty_prev_df`` has a ``date`` column plus one column per fund.
+    """
+    funds = list(funds)
+    tx_sorted = tx.copy()
+    tx_sorted["Date"] = pd.to_datetime(tx_sorted["Date"], errors="coerce")
+    tx_sorted = tx_sorted.dropna(subset=["Date"]).sort_values("Date")
+    first_tx_date_by_fund = tx_sorted.groupby("Fund")["Date"].min().to_dict()
+
+    dates = pd.DataFrame({"date": dates.to_numpy()})
+    qty_prev_df = dates.copy()
+    for fund in funds:
+        fund_tx = tx_sorted[tx_sorted["Fund"] == fund][["Date", "Quantity"]].copy()
+        if len(fund_tx) == 0:
+            qty_prev_df[fund] = 0.0
+            continue
+        fund_tx["cum_qty"] = fund_tx["Quantity"].cumsum()
+        merged = pd.merge_asof(
+            dates,
+            fund_tx[["Date", "cum_qty"]].sort_values("Date"),
+            left_on="date",
+            right_on="Date",
+            direction="backward",
+        )
+        qty_prev_df[fund] = merged["cum_qty"].fillna(0.0).shift(1).fillna(0.0)
+    return qty_prev_df, first_tx_date_by_fund
+
+
+def ascending_prices(price_frame: pd.DataFrame, funds) -> pd.DataFrame:
+    """``date`` plus the ``funds`` price columns, rows with a valid date sorted ascending."""
+    hist_asc = price_frame[["date"] + list(funds)].copy()
+    hist_asc["date"] = pd.to_datetime(hist_asc["date"], errors="coerce")
+    hist_asc = hist_asc.dropna(subset=["date"])
+    return hist_asc.sort_values("date").reset_index(drop=True)
+
+
+def pnl_and_market_value(hist_asc: pd.DataFrame, qty_prev_df: pd.DataFrame, funds):
+    """Daily P/L and market value from ascending prices and the matching ``holdings_before`` quantities.
+
+    Returns ``(pnl_df, mv_df)``.
+    """
+    funds = list(funds)
+    # Daily P/L (absolute change in € per fund)
+    pnl_df = hist_asc[["date"]].copy()
+    for fund in funds:
+        price_col = pd.to_numeric(hist_asc[fund], errors="coerce")
+        price_diff = price_col.diff()  # t - t-1 in ascending order
+        pnl_df[f"{fund} (€)"] = qty_prev_df[fund] * price_diff
+        pnl_df[f"{fund} (%)"] = (price_diff / price_col.shift(1)) * 100
+
+    abs_change_series = pd.DataFrame([pnl_df[f"{f} (€)"] for f in funds]).sum(axis=0)
+    pnl_df["Daily P/L (€)"] = abs_change_series
+    prev_portfolio_value = pd.DataFrame([qty_prev_df[f] * pd.to_numeric(hist_asc[f], errors="coerce").shift(1) for f in funds]).sum(axis=0)
+    pnl_df["Daily P/L (%)"] = (abs_change_series / prev_portfolio_value.replace({0: pd.NA})) * 100
+
+    # Daily market value (price × quantity at t-1)
+    mv_df = hist_asc[["date"]].copy()
+    for fund in funds:
+        price_col = pd.to_numeric(hist_asc[fund], errors="coerce")
+        qty_prev = qty_prev_df[fund]
+        prev_price = price_col.shift(1)
+        mv_df[f"{fund} MV (€)"] = qty_prev * price_col
+        mv_df[f"{fund} MV Δ (€)"] = (qty_prev * price_col) - (qty_prev * prev_price)
+        mv_df[f"{fund} MV Δ (%)"] = (price_col / prev_price - 1) * 100
+
+    total_mv = pd.DataFrame([mv_df[f"{f} MV (€)"] for f in funds]).sum(axis=0)
+    prev_total_mv = total_mv.shift(1)
+    mv_df["Daily MV (€)"] = total_mv
+    mv_df["Daily MV Δ (€)"] = total_mv - prev_total_mv
+    mv_df["Daily MV Δ (%)"] = ((total_mv - prev_total_mv) / prev_total_mv.replace({0: pd.NA})) * 100
+
+    return pnl_df, mv_df
+
+
+def holdings_evolution(price_frame: pd.DataFrame, tx: pd.DataFrame, funds):
+    """Daily P/L and market value per fund and for the portfolio, ascending by date.
+
+    Holdings on each price date are the quantity held at the previous date
+    (t-1), so a purchase starts earning from the day after. Returns
+    ``(pnl_df, mv_df, first_tx_date_by_fund)``.
+    """
+    hist_asc = ascending_prices(price_frame, funds)
+    qty_prev_df, first_tx_date_by_fund = holdings_before(hist_asc["date"], tx, funds)
+    pnl_df, mv_df = pnl_and_market_value(hist_asc, qty_prev_df, funds)
+    return pnl_df, mv_df, first_tx_date_by_fund
+
+
+def contribution_steps(tx: pd.DataFrame, until=None) -> pd.DataFrame:
+    """Cumulative gross contribution (theor) as a stair line: ``date_dt`` / ``Gross Contribution``.
+
+    Each contribution date gets a point at the previous total and one at the
+    new total; with ``until`` the last total is extended to that date.
+    """
+    daily = gross_contribution_theor(tx).groupby(tx["Date"]).sum().sort_index()
+    dates = daily.index.to_numpy()
+    totals = daily.cumsum().to_numpy(dtype=float)
+    if len(dates) == 0:
+        return pd.DataFrame({"date_dt": pd.Series(dtype="datetime64[ns]"), "Gross Contribution": pd.Series(dtype=float)})
+    # (date_0, total_0), then (date_i, total_{i-1}) and (date_i, total_i) for every later date
+    step_dates = np.repeat(dates, 2)[1:]
+    step_values = np.repeat(totals, 2)[:-1]
+    stair_df = pd.DataFrame({"date_dt": step_dates, "Gross Contribution": step_values})
+    if until is not None and pd.notna(until) and pd.Timestamp(until) > stair_df["date_dt"].iloc[-1]:
+        stair_df = pd.concat([
+            stair_df,
+            pd.DataFrame({"date_dt": [pd.Timestamp(until)], "Gross Contribution": [totals[-1]]})
+        ], ignore_index=True)
+    return stair_df
+
+
+def market_value_history(tx: pd.DataFrame, price_frame: pd.DataFrame) -> pd.DataFrame:
+    """Portfolio market value on every price date: ``date`` / ``market_value``.
+
+    Quantity held per fund is the cumulative quantity of transactions dated
+    on or before each price date (one ``searchsorted`` per fund); funds
+    without a price that day are skipped. Only dates with a positive value
+    are kept.
+    """
+    prices = price_frame.drop_duplicates("date", keep="first")
+    dates = prices["date"].to_numpy(dtype="datetime64[ns]")
+    total = np.zeros(len(dates))
+    for fund, rows in tx.sort_values("Date", kind="mergesort").groupby("Fund", sort=False):
+        if fund not in prices.columns:
+            continue
+        cum_qty = np.concatenate([[0.0], rows["Quantity"].to_numpy(dtype=float).cumsum()])
+        held = cum_qty[np.searchsorted(rows["Date"].to_numpy(dtype="datetime64[ns]"), dates, side="right")]
+        total += np.nan_to_num(held * pd.to_numeric(prices[fund], errors="coerce").to_numpy(dtype=float))
+    keep = total > 0
+    if not keep.any():
+        return pd.DataFrame()
+    return pd.DataFrame({"date": dates[keep], "market_value": total[keep]})
+
+
+def allocation_cube(tx: pd.DataFrame, funds: pd.DataFrame, colors: dict, latest_prices: pd.Series | None) -> pd.DataFrame:
+    """Fund dimension table for the allocation pies: one row per invested fund.
+
+    Columns: Type, Asset Manager (first word of the fund name) and Colour,
+    plus the gross contribution ("GC") and latest market value ("MV", NaN
+    without a latest price).
+    """
+    invested = (tx["Quantity"] * tx["Price (€)"] + tx["Fees (€)"]).groupby(tx["Fund"]).sum()
+    quantity = tx.groupby("Fund")["Quantity"].sum()
+    dims = funds.drop_duplicates("Fund").set_index("Fund").reindex(invested.index)
+    cube = pd.DataFrame({
+        "Fund": invested.index,
+        "Type": dims["Type"].to_numpy(),
+        "Asset Manager": dims["Fund Name"].str.split().str[0].to_numpy(),
+        "Colour": [colors.get(fund, "#999999") for fund in invested.index],
+        "GC": invested.to_numpy(dtype=float),
+        "MV": np.nan,
+    })
+    if latest_prices is not None:
+        cube["MV"] = (quantity * latest_prices.reindex(invested.index)).to_numpy(dtype=float)
+    return cube
+
+
+def allocation_totals(cube: pd.DataFrame, by: str):
+    """(Gross Contributions, Market Value) per ``by`` category as ``Category``/``Value`` frames, largest first.
+
+    Funds without a category, and categories without any market value, are left out.
+    """
+    totals = cube.groupby(by)[["GC", "MV"]].sum(min_count=1)
+    alloc_gc = totals["GC"].dropna().sort_values(ascending=False).rename_axis("Category").reset_index(name="Value")
+    alloc_mv = totals["MV"].dropna().sort_values(ascending=False).rename_axis("Category").reset_index(name="Value")
+    return alloc_gc, alloc_mv
+
+
+def historical_table(price_frame: pd.DataFrame, tx: pd.DataFrame, funds):
+    """Historical Data table inputs for ``funds``: (prices, % changes, transaction days), newest first.
+
+    % changes are rounded to 2 decimals so the green/red split matches the
+    displayed value.
+    """
+    funds = list(funds)
+    prices = price_frame[["date", *funds]].iloc[::-1].reset_index(drop=True)
+    # Table is newest first; compare each row to the next one (previous day)
+    changes = (prices[funds].pct_change(periods=-1) * 100).round(2) + 0.0
+    days = prices["date"].dt.normalize()
+    traded = pd.DataFrame(
+        {fund: days.isin(tx.loc[tx["Fund"] == fund, "Date"].dt.normalize()).to_numpy() for fund in funds},
+        index=prices.index,
+    )
+    return prices, changes, traded
+
+
+def reconcile_transactions(trans_df: pd.DataFrame, quantity_decimals: dict) -> pd.DataFrame:
+    """Add the planned-vs-actual reconciliation columns to a transactions frame.
+
+    Gross Contribution (theor) is the contribution rounded to 10 €; Δ Net Inv
+    vs Exp and Δ Quantity compare the actual trade with it, and Δ Quantity
+    (rounded) uses each fund's display precision.
+    """
+    trans_df = trans_df.copy()
+    trans_df["Gross Contribution (real)"] = trans_df["Quantity"] * trans_df["Price (€)"] + trans_df["Fees (€)"]
+    trans_df["Gross Contribution (theor)"] = (trans_df["Gross Contribution (real)"] / 10).round() * 10
+    trans_df["Net Invested"] = trans_df["Quantity"] * trans_df["Price (€)"]
+    trans_df["Δ Net Inv vs Exp"] = trans_df["Net Invested"] - trans_df["Gross Contribution (theor)"] + trans_df["Fees (€)"]
+    trans_df["Quantity (theor)"] = (trans_df["Gross Contribution (theor)"] - trans_df["Fees (€)"]) / trans_df["Price (€)"]
+    trans_df["Δ Quantity"] = trans_df["Quantity"] - trans_df["Quantity (theor)"]
+    scale = 10.0 ** trans_df["Fund"].map(quantity_decimals).fillna(3).to_numpy(dtype=float)
+    trans_df["Δ Quantity (rounded)"] = np.round(trans_df["Δ Quantity"].to_numpy(dtype=float) * scale) / scale + 0.0
+    return trans_df
+
+
+def pl_quantity_approx(reconciled: pd.DataFrame, latest_prices: pd.Series) -> tuple[float, float]:
+    """P/L of the rounded Δ Quantity at the transaction price and at the latest price."""
+    latest_price = reconciled["Fund"].map(latest_prices)
+    delta_qty = reconciled["Δ Quantity (rounded)"]
+    return float((delta_qty * reconciled["Price (€)"]).sum()), float((delta_qty * latest_price).sum())
+
+
+def avg_nav_by_fund(transaction_store: TransactionStore, funds, start=None, end=None) -> dict:
+    """Fund -> average NAV of purchases in [start, end], for funds that bought any quantity there."""
+    result = {}
+    for fund in funds:
+        avg_nav = transaction_store.avg_nav(fund, start, end)
+        if avg_nav is not None:
+            result[fund] = avg_nav
+    return result
@@ -0,0 +1,115 @@
+"""Keep historical_data.csv in step with the copy the hourly workflow commits.
+
+``PriceRefresher`` polls the file's raw URL from a daemon thread with
+conditional requests (``If-None-Match`` on the last ETag), so an unchanged
+file costs one 304 round trip. New content is checked to be a price CSV,
+written over the local file with a temp file + rename, and ``on_update`` is
+called so the caller can drop its price-derived caches. ``url`` can point at
+a local stand-in server.
+"""
+import io
+import threading
+import time
+
+import pandas as pd
+import requests
+
+from data_store import write_bytes_atomic
+
+
+def raw_file_url(repo: str, branch: str, path: str) -> str:
+    return f"https://raw.githubusercontent.com/{repo}/{branch}/{path}"
+
+
+def price_csv_problem(data: bytes) -> str | None:
+    """Why ``data`` is not a usable historical_data.csv, or None if it is."""
+    try:
+        head = pd.read_csv(io.BytesIO(data), nrows=5)
+    except Exception as exc:
+        return f"unreadable CSV ({exc})"
+    if "Date" not in head.columns and "date" not in head.columns:
+        return "no Date column"
+    if len(head) == 0:
+        return "no price rows"
+    return None
+
+
+class PriceRefresher:
+    """Polls ``url`` every ``interval`` seconds and replaces ``path`` when the content changes.
+
+    ``check()`` may also be called directly (e.g. from a button); checks are
+    serialized.
+    """
+
+    def __init__(self, url: str, path: str, interval: float, on_update=None, token: str | None = None, timeout=(5, 30)):
+        self.url = url
+        self.path = path
+        self.interval = interval
+        self.on_update = on_update
+        self.timeout = timeout
+        self.session = requests.Session()
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.etag = None
+        self.last_checked = None
+        self.last_updated = None
+        self.last_error = None
+        self.updates = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        if interval > 0:
+            self._thread = threading.Thread(target=self._run, name="price-refresh", daemon=True)
+            self._thread.start()
+
+    def check(self) -> bool:
+        """One conditional GET; returns True if the local file was replaced."""
+        with self._lock:
+            headers = {"If-None-Match": self.etag} if self.etag else {}
+            # Time of the last attempt, so an unreachable URL still reports its error
+            self.last_checked = time.time()
+            try:
+                response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as exc:
+                self.last_error = str(exc)
+                return False
+            if response.status_code == 304:
+                self.last_error = None
+                return False
+            if response.status_code != 200:
+                self.last_error = f"HTTP {response.status_code}"
+                return False
+            data = response.content
+            problem = price_csv_problem(data)
+            if problem is not None:
+                self.last_error = f"ignored download: {problem}"
+                return False
+            self.etag = response.headers.get("ETag")
+            self.last_error = None
+            try:
+                with open(self.path, "rb") as f:
+                    unchanged = f.read() == data
+            except OSError:
+                unchanged = False
+            if unchanged:
+                return False
+            try:
+                write_bytes_atomic(self.path, data)
+            except OSError as exc:
+                self.last_error = f"could not write {self.path}: {exc}"
+                return False
+            self.last_updated = time.time()
+            self.updates += 1
+        if self.on_update is not None:
+            self.on_update()
+        return True
+
+    def wake(self):
+        """Run the next background check now instead of at the end of the interval."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self.check()
+            self._wake.wait(self.interval)
+            self._wake.clear()
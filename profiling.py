@@ -0,0 +1,154 @@
+"""Opt-in render profiling: per-section timings, cache hit/miss counts and peak memory.
+
+A ``RenderProfiler`` is activated for the current script thread; code marks
+its sections with ``section(name)`` / ``lap(name)``, which are no-ops while
+no profiler is active, so the instrumentation can stay in place permanently.
+Cache counts come from their owners: ``DependencyGraph.resolve`` adds to
+``calls`` and ``misses`` per node name (a miss is a recomputation), and
+``track_figures`` reports the figure cache's own hit/miss counters.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+_local = threading.local()
+
+
+def peak_rss_mb() -> float | None:
+    """Process high-water resident memory in MB (None where the platform does not report it)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RenderProfiler:
+    """Timings and cache counters for one script or fragment run.
+
+    Sections nest (``section``); inside a section, ``lap(name)`` starts a
+    sub-section that lasts until the next lap or the end of the section, so
+    long functions can be split without re-indenting them.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.entries = []  # [name, depth, seconds] in start order
+        self.calls = Counter()
+        self.misses = Counter()
+        self.figure_cache = None
+        self._figure_counts = None
+        self._started = time.perf_counter()
+        self._peak_rss_start = peak_rss_mb()
+        # Open frames; the root frame stands for the whole run and has no entry of its own
+        self._stack = [{"entry": None, "lap": None}]
+
+    def track_figures(self, figure_cache):
+        """Report ``figure_cache`` hits/misses made from now on (a FigureCache)."""
+        self.figure_cache = figure_cache
+        self._figure_counts = (figure_cache.hits, figure_cache.misses)
+
+    def _depth(self) -> int:
+        return len(self._stack) - 1 + sum(frame["lap"] is not None for frame in self._stack)
+
+    def _open(self, name: str):
+        self.entries.append([name, self._depth(), None])
+        return len(self.entries) - 1, time.perf_counter()
+
+    def _close(self, opened):
+        index, start = opened
+        self.entries[index][2] = time.perf_counter() - start
+
+    def _end_lap(self, frame):
+        if frame["lap"] is not None:
+            self._close(frame["lap"])
+            frame["lap"] = None
+
+    @contextmanager
+    def section(self, name: str):
+        frame = {"entry": self._open(name), "lap": None}
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._end_lap(frame)
+            self._stack.pop()
+            self._close(frame["entry"])
+
+    def lap(self, name: str):
+        frame = self._stack[-1]
+        self._end_lap(frame)
+        frame["lap"] = self._open(name)
+
+    def finish(self):
+        """Close any lap still open at the top level."""
+        self._end_lap(self._stack[0])
+
+    def report(self) -> dict:
+        """JSON-serializable summary of the run so far."""
+        caches = {
+            name: {"calls": self.calls[name], "misses": self.misses[name], "hits": max(self.calls[name] - self.misses[name], 0)}
+            for name in sorted(set(self.calls) | set(self.misses))
+        }
+        if self._figure_counts is not None:
+            hits0, misses0 = self._figure_counts
+            hits, misses = self.figure_cache.hits - hits0, self.figure_cache.misses - misses0
+            caches["figures"] = {"calls": hits + misses, "misses": misses, "hits": hits}
+        peak = peak_rss_mb()
+        return {
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "run": self.label,
+            "total_s": time.perf_counter() - self._started,
+            "sections": [{"section": name, "depth": depth, "seconds": seconds} for name, depth, seconds in self.entries],
+            "caches": caches,
+            "peak_rss_mb": peak,
+            "peak_rss_growth_mb": peak - self._peak_rss_start if peak is not None else None,
+        }
+
+
+def current() -> RenderProfiler | None:
+    return getattr(_local, "profiler", None)
+
+
+def activate(profiler: RenderProfiler | None):
+    """Make ``profiler`` the active one for this thread (None deactivates)."""
+    _local.profiler = profiler
+
+
+@contextmanager
+def section(name: str):
+    """Time the enclosed block into the active profiler, if any."""
+    profiler = current()
+    if profiler is None:
+        yield
+        return
+    with profiler.section(name):
+        yield
+
+
+def lap(name: str):
+    """Start a sub-section of the enclosing section in the active profiler, if any."""
+    profiler = current()
+    if profiler is not None:
+        profiler.lap(name)
+
+
+def append_log(path: str, report: dict, max_bytes: int = 1_000_000):
+    """Append ``report`` as one JSON line, rolling the file over to ``<path>.1`` past ``max_bytes``."""
+    try:
+        if os.path.exists(path) and os.path.getsize(path) > max_bytes:
+            os.replace(path, f"{path}.1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+    except OSError:
+        pass  # profiling must never break a render (e.g. read-only deployments)
@@ -0,0 +1,159 @@
+"""Background GitHub sync: edits queue file paths, a worker thread commits them.
+
+``SyncQueue.enqueue`` only records which files changed (and why) and
+returns. A daemon thread waits ``debounce`` seconds after the last edit,
+reads the files' current contents and commits them in one change set
+through ``GitHubSync``, so a burst of edits becomes one commit. Failures are
+retried with exponential backoff; authentication / permission / not-found
+errors pause the queue until the next edit or ``retry_now``. The pending
+change set is kept in a JSON file so it survives restarts.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from github_sync import GitHubSync, GitHubSyncError
+
+# HTTP statuses that retrying will not fix
+PERMANENT_STATUSES = {400, 401, 403, 404}
+
+
+class SyncQueue:
+    """Single pending change set plus the worker thread that pushes it."""
+
+    def __init__(self, sync: GitHubSync, state_path: str, debounce: float = 2.0, base_delay: float = 5.0, max_delay: float = 300.0):
+        self.sync = sync
+        self.state_path = state_path
+        self.debounce = debounce
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._syncing = False
+        self._last_synced = None
+        self._last_commit = None
+        # {"paths", "messages", "attempts", "next_attempt" (epoch s, None = paused), "last_error", "edits"}
+        self._pending = self._load()
+        if self._pending is not None:
+            self._pending["next_attempt"] = time.time()
+        self._thread = threading.Thread(target=self._run, name="github-sync", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self):
+        """Persist the pending change set (called with the lock held); errors only cost persistence."""
+        try:
+            if self._pending is None:
+                if os.path.exists(self.state_path):
+                    os.remove(self.state_path)
+                return
+            directory = os.path.dirname(os.path.abspath(self.state_path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".sync-", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._pending, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            pass
+
+    def enqueue(self, paths, message: str):
+        """Schedule ``paths`` to be committed with ``message``; merges into any change set not yet pushed."""
+        with self._cond:
+            pending = self._pending or {"paths": [], "messages": [], "attempts": 0, "last_error": None, "edits": 0}
+            pending["paths"] = list(dict.fromkeys([*pending["paths"], *paths]))
+            pending["messages"].append(message)
+            pending["edits"] += 1
+            # A new edit restarts the debounce window and resets the backoff
+            pending["attempts"] = 0
+            pending["next_attempt"] = time.time() + self.debounce
+            self._pending = pending
+            self._save()
+            self._cond.notify()
+
+    def retry_now(self):
+        """Push the pending change set immediately (e.g. after fixing the token)."""
+        with self._cond:
+            if self._pending is not None:
+                self._pending["next_attempt"] = time.time()
+                self._save()
+                self._cond.notify()
+
+    def status(self) -> dict:
+        """Snapshot for the UI: ``state`` is idle, pending, syncing, retrying or failed."""
+        with self._cond:
+            pending = self._pending
+            if self._syncing:
+                state = "syncing"
+            elif pending is None:
+                state = "idle"
+            elif pending["next_attempt"] is None:
+                state = "failed"
+            elif pending["attempts"] > 0:
+                state = "retrying"
+            else:
+                state = "pending"
+            return {
+                "state": state,
+                "paths": list(pending["paths"]) if pending else [],
+                "edits": pending["edits"] if pending else 0,
+                "attempts": pending["attempts"] if pending else 0,
+                "next_attempt": pending["next_attempt"] if pending else None,
+                "last_error": pending["last_error"] if pending else None,
+                "last_synced": self._last_synced,
+                "last_commit": self._last_commit,
+            }
+
+    @staticmethod
+    def _commit_message(messages: list) -> str:
+        if len(messages) == 1:
+            return messages[0]
+        return f"{len(messages)} edits via Streamlit\n\n" + "\n".join(f"- {message}" for message in messages)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None or self._pending["next_attempt"] is None or time.time() < self._pending["next_attempt"]:
+                    timeout = None
+                    if self._pending is not None and self._pending["next_attempt"] is not None:
+                        timeout = max(self._pending["next_attempt"] - time.time(), 0.0)
+                    self._cond.wait(timeout)
+                batch = self._pending
+                messages = list(batch["messages"])
+                self._syncing = True
+            error = None
+            try:
+                files = {}
+                for path in batch["paths"]:
+                    with open(path, "rb") as f:
+                        files[path] = f.read()
+                commit = self.sync.commit_files(files, self._commit_message(messages))
+            except Exception as exc:  # e.g. an unreadable file or an unexpected API response; never ends the worker
+                error = exc
+            with self._cond:
+                self._syncing = False
+                pending = self._pending
+                if error is None:
+                    self._last_synced = time.time()
+                    self._last_commit = commit or self._last_commit
+                    # Edits queued while pushing stay pending; their files are re-read next time
+                    pending["messages"] = pending["messages"][len(messages):]
+                    if not pending["messages"]:
+                        self._pending = None
+                    else:
+                        pending["edits"] = len(pending["messages"])
+                elif pending["attempts"] == 0 and pending["next_attempt"] > time.time():
+                    pass  # a newer edit arrived during the push; retry after its debounce
+                else:
+                    pending["attempts"] += 1
+                    pending["last_error"] = str(error) if isinstance(error, (OSError, GitHubSyncError)) else f"{type(error).__name__}: {error}"
+                    if getattr(error, "status", None) in PERMANENT_STATUSES:
+                        pending["next_attempt"] = None
+                    else:
+                        pending["next_attempt"] = time.time() + min(self.base_delay * 2 ** (pending["attempts"] - 1), self.max_delay)
+                self._save()
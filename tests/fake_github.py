@@ -0,0 +1,121 @@
+"""In-memory stand-in for the GitHub Git data API, served with ``http.server``.
+
+Implements what ``GitHubSync`` uses: GET ref / commit / recursive tree, POST
+trees (inline ``content`` over a ``base_tree``) and commits, PATCH ref
+(422 unless it is a fast-forward). Every request is recorded with its JSON
+body. ``race_next_ref_update`` lands a concurrent commit right before the
+next ref update, so that update is rejected like a lost push race.
+"""
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from github_sync import blob_sha
+
+
+class FakeGitHub:
+    def __init__(self, files: dict):
+        self.objects = {}  # sha -> (kind, data)
+        self.requests = []  # (method, git path, JSON body or None)
+        self.race_next_ref_update = None  # files for a concurrent commit before the next PATCH
+        self.head = self._commit(self._tree({path: self._blob(content) for path, content in files.items()}), [], "initial")
+        self._server = None
+
+    def _store(self, kind, data, sha):
+        self.objects[sha] = (kind, data)
+        return sha
+
+    def _blob(self, content: bytes) -> str:
+        return self._store("blob", content, blob_sha(content))
+
+    def _tree(self, entries: dict) -> str:
+        return self._store("tree", dict(entries), hashlib.sha1(json.dumps(sorted(entries.items())).encode()).hexdigest())
+
+    def _commit(self, tree: str, parents: list, message: str) -> str:
+        data = {"tree": tree, "parents": parents, "message": message}
+        return self._store("commit", data, hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest())
+
+    def commit(self, sha: str | None = None) -> dict:
+        return self.objects[sha or self.head][1]
+
+    def files(self, sha: str | None = None) -> dict:
+        """path -> bytes at commit ``sha`` (default: the branch head)."""
+        tree = self.objects[self.commit(sha)["tree"]][1]
+        return {path: self.objects[blob][1] for path, blob in tree.items()}
+
+    def push(self, files: dict, message: str = "concurrent push") -> str:
+        """Commit ``files`` on top of the head, as another client would."""
+        entries = dict(self.objects[self.commit()["tree"]][1])
+        entries.update({path: self._blob(content) for path, content in files.items()})
+        self.head = self._commit(self._tree(entries), [self.head], message)
+        return self.head
+
+    def calls(self, method: str, prefix: str) -> list:
+        return [body for m, path, body in self.requests if m == method and path.startswith(prefix)]
+
+    def _handle(self, method: str, path: str, body):
+        path = re.match(r"/repos/[^/]+/[^/]+/git/(.*)", path.split("?")[0]).group(1)
+        self.requests.append((method, path, body))
+        if method == "GET" and path.startswith("ref/heads/"):
+            return 200, {"object": {"sha": self.head}}
+        if method == "GET" and path.startswith("commits/"):
+            sha = path[len("commits/"):]
+            return 200, {"sha": sha, "tree": {"sha": self.commit(sha)["tree"]}}
+        if method == "GET" and path.startswith("trees/"):
+            sha = path[len("trees/"):]
+            entries = [{"path": p, "mode": "100644", "type": "blob", "sha": b} for p, b in self.objects[sha][1].items()]
+            return 200, {"sha": sha, "tree": entries}
+        if method == "POST" and path == "trees":
+            entries = dict(self.objects[body["base_tree"]][1]) if body.get("base_tree") else {}
+            for entry in body["tree"]:
+                entries[entry["path"]] = self._blob(entry["content"].encode("utf-8"))
+            return 201, {"sha": self._tree(entries)}
+        if method == "POST" and path == "commits":
+            return 201, {"sha": self._commit(body["tree"], body["parents"], body["message"])}
+        if method == "PATCH" and path.startswith("refs/heads/"):
+            if self.race_next_ref_update is not None:
+                self.push(self.race_next_ref_update)
+                self.race_next_ref_update = None
+            if self.commit(body["sha"])["parents"] != [self.head]:
+                return 422, {"message": "Update is not a fast forward"}
+            self.head = body["sha"]
+            return 200, {"object": {"sha": self.head}}
+        return 404, {"message": "Not Found"}
+
+    def start(self) -> str:
+        """Serve on a free localhost port in a daemon thread; returns the API base URL."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, method):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length)) if length else None
+                status, payload = fake._handle(method, self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._reply("GET")
+
+            def do_POST(self):
+                self._reply("POST")
+
+            def do_PATCH(self):
+                self._reply("PATCH")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,50 @@
+"""Stand-in for raw.githubusercontent.com serving one file with an ETag, via ``http.server``.
+
+Answers ``If-None-Match`` with 304 when the ETag matches; ``statuses``
+records the status of every response.
+"""
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeRawFile:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.statuses = []
+        self._server = None
+
+    @property
+    def etag(self) -> str:
+        return '"%s"' % hashlib.sha1(self.data).hexdigest()
+
+    def start(self) -> str:
+        """Serve on a free localhost port in a daemon thread; returns the file URL."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                etag = fake.etag
+                if self.headers.get("If-None-Match") == etag:
+                    fake.statuses.append(304)
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                fake.statuses.append(200)
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(fake.data)))
+                self.end_headers()
+                self.wfile.write(fake.data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/historical_data.csv"
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
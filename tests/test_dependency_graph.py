@@ -0,0 +1,91 @@
+import threading
+
+from dependency_graph import DependencyGraph
+from disk_cache import DiskCache
+
+
+def line_count(path):
+    with open(path) as f:
+        return len(f.readlines())
+
+
+def line_count_v2(path):
+    with open(path) as f:
+        return sum(1 for line in f if line.strip())
+
+
+def make_graph(cache_dir, data_path, compute=line_count):
+    graph = DependencyGraph(DiskCache(str(cache_dir), 1_000_000))
+    graph.file("data", str(data_path))
+    graph.node("lines", ["data"], compute, persist=True)
+    graph.node("double", ["lines"], lambda lines: lines * 2, persist=True)
+    return graph
+
+
+def test_persisted_nodes_survive_a_restart(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a\nb\n\n")
+    assert make_graph(tmp_path / "cache", data).get("double") == 6
+
+    restarted = make_graph(tmp_path / "cache", data)
+    assert restarted.get("double") == 6
+    assert restarted.computed["double"] == 0
+    assert restarted.loaded["double"] == 1
+
+
+def test_changed_code_is_not_served_from_disk(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a\nb\n\n")
+    make_graph(tmp_path / "cache", data).get("double")
+
+    # A new implementation upstream retires the stored results of every dependent node
+    deployed = make_graph(tmp_path / "cache", data, compute=line_count_v2)
+    assert deployed.get("double") == 4
+    assert deployed.computed["lines"] == 1
+    assert deployed.computed["double"] == 1
+    assert deployed.loaded["double"] == 0
+
+
+def test_changed_file_is_recomputed(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a\n")
+    make_graph(tmp_path / "cache", data).get("double")
+
+    data.write_text("a\nb\nc\n")
+    assert make_graph(tmp_path / "cache", data).get("double") == 6
+
+
+def test_unusable_cache_directory_falls_back_to_computing(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a\nb\n")
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+
+    graph = make_graph(blocker / "cache", data)
+
+    assert graph.disk_cache.enabled is False
+    assert graph.get("double") == 4
+    assert graph.computed["double"] == 1
+
+
+def test_slow_node_does_not_block_other_nodes(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a\nb\n")
+    started, release = threading.Event(), threading.Event()
+
+    def slow(lines):
+        started.set()
+        release.wait(5)
+        return lines
+
+    graph = make_graph(tmp_path / "cache", data)
+    graph.node("slow", ["lines"], slow)
+    worker = threading.Thread(target=graph.get, args=("slow",))
+    worker.start()
+    assert started.wait(5)
+
+    # Resolved while "slow" is still computing
+    assert graph.get("double") == 4
+    assert worker.is_alive()
+    release.set()
+    worker.join()
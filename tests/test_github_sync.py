@@ -0,0 +1,65 @@
+import pytest
+
+from fake_github import FakeGitHub
+from github_sync import GitHubSync
+
+FUNDS = b"Fund,Ticker\nUS,AAA\n"
+TRANSACTIONS = b"Date,Fund,Price (\xe2\x82\xac),Quantity,Fees (\xe2\x82\xac)\n2024-01-02,US,10.0,1.0,0.0\n"
+
+
+@pytest.fixture
+def github():
+    fake = FakeGitHub({"funds.csv": FUNDS, "transaction_history.csv": TRANSACTIONS, "README.md": b"readme\n"})
+    url = fake.start()
+    yield fake, GitHubSync("owner/repo", "token", branch="main", api_url=url)
+    fake.stop()
+
+
+def test_two_files_in_one_commit(github):
+    fake, sync = github
+    start = fake.head
+    files = {"funds.csv": FUNDS + b"EU,BBB\n", "transaction_history.csv": TRANSACTIONS + b"2024-01-03,EU,20.0,2.0,0.5\n"}
+
+    sha = sync.commit_files(files, "Add EU")
+
+    assert sha == fake.head
+    assert fake.commit()["parents"] == [start]
+    assert fake.commit()["message"] == "Add EU"
+    assert fake.files() == {**files, "README.md": b"readme\n"}
+    assert len(fake.calls("POST", "trees")) == 1
+    assert len(fake.calls("POST", "commits")) == 1
+    assert len(fake.calls("PATCH", "refs/heads/main")) == 1
+
+
+def test_unchanged_files_are_not_uploaded(github):
+    fake, sync = github
+    sync.commit_files({"funds.csv": FUNDS + b"EU,BBB\n"}, "Add EU")
+    fake.requests.clear()
+
+    # Only the transactions changed: the funds file stays out of the tree
+    sync.commit_files({"funds.csv": FUNDS + b"EU,BBB\n", "transaction_history.csv": TRANSACTIONS + b"2024-01-03,US,11.0,1.0,0.0\n"}, "Buy US")
+    (tree,) = fake.calls("POST", "trees")
+    assert [entry["path"] for entry in tree["tree"]] == ["transaction_history.csv"]
+    fake.requests.clear()
+
+    # Nothing changed: no upload and no commit at all
+    head = fake.head
+    assert sync.commit_files({"funds.csv": FUNDS + b"EU,BBB\n"}, "No-op") is None
+    assert fake.head == head
+    assert fake.calls("POST", "") == []
+    assert fake.calls("POST", "blobs") == []
+    assert fake.calls("PATCH", "") == []
+
+
+def test_rejected_ref_update_is_retried_on_the_new_head(github):
+    fake, sync = github
+    fake.race_next_ref_update = {"README.md": b"edited elsewhere\n"}
+
+    sha = sync.commit_files({"funds.csv": FUNDS + b"EU,BBB\n"}, "Add EU")
+
+    patches = fake.calls("PATCH", "refs/heads/main")
+    assert len(patches) == 2
+    concurrent = fake.commit()["parents"][0]
+    assert fake.commit(concurrent)["message"] == "concurrent push"
+    assert sha == fake.head
+    assert fake.files() == {"funds.csv": FUNDS + b"EU,BBB\n", "transaction_history.csv": TRANSACTIONS, "README.md": b"edited elsewhere\n"}
@@ -0,0 +1,92 @@
+import io
+
+import pandas as pd
+
+import importer
+
+FUNDS = pd.DataFrame({
+    "Fund": ["US", "EU"],
+    "Ticker": ["0P0001CRXW", "0P0000ZZZZ"],
+    "ISIN": ["LU0281484963", "IE00B4L5Y983"],
+})
+EMPTY = pd.DataFrame(columns=importer.TRANSACTION_COLUMNS)
+
+
+def statement(text: str, filename: str = "statement.csv") -> pd.DataFrame:
+    return importer.read_statement(text.encode("utf-8"), filename)
+
+
+def plan(raw, existing=EMPTY, **options):
+    return importer.plan_import(raw, importer.guess_mapping(raw.columns), FUNDS, existing, **options)
+
+
+def as_history(new: pd.DataFrame) -> pd.DataFrame:
+    """``new`` rows as main.py reads them back from transaction_history.csv after the append."""
+    buffer = io.StringIO()
+    importer.to_csv_rows(new).to_csv(buffer, index=False)
+    buffer.seek(0)
+    return pd.read_csv(buffer, parse_dates=["Date"])
+
+
+def test_reimporting_a_statement_adds_nothing():
+    raw = statement("Date,Fund,Price,Quantity,Fees\n2024-01-02,US,10.5,1.25,0\n2024-01-03,EU,20,2,0.5\n")
+    first = plan(raw)
+    assert len(first.new) == 2
+
+    again = plan(raw, existing=as_history(first.new))
+
+    assert len(again.new) == 0
+    assert len(again.duplicates) == 2
+    assert len(again.rejected) == 0
+
+
+def test_identical_trades_are_matched_one_to_one():
+    raw = statement("Date,Fund,Price,Quantity\n" + "2024-01-02,US,10,1\n" * 3)
+    existing = as_history(pd.DataFrame({
+        "Date": pd.to_datetime(["2024-01-02"]), "Fund": ["US"], "Price (€)": [10.0], "Quantity": [1.0], "Fees (€)": [0.0],
+    }))
+
+    preview = plan(raw, existing=existing)
+
+    assert len(preview.new) == 2
+    assert len(preview.duplicates) == 1
+
+
+def test_semicolon_statement_with_decimal_commas():
+    raw = statement(
+        "Trade Date;ISIN;Units;Price;Commission\n"
+        "14/10/2024;LU0281484963;4,588;1.261,53;0\n"
+        "03/02/2025;0p0000zzzz.F;1,5;270,00;\n"
+        "04/02/2025;0P0001CRXW;2;10,5;1,25\n"
+    )
+
+    preview = plan(raw, dayfirst=True, decimal_comma=True)
+
+    assert len(preview.rejected) == 0
+    new = preview.new
+    assert new["Date"].dt.strftime("%Y-%m-%d").tolist() == ["2024-10-14", "2025-02-03", "2025-02-04"]
+    # Funds by ISIN, by "<ticker>.F" in any case and by ticker
+    assert new["Fund"].tolist() == ["US", "EU", "US"]
+    assert new["Price (€)"].tolist() == [1261.53, 270.0, 10.5]
+    assert new["Quantity"].tolist() == [4.588, 1.5, 2.0]
+    # A blank commission counts as no fees
+    assert new["Fees (€)"].tolist() == [0.0, 0.0, 1.25]
+
+
+def test_rejected_rows_list_every_reason():
+    raw = statement(
+        "Date,Fund,Price,Quantity,Fees\n"
+        "2024-01-02,US,10,1,0\n"
+        "not a date,XX000,0,1,0\n"
+        "2024-01-03,EU,-5,0,-1\n"
+    )
+
+    preview = plan(raw)
+
+    assert len(preview.new) == 1
+    assert preview.rejected["Reason"].tolist() == [
+        "invalid date; unknown fund; price must be > 0",
+        "price must be > 0; quantity must be > 0; fees must be >= 0",
+    ]
+    # Rejected rows are shown as they appeared in the statement
+    assert preview.rejected["Fund"].tolist() == ["XX000", "EU"]
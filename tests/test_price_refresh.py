@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from fake_raw import FakeRawFile
+from price_refresh import PriceRefresher
+
+OLD_PRICES = b"Date,US\n2024-01-02,10.0\n2024-01-01,9.5\n"
+NEW_PRICES = b"Date,US\n2024-01-03,10.2\n2024-01-02,10.0\n2024-01-01,9.5\n"
+
+
+@pytest.fixture
+def setup(tmp_path):
+    path = tmp_path / "historical_data.csv"
+    path.write_bytes(b"Date,US\n2023-12-29,9.0\n")
+    raw = FakeRawFile(OLD_PRICES)
+    url = raw.start()
+    updates = []
+    # interval 0: no background thread, checks are driven by the test
+    refresher = PriceRefresher(url, str(path), 0, on_update=lambda: updates.append(path.read_bytes()))
+    yield raw, refresher, path, updates
+    raw.stop()
+
+
+def test_first_download_replaces_the_file(setup):
+    raw, refresher, path, updates = setup
+
+    assert refresher.check() is True
+
+    assert path.read_bytes() == OLD_PRICES
+    assert raw.statuses == [200]
+    assert refresher.etag == raw.etag
+    assert updates == [OLD_PRICES]
+    assert refresher.last_error is None
+
+
+def test_not_modified_leaves_the_file_alone(setup):
+    raw, refresher, path, updates = setup
+    refresher.check()
+    mtime = os.stat(path).st_mtime_ns
+
+    assert refresher.check() is False
+
+    assert raw.statuses == [200, 304]
+    assert os.stat(path).st_mtime_ns == mtime
+    assert updates == [OLD_PRICES]
+
+
+def test_changed_file_is_replaced_and_reported(setup):
+    raw, refresher, path, updates = setup
+    refresher.check()
+    raw.data = NEW_PRICES
+
+    assert refresher.check() is True
+
+    assert raw.statuses == [200, 200]
+    assert path.read_bytes() == NEW_PRICES
+    assert updates == [OLD_PRICES, NEW_PRICES]
+    assert refresher.updates == 2
+
+
+def test_invalid_csv_is_rejected(setup):
+    raw, refresher, path, updates = setup
+    before = path.read_bytes()
+    raw.data = b"<html>rate limited</html>\n"
+
+    assert refresher.check() is False
+
+    assert path.read_bytes() == before
+    assert updates == []
+    assert refresher.last_error.startswith("ignored download:")
+    # The rejected ETag is not remembered, so the next check downloads again
+    assert refresher.etag is None
+
+
+def test_unreachable_url_is_reported(tmp_path):
+    path = tmp_path / "historical_data.csv"
+    refresher = PriceRefresher("http://127.0.0.1:9/historical_data.csv", str(path), 0, timeout=(1, 1))
+
+    assert refresher.check() is False
+
+    assert refresher.last_checked is not None
+    assert refresher.last_error
+    assert not path.exists()
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from github_sync import GitHubSyncError
+from sync_queue import SyncQueue
+
+
+class ScriptedSync:
+    """Records every ``commit_files`` call and raises the scripted errors first, in order."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    def commit_files(self, files, message):
+        self.calls.append((time.time(), dict(files), message))
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"commit-{len(self.calls)}"
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def files(tmp_path):
+    funds, transactions = tmp_path / "funds.csv", tmp_path / "transaction_history.csv"
+    funds.write_bytes(b"Fund\nUS\n")
+    transactions.write_bytes(b"Date,Fund\n2024-01-02,US\n")
+    return str(funds), str(transactions)
+
+
+def make_queue(tmp_path, sync, **kwargs):
+    return SyncQueue(sync, str(tmp_path / "queue.json"), **{"debounce": 0.2, "base_delay": 0.1, "max_delay": 1.0, **kwargs})
+
+
+def test_edits_within_the_debounce_window_become_one_commit(tmp_path, files):
+    funds, transactions = files
+    sync = ScriptedSync()
+    queue = make_queue(tmp_path, sync)
+
+    queue.enqueue([transactions], "Add transaction")
+    queue.enqueue([funds, transactions], "Add fund")
+    wait_for(lambda: queue.status()["state"] == "idle")
+
+    assert len(sync.calls) == 1
+    _, pushed, message = sync.calls[0]
+    assert set(pushed) == {funds, transactions}
+    assert message == "2 edits via Streamlit\n\n- Add transaction\n- Add fund"
+    assert queue.status()["last_commit"] == "commit-1"
+    assert not (tmp_path / "queue.json").exists()
+
+
+def test_transient_failures_back_off_then_succeed(tmp_path, files):
+    sync = ScriptedSync(GitHubSyncError("bad gateway", 502), GitHubSyncError("bad gateway", 502))
+    queue = make_queue(tmp_path, sync)
+
+    queue.enqueue([files[0]], "Add fund")
+    wait_for(lambda: queue.status()["state"] == "retrying")
+    assert queue.status()["last_error"] == "bad gateway"
+    wait_for(lambda: queue.status()["state"] == "idle")
+
+    assert len(sync.calls) == 3
+    first, second, third = (called for called, _, _ in sync.calls)
+    # base_delay, then twice base_delay
+    assert second - first >= 0.1
+    assert third - second >= 0.2
+
+
+def test_permanent_failure_pauses_until_retry_now(tmp_path, files):
+    sync = ScriptedSync(GitHubSyncError("bad credentials", 401))
+    queue = make_queue(tmp_path, sync)
+
+    queue.enqueue([files[0]], "Add fund")
+    wait_for(lambda: queue.status()["state"] == "failed")
+    time.sleep(0.3)
+    assert len(sync.calls) == 1
+    assert queue.status()["next_attempt"] is None
+
+    queue.retry_now()
+    wait_for(lambda: queue.status()["state"] == "idle")
+    assert len(sync.calls) == 2
+
+
+def test_unexpected_error_is_retried_and_keeps_the_worker_alive(tmp_path, files):
+    sync = ScriptedSync(KeyError("sha"))
+    queue = make_queue(tmp_path, sync)
+
+    queue.enqueue([files[0]], "Add fund")
+    wait_for(lambda: queue.status()["state"] == "retrying")
+    assert queue.status()["last_error"] == "KeyError: 'sha'"
+    wait_for(lambda: queue.status()["state"] == "idle")
+
+    assert len(sync.calls) == 2
+    assert queue.status()["last_commit"] == "commit-2"